@@ -1,4 +1,8 @@
+import mmap
+import os
 import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 
 # Language tokens
 keywords = {
@@ -41,73 +45,270 @@ delimiters = {
     ':': 'COLON'
 }
 
-def obtener_tokens(codigo_fuente):
-    
+# Clasificación de lexemas fijos en una sola tabla
+clasificacion = {**keywords, **operators, **delimiters}
+
+# Expresión maestra: una sola alternancia con grupos nombrados, en el mismo
+# orden de prioridad que los patrones originales. Las cadenas no cruzan
+# líneas y el grupo ERROR consume un solo carácter desconocido.
+token_regex = re.compile(r"""
+    (?P<STRING>"[^"\n]*"|'[^'\n]*')
+  | (?P<OPERATOR>==|!=|<=|>=)
+  | (?P<SYMBOL>[=+\-*/<>(){};:])
+  | (?P<NUM>\d+\.\d+|\d+)
+  | (?P<ID>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<NEWLINE>\n)
+  | (?P<SKIP>[^\S\n]+)
+  | (?P<ERROR>.)
+""", re.VERBOSE)
+
+def obtener_tokens(codigo_fuente, linea_inicial=1):
+
     tokens_encontrados = []
-    lineas = codigo_fuente.split('\n')
-    linea_num = 0
+    append = tokens_encontrados.append
+    get_tipo = clasificacion.get
+    linea_num = linea_inicial
+    inicio_linea = 0
 
-    for linea in lineas:
-        linea_num += 1
-        pos = 0
-        linea = linea.rstrip()
-        
-        while pos < len(linea):
-            # Saltar espacios en blanco
-            if linea[pos].isspace():
-                pos += 1
-                continue
-            
-            
-            patterns = [
-                (r'\"[^\"]*\"', 'STRING'),      
-                (r"\'[^\']*\'", 'STRING'),      
-                (r'==|!=|<=|>=', 'OPERATOR'),   
-                (r'[=+\-*/<>(){};:]', 'SYMBOL'), 
-                (r'\d+\.\d+', 'NUM'),           
-                (r'\d+', 'NUM'),                
-                (r'[A-Za-z_][A-Za-z0-9_]*', 'ID') 
-            ]
-            
-            match = None
-            token_type = None
-            
-            for pattern, t_type in patterns:
-                regex_match = re.match(pattern, linea[pos:])
-                if regex_match:
-                    match = regex_match.group(0)
-                    token_type = t_type
-                    break
-            
-            if not match:
-                
-                tokens_encontrados.append(('ERROR', linea[pos], linea_num, pos + 1))
-                pos += 1
-                continue
-            
-            token = match
-            col = pos + 1
-            
-            # Token clasification
-            if token in keywords:
-                tipo = keywords[token]
-            elif token in operators:
-                tipo = operators[token]
-            elif token in delimiters:
-                tipo = delimiters[token]
-            elif token_type == 'NUM':
-                if '.' in token:
-                    tipo = 'NUM'
-                else:
-                    tipo = 'NUM'
-            elif token_type == 'STRING':
-                tipo = 'STRING'
-            elif token_type == 'ID':
-                tipo = 'ID'
-            else:
-                tipo = 'ERROR'
-
-            tokens_encontrados.append((tipo, token, linea_num, col))
-            pos += len(token)
+    for m in token_regex.finditer(codigo_fuente):
+        kind = m.lastgroup
+        if kind == 'SKIP':
+            continue
+        if kind == 'NEWLINE':
+            linea_num += 1
+            inicio_linea = m.end()
+            continue
+
+        # Palabras clave, operadores y delimitadores: una sola búsqueda
+        token = m.group()
+        append((get_tipo(token, kind), token, linea_num, m.start() - inicio_linea + 1))
 
     return tokens_encontrados
+
+
+# ---------------------------------------------------------
+# Buffer compacto de tokens
+# ---------------------------------------------------------
+# Tipos de token como enteros pequeños. El buffer guarda arreglos paralelos
+# (tipo, inicio, fin, línea, columna) que apuntan dentro del fuente, sin
+# copiar el texto de cada token.
+
+TIPOS_TOKEN = ('ERROR', 'ID', 'NUM', 'STRING',
+               *keywords.values(), *operators.values(), *delimiters.values())
+CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS_TOKEN)}
+
+# Lexemas fijos -> código, y código por grupo de la expresión maestra
+# (None: el grupo necesita buscar el lexema en CODIGO_LEXEMA)
+CODIGO_LEXEMA = {lexema: CODIGO_TIPO[tipo] for lexema, tipo in clasificacion.items()}
+CODIGO_GRUPO = {
+    'STRING': CODIGO_TIPO['STRING'],
+    'NUM': CODIGO_TIPO['NUM'],
+    'ERROR': CODIGO_TIPO['ERROR'],
+    'ID': None, 'OPERATOR': None, 'SYMBOL': None,
+}
+
+class TokenBuffer:
+    __slots__ = ('fuente', 'tipos', 'inicios', 'fines', 'lineas', 'columnas')
+
+    def __init__(self, fuente=''):
+        self.fuente = fuente
+        self.tipos = array('B')
+        self.inicios = array('q')
+        self.fines = array('q')
+        self.lineas = array('I')
+        self.columnas = array('I')
+
+    def __len__(self):
+        return len(self.tipos)
+
+    def texto(self, i):
+        return self.fuente[self.inicios[i]:self.fines[i]]
+
+    def __getitem__(self, i):
+        # Misma forma que las tuplas de obtener_tokens
+        return (TIPOS_TOKEN[self.tipos[i]], self.texto(i), self.lineas[i], self.columnas[i])
+
+    def __iter__(self):
+        for i in range(len(self.tipos)):
+            yield self[i]
+
+    @classmethod
+    def desde_tuplas(cls, tuplas):
+        """Buffer a partir de tuplas/Token ya lexados (tipo, valor, línea, columna)."""
+        partes = []
+        buf = cls()
+        pos = 0
+        for t in tuplas:
+            tipo, valor, linea, col = (t.type, t.value, t.line, t.col) if hasattr(t, 'type') else t
+            buf.tipos.append(CODIGO_TIPO[tipo])
+            buf.inicios.append(pos)
+            pos += len(valor)
+            buf.fines.append(pos)
+            buf.lineas.append(linea)
+            buf.columnas.append(col)
+            partes.append(valor)
+        buf.fuente = ''.join(partes)
+        return buf
+
+def obtener_buffer(codigo_fuente, linea_inicial=1):
+    """Como obtener_tokens, pero produce un TokenBuffer."""
+    buf = TokenBuffer(codigo_fuente)
+    add_tipo = buf.tipos.append
+    add_inicio = buf.inicios.append
+    add_fin = buf.fines.append
+    add_linea = buf.lineas.append
+    add_col = buf.columnas.append
+    get_codigo = CODIGO_LEXEMA.get
+    codigo_grupo = CODIGO_GRUPO
+    codigo_id = CODIGO_TIPO['ID']
+    linea_num = linea_inicial
+    inicio_linea = 0
+
+    for m in token_regex.finditer(codigo_fuente):
+        kind = m.lastgroup
+        if kind == 'SKIP':
+            continue
+        if kind == 'NEWLINE':
+            linea_num += 1
+            inicio_linea = m.end()
+            continue
+
+        inicio, fin = m.span()
+        codigo = codigo_grupo[kind]
+        if codigo is None:
+            codigo = get_codigo(m.group(), codigo_id)
+        add_tipo(codigo)
+        add_inicio(inicio)
+        add_fin(fin)
+        add_linea(linea_num)
+        add_col(inicio - inicio_linea + 1)
+
+    return buf
+
+# ---------------------------------------------------------
+# Tokenizador en streaming
+# ---------------------------------------------------------
+# Ningún token ocupa más de una línea, así que basta con tener en memoria
+# la línea actual: el consumo no depende del tamaño del archivo.
+
+def _tokens_linea(linea, linea_num):
+    get_tipo = clasificacion.get
+    for m in token_regex.finditer(linea):
+        kind = m.lastgroup
+        if kind == 'SKIP' or kind == 'NEWLINE':
+            continue
+        token = m.group()
+        yield (get_tipo(token, kind), token, linea_num, m.start() + 1)
+
+def _lineas_texto(leer, tam_trozo=1 << 16):
+    # Cortes solo en '\n', como obtener_tokens: un '\r' suelto es espacio
+    resto = ''
+    for trozo in iter(lambda: leer(tam_trozo), ''):
+        lineas = (resto + trozo).split('\n')
+        resto = lineas.pop()
+        for linea in lineas:
+            yield linea + '\n'
+    if resto:
+        yield resto
+
+def _lineas_binarias(leer_linea, encoding):
+    for linea in iter(leer_linea, b''):
+        yield linea.decode(encoding)
+
+def _lineas_mmap(f, encoding):
+    if os.fstat(f.fileno()).st_size == 0:
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        yield from _lineas_binarias(m.readline, encoding)
+
+def _lineas(fuente, usar_mmap, encoding):
+    if isinstance(fuente, (str, bytes, os.PathLike)):
+        if usar_mmap:
+            with open(fuente, "rb") as f:
+                yield from _lineas_mmap(f, encoding)
+        else:
+            with open(fuente, "r", encoding=encoding, newline="") as f:
+                yield from _lineas_texto(f.read)
+    elif isinstance(fuente, mmap.mmap):
+        yield from _lineas_binarias(fuente.readline, encoding)
+    elif usar_mmap and hasattr(fuente, "fileno"):
+        yield from _lineas_mmap(fuente, encoding)
+    elif hasattr(fuente, "encoding"):
+        # Archivo de texto; abierto con newline="" para que numere las
+        # líneas igual que obtener_tokens
+        yield from _lineas_texto(fuente.read)
+    else:
+        # Archivo binario
+        yield from _lineas_binarias(fuente.readline, encoding)
+
+def tokenizar(fuente, usar_mmap=False, encoding="utf-8"):
+    """
+    Genera los mismos tokens que obtener_tokens, de forma perezosa.
+
+    `fuente` puede ser una ruta, un archivo (texto o binario) o un mmap.
+    Con usar_mmap=True las rutas y archivos se recorren mapeados en memoria.
+    """
+    for linea_num, linea in enumerate(_lineas(fuente, usar_mmap, encoding), 1):
+        yield from _tokens_linea(linea, linea_num)
+
+def tokenizar_buffers(fuente, usar_mmap=False, encoding="utf-8", lineas_por_bloque=4096):
+    """Como tokenizar, pero genera un TokenBuffer por cada bloque de líneas."""
+    bloque = []
+    linea_inicial = 1
+    for linea in _lineas(fuente, usar_mmap, encoding):
+        bloque.append(linea)
+        if len(bloque) == lineas_por_bloque:
+            yield obtener_buffer(''.join(bloque), linea_inicial)
+            linea_inicial += len(bloque)
+            bloque = []
+    if bloque:
+        yield obtener_buffer(''.join(bloque), linea_inicial)
+
+
+# ---------------------------------------------------------
+# Lexer paralelo por bloques de líneas
+# ---------------------------------------------------------
+# Por la misma razón (no hay tokens multilínea) el fuente se puede cortar en
+# saltos de línea y lexar cada bloque por separado; solo hay que desplazar
+# el número de línea inicial de cada bloque.
+
+TAM_BLOQUE = 1 << 20        # caracteres por bloque (aprox.)
+
+def _lexar_bloque(args):
+    # Solo los arreglos vuelven al proceso principal, que ya tiene el texto
+    bloque, linea_inicial = args
+    buf = obtener_buffer(bloque, linea_inicial)
+    return buf.tipos, buf.inicios, buf.fines, buf.lineas, buf.columnas
+
+def _bloques(codigo_fuente, tam_bloque):
+    inicio = 0
+    linea = 1
+    n = len(codigo_fuente)
+    while inicio < n:
+        fin = codigo_fuente.find('\n', min(inicio + tam_bloque, n))
+        fin = n if fin == -1 else fin + 1
+        bloque = codigo_fuente[inicio:fin]
+        yield bloque, linea
+        linea += bloque.count('\n')
+        inicio = fin
+
+def obtener_buffers_paralelo(codigo_fuente, workers=None, tam_bloque=TAM_BLOQUE):
+    """
+    Lexa bloques de líneas completas en un pool de procesos y devuelve un
+    TokenBuffer por bloque, en orden.
+    """
+    bloques = list(_bloques(codigo_fuente, tam_bloque))
+    if len(bloques) <= 1 or workers == 1:
+        return [obtener_buffer(codigo_fuente)]
+
+    buffers = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for (bloque, _), arreglos in zip(bloques, pool.map(_lexar_bloque, bloques)):
+            buf = TokenBuffer(bloque)
+            buf.tipos, buf.inicios, buf.fines, buf.lineas, buf.columnas = arreglos
+            buffers.append(buf)
+    return buffers
+
+def obtener_tokens_paralelo(codigo_fuente, workers=None, tam_bloque=TAM_BLOQUE):
+    """Igual que obtener_tokens, lexando en paralelo con obtener_buffers_paralelo."""
+    return [t for buf in obtener_buffers_paralelo(codigo_fuente, workers, tam_bloque) for t in buf]
@@ -1,11 +1,17 @@
 from SintacticoSemantico import *
 
+# Operadores con versión tipada (iadd, flt, ...): aritmética y comparaciones de orden
+OPERADORES_TIPADOS = {'+': 'add', '-': 'sub', '*': 'mul', '/': 'div',
+                      '<': 'lt', '>': 'gt', '<=': 'le', '>=': 'ge'}
+
 class CodeGenerator:
-    def __init__(self):
+    def __init__(self, tabla=None):
         self.tac_code = []
         self.temp_counter = 0
         self.label_counter = 0
         self.symbol_table = {}
+        # TablaSemantica de un análisis sin errores; con ella se emiten opcodes tipados
+        self.tabla = tabla
     
     def new_temp(self):
         temp = f"t{self.temp_counter}"
@@ -52,11 +58,26 @@ class CodeGenerator:
             'EQ': '==', 'NEQ': '!='
         }
         
-        op = op_map.get(node.op, node.op)
+        op = self.operador_tipado(node, op_map.get(node.op, node.op))
         temp = self.new_temp()
         self.tac_code.append(f"{temp} := {left_temp} {op} {right_temp}")
         return temp
     
+    def operador_tipado(self, node, op):
+        """
+        iadd/isub/.../ige si los dos operandos son int, fadd/.../fge si
+        alguno es float; el operador genérico si no se conocen los tipos o
+        la operación no pasó el análisis semántico (nodo sin tipo).
+        """
+        if self.tabla is None or op not in OPERADORES_TIPADOS or self.tabla.tipo(node) is None:
+            return op
+        tipos = {self.tabla.tipo(node.left), self.tabla.tipo(node.right)}
+        if tipos == {'int'}:
+            return 'i' + OPERADORES_TIPADOS[op]
+        if tipos <= {'int', 'float'}:
+            return 'f' + OPERADORES_TIPADOS[op]
+        return op
+
     def visit_Literal(self, node):
         if node.value_type == 'string':
             # Mantener comillas para asignaciones
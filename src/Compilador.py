@@ -1,10 +1,10 @@
 # Compilador.py 
 import tkinter as tk
 from tkinter import scrolledtext, messagebox, filedialog, ttk
-from AnalizadorLexico import obtener_tokens
-from SintacticoSemantico import Parser, Token, SemanticAnalyzer, ast_to_str
+from AnalizadorLexico import obtener_tokens, obtener_buffer
+from SintacticoSemantico import Parser, SemanticAnalyzer, ast_to_str
 from CodeGen import CodeGenerator
-from tac_interpreter import TACInterpreter
+from backends import BACKENDS, DEFAULT_BACKEND
 
 class CompilerInterface:
     def __init__(self):
@@ -16,6 +16,7 @@ class CompilerInterface:
         self.setup_styles()
         self.last_program = None
         self.last_tac = None
+        self.backend = tk.StringVar(value=DEFAULT_BACKEND)
         self.setup_ui()
     
     def setup_styles(self):
@@ -96,6 +97,15 @@ class CompilerInterface:
             )
             btn.grid(row=0, column=i, padx=6, pady=6)
 
+        # Execution engine used by RUN / ALL
+        backend_frame = tk.Frame(self.window, bg="#F9E7EC")
+        backend_frame.pack()
+        tk.Label(backend_frame, text="Backend:",
+                 bg="#F9E7EC", fg="#B65075",
+                 font=("Helvetica", 10, "bold")).pack(side="left", padx=4)
+        ttk.Combobox(backend_frame, textvariable=self.backend,
+                     values=sorted(BACKENDS), state="readonly", width=12).pack(side="left")
+
         # NOTEBOOK
         self.notebook = ttk.Notebook(self.window)
         self.notebook.pack(fill="both", expand=True, padx=20, pady=15)
@@ -192,10 +202,7 @@ class CompilerInterface:
         self.output_area.delete("1.0", tk.END)
 
         try:
-            tokens_tuples = obtener_tokens(code)
-            tokens = [Token(t[0], t[1], t[2], t[3]) for t in tokens_tuples]
-
-            parser = Parser(tokens)
+            parser = Parser(obtener_buffer(code))
             program = parser.parse()
             self.last_program = program
 
@@ -254,7 +261,7 @@ class CompilerInterface:
         self.tac_area.delete("1.0", tk.END)
 
         try:
-            generator = CodeGenerator()
+            generator = CodeGenerator(sem.tabla)
             tac_code = generator.generate(self.last_program)
             self.last_tac = tac_code
 
@@ -292,8 +299,9 @@ class CompilerInterface:
         self.results_area.delete("1.0", tk.END)
 
         try:
-            interpreter = TACInterpreter()
-            results = interpreter.execute(self.last_tac)
+            interpreter = BACKENDS[self.backend.get()]()
+            results = interpreter.execute(self.last_program if interpreter.entrada == "ast"
+                                          else self.last_tac)
 
             self.results_area.insert(tk.END, "--- PROGRAM OUTPUT ---\n", "title")
             
@@ -330,10 +338,7 @@ class CompilerInterface:
                 messagebox.showwarning("Warning", "Write source code.")
                 return
                 
-            tokens_tuples = obtener_tokens(code)
-            tokens = [Token(t[0], t[1], t[2], t[3]) for t in tokens_tuples]
-            
-            parser = Parser(tokens)
+            parser = Parser(obtener_buffer(code))
             program = parser.parse()
             self.last_program = program
             
@@ -355,7 +360,7 @@ class CompilerInterface:
             self.output_area.insert(tk.END, "✅ NO SEMANTIC ERRORS\n\n", "success")
             
             # 3. TAC generation (only if no errors)
-            generator = CodeGenerator()
+            generator = CodeGenerator(sem.tabla)
             tac_code = generator.generate(program)
             self.last_tac = tac_code
             
@@ -365,8 +370,9 @@ class CompilerInterface:
             
             # 4. Execution (only if no errors)
             self.results_area.insert(tk.END, "--- EXECUTION ---\n", "title")
-            interpreter = TACInterpreter()
-            results = interpreter.execute(tac_code)
+            interpreter = BACKENDS[self.backend.get()]()
+            results = interpreter.execute(program if interpreter.entrada == "ast"
+                                          else tac_code)
             
             for r in results:
                 if r.startswith("Error:"):
@@ -3,14 +3,19 @@
 # Lenguaje propio basado en el Analizador Léxico 
 # =========================================================
 
-from AnalizadorLexico import obtener_tokens
-from dataclasses import dataclass, field
+import sys
+from AnalizadorLexico import obtener_tokens, TokenBuffer, TIPOS_TOKEN, CODIGO_TIPO
+from dataclasses import dataclass, field, fields
+from array import array
+from itertools import chain, count, islice
 from typing import List, Optional, Any, Dict
 
 # -----------------------
 # Token
 # -----------------------
 class Token:
+    __slots__ = ('type', 'value', 'line', 'col')
+
     def __init__(self, type_, value, line=0, col=0):
         self.type = type_
         self.value = value
@@ -22,61 +27,67 @@ class Token:
 # -----------------------
 # AST Nodes
 # -----------------------
-@dataclass
-class ASTNode: pass
+_ids_nodos = count()
+
+class ASTNode:
+    # Identificador único y estable de cada nodo: indexa la TablaSemantica
+    __slots__ = ('_nid',)
+
+    def __post_init__(self):
+        self._nid = next(_ids_nodos)
 
-@dataclass
+@dataclass(slots=True)
 class Program(ASTNode):
     statements: List['ASTNode'] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class VarDecl(ASTNode):
     var_type: str
     name: str
     expr: Optional['ASTNode'] = None
     line: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class Assign(ASTNode):
     name: str
     expr: 'ASTNode'
     line: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class BinaryOp(ASTNode):
     op: str
     left: 'ASTNode'
     right: 'ASTNode'
 
-@dataclass
+@dataclass(slots=True)
 class Literal(ASTNode):
     value: Any
     value_type: str
 
-@dataclass
+@dataclass(slots=True)
 class VarRef(ASTNode):
     name: str
     line: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class IfStmt(ASTNode):
     cond: 'ASTNode'
     then_block: List['ASTNode']
     else_block: Optional[List['ASTNode']]
     line: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class WhileStmt(ASTNode):
     cond: 'ASTNode'
     body: List['ASTNode']
     line: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class PrintStmt(ASTNode):
     expr: 'ASTNode'
     line: int = 0
 
-@dataclass
+@dataclass(slots=True)
 class InputStmt(ASTNode):
     name: str
     line: int = 0
@@ -87,135 +98,208 @@ class InputStmt(ASTNode):
 # -----------------------
 class ParserError(Exception): pass
 
+# Códigos enteros de los tipos de token que usa la gramática
+(T_PROGRAM, T_END, T_VAR, T_INT_KW, T_FLOAT_KW, T_BOOL_KW, T_STRING_KW,
+ T_ID, T_NUM, T_STRING, T_TRUE, T_FALSE, T_IF, T_ELSE, T_WHILE, T_PRINT, T_INPUT,
+ T_ASSIGN, T_SEMI, T_LPAREN, T_RPAREN, T_LBRACE, T_RBRACE) = (CODIGO_TIPO[t] for t in (
+    'PROGRAM', 'END', 'VAR', 'INT_KW', 'FLOAT_KW', 'BOOL_KW', 'STRING_KW',
+    'ID', 'NUM', 'STRING', 'TRUE', 'FALSE', 'IF', 'ELSE', 'WHILE', 'PRINT', 'INPUT',
+    'ASSIGN', 'SEMI', 'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE'))
+T_FIN = -1
+
+TIPOS_DECL = frozenset((T_VAR, T_INT_KW, T_FLOAT_KW, T_BOOL_KW, T_STRING_KW))
+TIPOS_NOMBRE = frozenset((T_INT_KW, T_FLOAT_KW, T_BOOL_KW, T_STRING_KW))
+OPS_COMPARACION = frozenset(CODIGO_TIPO[t] for t in ('LT', 'GT', 'LE', 'GE', 'EQ', 'NEQ'))
+OPS_SUMA = frozenset(CODIGO_TIPO[t] for t in ('PLUS', 'MINUS'))
+OPS_PRODUCTO = frozenset(CODIGO_TIPO[t] for t in ('MUL', 'DIV'))
+
+TAM_GRUPO_TOKENS = 4096
+
+def _buffers_de(tokens):
+    # Acepta un TokenBuffer, un iterable de TokenBuffer o un iterable de
+    # Token/tuplas (que se empaquetan en buffers por grupos)
+    if isinstance(tokens, TokenBuffer):
+        yield tokens
+        return
+    it = iter(tokens)
+    primero = next(it, None)
+    if primero is None:
+        return
+    it = chain((primero,), it)
+    if isinstance(primero, TokenBuffer):
+        yield from it
+        return
+    while True:
+        grupo = TokenBuffer.desde_tuplas(islice(it, TAM_GRUPO_TOKENS))
+        if not len(grupo):
+            return
+        yield grupo
+
 class Parser:
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
+    # Consume buffers compactos de tokens (TokenBuffer) con un token de
+    # anticipación; los tipos se comparan como enteros y el texto de un
+    # token solo se extrae cuando la gramática lo necesita.
+    def __init__(self, tokens):
+        self._buffers = _buffers_de(tokens)
+        self._buf = None
+        self._tipos = ()
+        self._i = 0
+        self._n = 0
+        self.tipo = T_FIN
         self.pos = 0
+        self._siguiente_buffer()
+
+    def _siguiente_buffer(self):
+        for buf in self._buffers:
+            if len(buf):
+                self._buf = buf
+                self._tipos = buf.tipos
+                self._i = 0
+                self._n = len(buf)
+                self.tipo = self._tipos[0]
+                return
+        self._buf = None
+        self.tipo = T_FIN
+
+    def valor(self):
+        return self._buf.texto(self._i) if self._buf else None
+
+    def linea(self):
+        return self._buf.lineas[self._i] if self._buf else 0
 
     def peek(self):
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        if self._buf is None:
+            return None
+        return Token(TIPOS_TOKEN[self.tipo], self.valor(), self.linea(), self._buf.columnas[self._i])
 
     def advance(self):
-        t = self.peek()
-        if t:
-            self.pos += 1
-        return t
-
-    def expect(self, typ):
-        t = self.peek()
-        if not t:
-            raise ParserError(f"Se esperaba '{typ}' pero se llegó al final del código.")
-        if t.type != typ:
+        if self._buf is None:
+            return
+        self.pos += 1
+        self._i += 1
+        if self._i < self._n:
+            self.tipo = self._tipos[self._i]
+        else:
+            self._siguiente_buffer()
+
+    def expect(self, tipo):
+        if self.tipo != tipo:
+            nombre = TIPOS_TOKEN[tipo]
+            if self._buf is None:
+                raise ParserError(f"Se esperaba '{nombre}' pero se llegó al final del código.")
             raise ParserError(
-                f"Error de sintaxis en línea {t.line}: "
-                f"se esperaba '{typ.replace('_KW', '').lower()}' pero se encontró '{t.value}'."
+                f"Error de sintaxis en línea {self.linea()}: "
+                f"se esperaba '{nombre.replace('_KW', '').lower()}' pero se encontró '{self.valor()}'."
             )
-        return self.advance()
+        self.advance()
+
+    def expect_valor(self, tipo):
+        # Los nombres se repiten mucho en el AST: se internan
+        valor = self.valor()
+        self.expect(tipo)
+        return sys.intern(valor)
 
     def parse(self):
         prog = Program()
-        if self.peek() and self.peek().type == 'PROGRAM':
+        if self.tipo == T_PROGRAM:
             self.advance()
-        while self.peek() and self.peek().type != 'END':
+        while self.tipo != T_FIN and self.tipo != T_END:
             prog.statements.append(self.parse_stmt())
-        if self.peek() and self.peek().type == 'END':
+        if self.tipo == T_END:
             self.advance()
         return prog
 
     # ----- Statements -----
     def parse_stmt(self):
-        t = self.peek()
-        if not t:
+        t = self.tipo
+        if t == T_FIN:
             raise ParserError("EOF inesperado")
 
-        if t.type in ('VAR', 'INT_KW', 'FLOAT_KW', 'BOOL_KW', 'STRING_KW'):
+        if t in TIPOS_DECL:
             return self.parse_vardecl()
-        if t.type == 'ID':
+        if t == T_ID:
             return self.parse_assign()
-        if t.type == 'IF':
+        if t == T_IF:
             return self.parse_if()
-        if t.type == 'WHILE':
+        if t == T_WHILE:
             return self.parse_while()
-        if t.type == 'PRINT':
+        if t == T_PRINT:
             return self.parse_print()
-        if t.type == 'INPUT':
+        if t == T_INPUT:
             return self.parse_input()
 
-        raise ParserError(f"Error en línea {t.line}: token inesperado '{t.value}'")
+        raise ParserError(f"Error en línea {self.linea()}: token inesperado '{self.valor()}'")
 
     def parse_vardecl(self):
-        t = self.peek()
-        tipo = None
-        if t.type in ('INT_KW', 'FLOAT_KW', 'BOOL_KW', 'STRING_KW'):
-            tipo = self.advance().value
-        elif t.type == 'VAR':
-            self.advance()
+        linea = self.linea()
+        if self.tipo in TIPOS_NOMBRE:
+            tipo = self.valor()
+        else:
             tipo = 'var'
-        linea = t.line
-        name = self.expect('ID').value
+        self.advance()
+        name = self.expect_valor(T_ID)
         expr = None
-        if self.peek() and self.peek().type == 'ASSIGN':
+        if self.tipo == T_ASSIGN:
             self.advance()
             expr = self.parse_expr()
-        self.expect('SEMI')
+        self.expect(T_SEMI)
         return VarDecl(tipo, name, expr, line=linea)
 
     def parse_assign(self):
-        name_token = self.expect('ID')
-        name = name_token.value
-        linea = name_token.line
-        self.expect('ASSIGN')
+        linea = self.linea()
+        name = self.expect_valor(T_ID)
+        self.expect(T_ASSIGN)
         expr = self.parse_expr()
-        self.expect('SEMI')
+        self.expect(T_SEMI)
         return Assign(name, expr, line=linea)
 
+    def parse_block(self):
+        self.expect(T_LBRACE)
+        stmts = []
+        while self.tipo != T_FIN and self.tipo != T_RBRACE:
+            stmts.append(self.parse_stmt())
+        self.expect(T_RBRACE)
+        return stmts
+
     def parse_if(self):
-        if_token = self.expect('IF')
-        self.expect('LPAREN')
+        linea = self.linea()
+        self.expect(T_IF)
+        self.expect(T_LPAREN)
         cond = self.parse_expr()
-        self.expect('RPAREN')
-        self.expect('LBRACE')
-        then_block = []
-        while self.peek() and self.peek().type != 'RBRACE':
-            then_block.append(self.parse_stmt())
-        self.expect('RBRACE')
+        self.expect(T_RPAREN)
+        then_block = self.parse_block()
         else_block = None
-        if self.peek() and self.peek().type == 'ELSE':
+        if self.tipo == T_ELSE:
             self.advance()
-            self.expect('LBRACE')
-            else_block = []
-            while self.peek() and self.peek().type != 'RBRACE':
-                else_block.append(self.parse_stmt())
-            self.expect('RBRACE')
-        return IfStmt(cond, then_block, else_block, line=if_token.line)
+            else_block = self.parse_block()
+        return IfStmt(cond, then_block, else_block, line=linea)
 
     def parse_while(self):
-        while_token = self.expect('WHILE')
-        self.expect('LPAREN')
+        linea = self.linea()
+        self.expect(T_WHILE)
+        self.expect(T_LPAREN)
         cond = self.parse_expr()
-        self.expect('RPAREN')
-        self.expect('LBRACE')
-        body = []
-        while self.peek() and self.peek().type != 'RBRACE':
-            body.append(self.parse_stmt())
-        self.expect('RBRACE')
-        return WhileStmt(cond, body, line=while_token.line)
+        self.expect(T_RPAREN)
+        body = self.parse_block()
+        return WhileStmt(cond, body, line=linea)
 
     def parse_print(self):
-        print_token = self.expect('PRINT')
-        self.expect('LPAREN')
+        linea = self.linea()
+        self.expect(T_PRINT)
+        self.expect(T_LPAREN)
         expr = self.parse_expr()
-        self.expect('RPAREN')
-        self.expect('SEMI')
-        return PrintStmt(expr, line=print_token.line)
+        self.expect(T_RPAREN)
+        self.expect(T_SEMI)
+        return PrintStmt(expr, line=linea)
 
     def parse_input(self):
-        input_token = self.expect('INPUT')
-        self.expect('LPAREN')
-        name = self.expect('ID').value
-        self.expect('RPAREN')
-        self.expect('SEMI')
-        return InputStmt(name, line=input_token.line)
+        linea = self.linea()
+        self.expect(T_INPUT)
+        self.expect(T_LPAREN)
+        name = self.expect_valor(T_ID)
+        self.expect(T_RPAREN)
+        self.expect(T_SEMI)
+        return InputStmt(name, line=linea)
 
     # ----- Expresiones -----
     def parse_expr(self):
@@ -223,71 +307,147 @@ class Parser:
 
     def parse_comparison(self):
         left = self.parse_addition()
-        while self.peek() and self.peek().type in ('LT','GT','LE','GE','EQ','NEQ'):
-            op = self.advance().type
+        while self.tipo in OPS_COMPARACION:
+            op = TIPOS_TOKEN[self.tipo]
+            self.advance()
             right = self.parse_addition()
             left = BinaryOp(op, left, right)
         return left
 
     def parse_addition(self):
         left = self.parse_multiplication()
-        while self.peek() and self.peek().type in ('PLUS','MINUS'):
-            op = self.advance().type
+        while self.tipo in OPS_SUMA:
+            op = TIPOS_TOKEN[self.tipo]
+            self.advance()
             right = self.parse_multiplication()
             left = BinaryOp(op, left, right)
         return left
 
     def parse_multiplication(self):
         left = self.parse_term()
-        while self.peek() and self.peek().type in ('MUL','DIV'):
-            op = self.advance().type
+        while self.tipo in OPS_PRODUCTO:
+            op = TIPOS_TOKEN[self.tipo]
+            self.advance()
             right = self.parse_term()
             left = BinaryOp(op, left, right)
         return left
 
     def parse_term(self):
-        t = self.peek()
-        if not t:
+        t = self.tipo
+        if t == T_FIN:
             raise ParserError("EOF en expresión")
-        
-        if t.type == 'NUM':
+
+        if t == T_NUM:
+            value = self.valor()
             self.advance()
-            return Literal(float(t.value) if '.' in t.value else int(t.value),
-                        'float' if '.' in t.value else 'int')
-        
-        if t.type == 'TRUE':
+            return Literal(float(value) if '.' in value else int(value),
+                        'float' if '.' in value else 'int')
+
+        if t == T_TRUE:
             self.advance()
             return Literal(True, 'bool')
-        
-        if t.type == 'FALSE':
+
+        if t == T_FALSE:
             self.advance()
             return Literal(False, 'bool')
-        
-        if t.type == 'STRING':
+
+        if t == T_STRING:
+            value = self.valor()
             self.advance()
-            return Literal(t.value, 'string')
-        
-        if t.type == 'ID':
-            tok = self.advance()
-            return VarRef(tok.value, line=tok.line)
-        
-        if t.type == 'LPAREN':
+            return Literal(value, 'string')
+
+        if t == T_ID:
+            linea = self.linea()
+            return VarRef(self.expect_valor(T_ID), line=linea)
+
+        if t == T_LPAREN:
             self.advance()
             expr = self.parse_expr()
-            self.expect('RPAREN')
+            self.expect(T_RPAREN)
             return expr
-        
-        raise ParserError(f"Error en línea {t.line}: token inesperado '{t.value}' en expresión")
+
+        raise ParserError(f"Error en línea {self.linea()}: token inesperado '{self.valor()}' en expresión")
 
 # -----------------------
 # Semantic Analyzer
 # -----------------------
 
+class TablaSemantica:
+    """
+    Anotaciones de tipo y ámbito de los nodos del AST, fuera de los nodos.
+
+    Se indexa por el identificador denso de cada nodo (ASTNode._nid); tipo y
+    ámbito se guardan como códigos pequeños en dos arreglos paralelos.
+    """
+    __slots__ = ('_base', 'tipos', 'ambitos', 'anotados', '_codigos', '_nombres')
+
+    def __init__(self):
+        self._base = None
+        self.tipos = array('B')
+        self.ambitos = array('B')
+        self.anotados = 0
+        self._codigos: Dict[Optional[str], int] = {None: 0}
+        self._nombres: List[Optional[str]] = [None]
+
+    def __len__(self):
+        return self.anotados
+
+    def _indice(self, node):
+        if self._base is None:
+            self._base = node._nid
+        i = node._nid - self._base
+        if i < 0:
+            # Nodo creado antes que el primero anotado: correr la base
+            relleno = bytes(-i)
+            self.tipos = array('B', relleno) + self.tipos
+            self.ambitos = array('B', relleno) + self.ambitos
+            self._base = node._nid
+            i = 0
+        while len(self.tipos) <= i:
+            self.tipos.append(0)
+            self.ambitos.append(0)
+        if not (self.tipos[i] or self.ambitos[i]):
+            self.anotados += 1
+        return i
+
+    def _codigo(self, nombre):
+        c = self._codigos.get(nombre)
+        if c is None:
+            c = self._codigos[nombre] = len(self._nombres)
+            self._nombres.append(nombre)
+        return c
+
+    def _leer(self, arreglo, node):
+        if self._base is None:
+            return None
+        i = node._nid - self._base
+        if 0 <= i < len(arreglo):
+            return self._nombres[arreglo[i]]
+        return None
+
+    def anotar_tipo(self, node, tipo):
+        i = self._indice(node)
+        self.tipos[i] = self._codigo(tipo)
+
+    def anotar_ambito(self, node, ambito):
+        i = self._indice(node)
+        self.ambitos[i] = self._codigo(ambito)
+
+    def tipo(self, node):
+        return self._leer(self.tipos, node)
+
+    def ambito(self, node):
+        return self._leer(self.ambitos, node)
+
+
 class SemanticAnalyzer:
     def __init__(self):
         self.global_symbols: Dict[str, str] = {}
         self.scopes: List[Dict[str, str]] = []  # pila de ámbitos
         self.errors: List[str] = []
+        self.tabla = TablaSemantica()
+        # Tipo de cada nombre declarado (el TAC no distingue ámbitos)
+        self.tipos_variables: Dict[str, str] = {}
 
     # --- Utilidades de manejo de ámbito ---
     def enter_scope(self):
@@ -304,8 +464,11 @@ class SemanticAnalyzer:
         if name in current:
             self.errors.append(f"Error en línea {node.line}: redeclaración de '{name}' en este ámbito")
         current[name] = tipo
-        node._tipo = tipo
-        node._ambito = "local" if self.scopes else "global"
+        previo = self.tipos_variables.setdefault(name, tipo)
+        if previo != tipo:
+            self.tipos_variables[name] = "desconocido"
+        self.tabla.anotar_tipo(node, tipo)
+        self.tabla.anotar_ambito(node, "local" if self.scopes else "global")
 
     def lookup(self, name):
         for scope in reversed(self.scopes):
@@ -337,8 +500,8 @@ class SemanticAnalyzer:
 
     def visit_Assign(self, node):
         tipo_var = self.lookup(node.name)
-        node._ambito = "local" if self.scopes else "global"
-        node._tipo = tipo_var or "desconocido"
+        self.tabla.anotar_ambito(node, "local" if self.scopes else "global")
+        self.tabla.anotar_tipo(node, tipo_var or "desconocido")
         if not tipo_var:
             self.errors.append(f"Error en línea {node.line}: variable no declarada '{node.name}'")
             return
@@ -349,8 +512,8 @@ class SemanticAnalyzer:
             )
 
     def visit_IfStmt(self, node):
-        node._ambito = "global"
-        node._tipo = "bool"
+        self.tabla.anotar_ambito(node, "global")
+        self.tabla.anotar_tipo(node, "bool")
         tipo_cond = self.eval_expr(node.cond)
         if tipo_cond != 'bool':
             self.errors.append(f"Error en línea {node.line}: la condición del 'if' debe ser booleana")
@@ -369,8 +532,8 @@ class SemanticAnalyzer:
             self.exit_scope()
 
     def visit_WhileStmt(self, node):
-        node._ambito = "global"
-        node._tipo = "bool"
+        self.tabla.anotar_ambito(node, "global")
+        self.tabla.anotar_tipo(node, "bool")
         tipo_cond = self.eval_expr(node.cond)
         if tipo_cond != 'bool':
             self.errors.append(f"Error en línea {node.line}: la condición del 'while' debe ser booleana")
@@ -381,27 +544,27 @@ class SemanticAnalyzer:
         self.exit_scope()
 
     def visit_PrintStmt(self, node):
-        node._ambito = "global"
-        node._tipo = "void"
+        self.tabla.anotar_ambito(node, "global")
+        self.tabla.anotar_tipo(node, "void")
         self.eval_expr(node.expr)
 
     def visit_InputStmt(self, node):
-        node._ambito = "global"
-        node._tipo = "string"
+        self.tabla.anotar_ambito(node, "global")
+        self.tabla.anotar_tipo(node, "string")
         if not self.lookup(node.name):
             self.errors.append(f"Advertencia en línea {node.line}: '{node.name}' no está declarada antes de input()")
 
     # --- Evaluación de expresiones ---
     def eval_expr(self, node):
         if isinstance(node, Literal):
-            node._tipo = node.value_type
-            node._ambito = "local" if self.scopes else "global"
+            self.tabla.anotar_tipo(node, node.value_type)
+            self.tabla.anotar_ambito(node, "local" if self.scopes else "global")
             return node.value_type
 
         if isinstance(node, VarRef):
             tipo = self.lookup(node.name)
-            node._ambito = "local" if self.scopes else "global"
-            node._tipo = tipo or "desconocido"
+            self.tabla.anotar_ambito(node, "local" if self.scopes else "global")
+            self.tabla.anotar_tipo(node, tipo or "desconocido")
             if not tipo:
                 self.errors.append(f"Error en línea {node.line}: variable no declarada '{node.name}'")
             return tipo
@@ -409,33 +572,33 @@ class SemanticAnalyzer:
         if isinstance(node, BinaryOp):
             left = self.eval_expr(node.left)
             right = self.eval_expr(node.right)
-            node._ambito = "local" if self.scopes else "global"
+            self.tabla.anotar_ambito(node, "local" if self.scopes else "global")
             
             # Operaciones aritméticas
             if node.op in ('PLUS', 'MINUS', 'MUL', 'DIV'):
                 if left == right == 'int':
-                    node._tipo = 'int'
+                    self.tabla.anotar_tipo(node, 'int')
                     return 'int'
                 if left == right == 'float':
-                    node._tipo = 'float'
+                    self.tabla.anotar_tipo(node, 'float')
                     return 'float'
                 self.errors.append(f"Error: operación inválida {left} {node.op} {right}")
             
             # Operaciones de comparación (numéricas)
             elif node.op in ('LT', 'GT', 'LE', 'GE'):
                 if left in ('int', 'float') and right in ('int', 'float'):
-                    node._tipo = 'bool'
+                    self.tabla.anotar_tipo(node, 'bool')
                     return 'bool'
                 self.errors.append(f"Error: operación inválida {left} {node.op} {right}")
             
             # Operaciones de igualdad (para cualquier tipo compatible)
             elif node.op in ('EQ', 'NEQ'):
                 if left == right:  # Mismo tipo
-                    node._tipo = 'bool'
+                    self.tabla.anotar_tipo(node, 'bool')
                     return 'bool'
                 elif (left in ('int', 'float') and right in ('int', 'float')):
                     # Permitir comparación entre int y float
-                    node._tipo = 'bool'
+                    self.tabla.anotar_tipo(node, 'bool')
                     return 'bool'
                 else:
                     self.errors.append(f"Error: operación inválida {left} {node.op} {right}")
@@ -523,13 +686,29 @@ def ast_to_str(node, indent=0):
 # ---------------------------------------------------------
 # Árbol Semántico Anotado
 # ---------------------------------------------------------
-def ast_to_semantic_str(node, indent=0):
+def ast_children(node):
+    """Hijos directos de un nodo, en el orden de sus campos."""
+    for f in fields(node):
+        value = getattr(node, f.name)
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, ASTNode):
+                    yield item
+        elif isinstance(value, ASTNode):
+            yield value
+
+
+def ast_to_semantic_str(node, tabla, indent=0):
+    """
+    Árbol con los tipos y ámbitos que dejó el análisis semántico; `tabla`
+    es la TablaSemantica del SemanticAnalyzer que recorrió este AST.
+    """
     pad = "  " * indent
     if not isinstance(node, ASTNode):
         return ""
 
-    tipo = getattr(node, "_tipo", None)
-    ambito = getattr(node, "_ambito", "global")
+    tipo = tabla.tipo(node)
+    ambito = tabla.ambito(node) or "global"
     info_extra = ""
     if tipo:
         info_extra += f" [tipo={tipo}]"
@@ -538,13 +717,8 @@ def ast_to_semantic_str(node, indent=0):
 
     s = pad + f"{type(node).__name__}{info_extra}\n"
 
-    for attr, value in vars(node).items():
-        if isinstance(value, list):
-            for item in value:
-                if isinstance(item, ASTNode):
-                    s += ast_to_semantic_str(item, indent + 1)
-        elif isinstance(value, ASTNode):
-            s += ast_to_semantic_str(value, indent + 1)
+    for child in ast_children(node):
+        s += ast_to_semantic_str(child, tabla, indent + 1)
 
     return s
 
@@ -552,7 +726,8 @@ def ast_to_semantic_str(node, indent=0):
 # ---------------------------------------------------------
 # Generador de árbol en formato Graphviz (DOT)
 # ---------------------------------------------------------
-def ast_to_dot(node):
+def ast_to_dot(node, tabla):
+    """Grafo DOT del AST con el tipo de cada nodo según `tabla` (TablaSemantica)."""
     lines = [
         "digraph AST {",
         '    rankdir=LR;',
@@ -593,6 +768,9 @@ def ast_to_dot(node):
             op = op_map.get(getattr(node, 'op', ''), '')
             if op:
                 label += f"\\nOperador: {escape_label(op)}"
+        tipo = tabla.tipo(node)
+        if tipo:
+            label += f"\\nTipo: {escape_label(tipo)}"
         lines.append(f'    {nid} [label="{label}"];')
         return nid
 
@@ -602,13 +780,8 @@ def ast_to_dot(node):
         nid = add_node(node)
         if parent:
             lines.append(f"    {parent} -> {nid};")
-        for attr, value in vars(node).items():
-            if isinstance(value, list):
-                for item in value:
-                    if isinstance(item, ASTNode):
-                        walk(item, nid)
-            elif isinstance(value, ASTNode):
-                walk(value, nid)
+        for child in ast_children(node):
+            walk(child, nid)
         return nid
 
     walk(node)
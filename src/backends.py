@@ -0,0 +1,14 @@
+# backends.py
+# Motores de ejecución disponibles para el TAC, por nombre (run.py y la GUI).
+
+from tac_interpreter import TACInterpreter
+from closure_backend import ClosureInterpreter
+from python_backend import PythonBackend
+
+BACKENDS = {
+    "tac": TACInterpreter,
+    "closures": ClosureInterpreter,
+    "python": PythonBackend,
+}
+
+DEFAULT_BACKEND = "tac"
@@ -0,0 +1,167 @@
+# batch.py
+# Compilación (y ejecución opcional) de muchos programas en un pool de
+# procesos, con un informe JSON o JSONL de cada archivo.
+#
+#   python run.py tests/ --jobs 8 --report informe.jsonl
+#   python run.py "generados/**/*.src" --no-execute --report informe.json
+#
+# Cada registro tiene: file, status ("ok", "semantic_errors", "error" o
+# "execution_errors"), errors, output (None sin ejecutar), instructions,
+# cached y los tiempos compile_seconds y run_seconds. El lote se ejecuta
+# siempre con el intérprete de TAC.
+
+import functools
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import CacheCompilacion, Compilado, clave, opciones_clave
+from embed import CompiledProgram, CompilationError, compile_source
+
+
+def es_patron(ruta):
+    return any(c in ruta for c in "*?[")
+
+
+def expandir(rutas):
+    """Archivos de una lista de archivos, directorios (*.src recursivo) y globs, sin repetir."""
+    archivos = []
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            archivos.extend(sorted(glob.glob(os.path.join(ruta, "**", "*.src"), recursive=True)))
+        elif es_patron(ruta):
+            archivos.extend(sorted(glob.glob(ruta, recursive=True)))
+        else:
+            archivos.append(ruta)
+    return list(dict.fromkeys(archivos))
+
+
+def _compilar(codigo, fuente, cache, optimize, registers, unroll, limits):
+    """(CompiledProgram o None, errores semánticos, si vino de la caché)."""
+    key = None
+    if cache is not None:
+        key = clave(fuente, opciones_clave(optimize, registers, unroll))
+        guardado = cache.cargar(key)
+        if guardado is not None:
+            if guardado.errores:
+                return None, guardado.errores, True
+            return CompiledProgram(guardado.tac, guardado.tipos, guardado.programa, **limits), [], True
+    try:
+        programa = compile_source(codigo, optimize=optimize, registers=registers, unroll=unroll, **limits)
+    except CompilationError as e:
+        if cache is not None:
+            cache.guardar(key, Compilado(errores=e.errors))
+        return None, e.errors, False
+    if cache is not None:
+        cache.guardar(key, Compilado(tac=programa.tac, tipos=programa.tipos,
+                                     programa=programa.codigo.programa))
+    return programa, [], False
+
+
+def procesar(ruta, ejecutar=True, optimize=False, registers=False, unroll=None,
+             cache_dir=None, limits=None):
+    """Registro del informe para un archivo; nunca lanza excepciones."""
+    registro = {"file": ruta, "status": "ok", "errors": [], "output": None,
+                "instructions": None, "cached": False,
+                "compile_seconds": 0.0, "run_seconds": 0.0}
+    cache = CacheCompilacion(cache_dir) if cache_dir else None
+    inicio = time.perf_counter()
+    try:
+        with open(ruta, "rb") as f:
+            fuente = f.read()
+        programa, errores, registro["cached"] = _compilar(
+            fuente.decode("utf-8"), fuente, cache, optimize, registers, unroll, limits or {})
+    except Exception as e:
+        registro["status"] = "error"
+        registro["errors"] = [f"{type(e).__name__}: {e}"]
+        return registro
+    finally:
+        registro["compile_seconds"] = time.perf_counter() - inicio
+    if errores:
+        registro["status"] = "semantic_errors"
+        registro["errors"] = errores
+        return registro
+    if not ejecutar:
+        return registro
+
+    inicio = time.perf_counter()
+    try:
+        resultado = programa.run()
+    except Exception as e:
+        registro["status"] = "error"
+        registro["errors"] = [f"{type(e).__name__}: {e}"]
+    else:
+        registro["output"] = resultado.output
+        registro["instructions"] = resultado.usage["instructions"]
+        if resultado.had_errors:
+            registro["status"] = "execution_errors"
+            registro["errors"] = resultado.output[-1:]
+    registro["run_seconds"] = time.perf_counter() - inicio
+    return registro
+
+
+def procesar_lote(archivos, jobs=None, **opciones):
+    """
+    Registros de procesar() para cada archivo, en orden y según van
+    saliendo. Con jobs == 1 todo corre en este proceso; si no, en un pool
+    de `jobs` procesos (None = uno por CPU) que recibe los archivos en
+    trozos para no pagar un viaje por archivo.
+    """
+    trabajo = functools.partial(procesar, **opciones)
+    if jobs == 1 or len(archivos) <= 1:
+        yield from map(trabajo, archivos)
+        return
+    jobs = jobs or os.cpu_count() or 1
+    trozo = max(1, min(64, len(archivos) // (jobs * 8)))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(trabajo, archivos, chunksize=trozo)
+
+
+def run_batch(rutas, jobs=None, report=None, **opciones):
+    """
+    Procesa los archivos de `rutas` (ver expandir) y escribe el informe en
+    `report`: un documento JSON si termina en .json, JSONL si no ('-' es
+    la salida estándar). Sin `report` imprime una línea por archivo.
+    Devuelve 0 si todos los archivos quedaron "ok".
+    """
+    archivos = expandir(rutas)
+    if not archivos:
+        print("Error: no Mini-Lang files matched.")
+        return 1
+
+    inicio = time.perf_counter()
+    estados = {}
+    registros = []
+    como_json = report is not None and report.endswith(".json")
+    destino = None
+    if report == "-":
+        destino = sys.stdout
+    elif report is not None:
+        destino = open(report, "w", encoding="utf-8")
+    try:
+        for registro in procesar_lote(archivos, jobs, **opciones):
+            estados[registro["status"]] = estados.get(registro["status"], 0) + 1
+            if como_json:
+                registros.append(registro)
+            elif destino is not None:
+                destino.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            else:
+                detalle = f"  {registro['errors'][0]}" if registro["errors"] else ""
+                print(f"{registro['status']:>16}  {registro['file']}"
+                      f"  ({registro['compile_seconds'] + registro['run_seconds']:.3f} s){detalle}")
+        total = time.perf_counter() - inicio
+        resumen = {"files": len(archivos), "seconds": total, "status": estados}
+        if como_json:
+            json.dump({"summary": resumen, "files": registros}, destino, ensure_ascii=False, indent=1)
+            destino.write("\n")
+    finally:
+        if destino is not None and destino is not sys.stdout:
+            destino.close()
+
+    if destino is not sys.stdout:
+        conteo = ", ".join(f"{estado}: {n}" for estado, n in sorted(estados.items()))
+        print(f"\n{len(archivos)} files in {total:.2f} s ({conteo})")
+    return 0 if estados.get("ok", 0) == len(archivos) else 1
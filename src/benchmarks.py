@@ -0,0 +1,819 @@
+# benchmarks.py
+# Mediciones de rendimiento del compilador Mini-Lang.
+#
+#   python benchmarks.py lexer [--lineas N]
+#   python benchmarks.py stream [--lineas N]
+#   python benchmarks.py paralelo [--lineas N] [--workers N]
+#   python benchmarks.py tokens [--lineas N]
+#   python benchmarks.py ast [--nodos N]
+#   python benchmarks.py vm [--n N]
+#   python benchmarks.py backends [--n N]
+#   python benchmarks.py ir [--lineas N]
+#   python benchmarks.py cse [--lineas N]
+#   python benchmarks.py mirilla [--lineas N]
+#   python benchmarks.py registros [--lineas N]
+#   python benchmarks.py tipados [--n N]
+#   python benchmarks.py superinstrucciones [--n N]
+#   python benchmarks.py bucles [--n N]
+#   python benchmarks.py cache [--lineas N]
+#   python benchmarks.py embed [--ejecuciones N] [--hilos N]
+#   python benchmarks.py batch [--archivos N] [--lineas N] [--workers N]
+
+import argparse
+import dataclasses
+import glob
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+
+from AnalizadorLexico import (obtener_tokens, obtener_tokens_paralelo, obtener_buffer,
+                              tokenizar, keywords, operators, delimiters)
+import SintacticoSemantico
+from SintacticoSemantico import Parser, Token, SemanticAnalyzer
+from CodeGen import CodeGenerator
+from tac_interpreter import TACInterpreter
+from closure_backend import ClosureInterpreter
+from python_backend import PythonBackend
+from ir import CFG
+from ssa import construir_ssa
+from optimizer import optimizar, eliminar_subexpresiones, quitar_temporales_muertos, Mirilla
+from registros import asignar_registros
+from tac_interpreter import decodificar, preparar, preparar_programa
+from cache import CacheCompilacion, Compilado, clave
+from embed import compile_source
+
+
+# -----------------------
+# Utilidades
+# -----------------------
+def generar_programa(lineas):
+    """Programa sintético de al menos `lineas` líneas, repitiendo un bloque típico."""
+    bloque = [
+        "var total = 0;",
+        "var i = 1;",
+        "while (i <= 10) {",
+        "    total = total + i * 2 - (i / 3);",
+        "    i = i + 1;",
+        "}",
+        'print("La suma es:");',
+        "print(total);",
+        "if (total >= 50) { print('grande'); } else { print('chico'); }",
+    ]
+    repeticiones = max(1, lineas // len(bloque))
+    return "\n".join(bloque * repeticiones)
+
+
+def medir(fn, *args, repeticiones=3):
+    """Mejor tiempo (s) de `repeticiones` ejecuciones y el último resultado."""
+    mejor = float("inf")
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = fn(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def memoria_retenida(fn, *args):
+    """Memoria (bytes) que sigue asignada al terminar fn(*args), y su resultado."""
+    tracemalloc.start()
+    try:
+        resultado = fn(*args)
+        actual, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return actual, resultado
+
+
+def pico_memoria(fn, *args):
+    """Pico de memoria (bytes) asignada durante fn(*args), y su resultado."""
+    tracemalloc.start()
+    try:
+        resultado = fn(*args)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico, resultado
+
+
+def compilar(codigo):
+    """TAC de un programa sin errores semánticos."""
+    ast = Parser(obtener_buffer(codigo)).parse()
+    errores = SemanticAnalyzer().analyze(ast)
+    assert not errores, errores
+    return CodeGenerator().generate(ast)
+
+
+def programa_bucle(n):
+    """tests/full_program.src con el bucle escalado a n iteraciones."""
+    return f"""
+var total = 0;
+var i = 1;
+while (i <= {n}) {{
+    total = total + i;
+    i = i + 1;
+}}
+print("La suma de 1 a {n} es:");
+print(total);
+if (total > 50) {{
+    print("Es mayor que 50");
+}} else {{
+    print("Es menor o igual a 50");
+}}
+"""
+
+
+DIRECTORIO_TESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests")
+
+# Bucle con las repeticiones típicas del código que generamos
+PROGRAMA_REDUNDANTE = """
+int a = 3;
+int b = 4;
+int i = 0;
+int s = 0;
+while (i < 1000) {
+    s = s + (a + b) * (a + b) - (b + a);
+    s = s + (i + 1) * (i + 1);
+    i = i + 1;
+}
+print(s);
+"""
+
+
+def archivo_temporal(codigo):
+    fd, ruta = tempfile.mkstemp(suffix=".src")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(codigo)
+    return ruta
+
+
+# -----------------------
+# Lexer
+# -----------------------
+def _obtener_tokens_legado(codigo_fuente):
+    # Implementación anterior (lista de patrones por token), solo como referencia
+    tokens_encontrados = []
+    for linea_num, linea in enumerate(codigo_fuente.split('\n'), 1):
+        pos = 0
+        linea = linea.rstrip()
+        while pos < len(linea):
+            if linea[pos].isspace():
+                pos += 1
+                continue
+            patterns = [
+                (r'\"[^\"]*\"', 'STRING'),
+                (r"\'[^\']*\'", 'STRING'),
+                (r'==|!=|<=|>=', 'OPERATOR'),
+                (r'[=+\-*/<>(){};:]', 'SYMBOL'),
+                (r'\d+\.\d+', 'NUM'),
+                (r'\d+', 'NUM'),
+                (r'[A-Za-z_][A-Za-z0-9_]*', 'ID')
+            ]
+            match = None
+            token_type = None
+            for pattern, t_type in patterns:
+                regex_match = re.match(pattern, linea[pos:])
+                if regex_match:
+                    match = regex_match.group(0)
+                    token_type = t_type
+                    break
+            if not match:
+                tokens_encontrados.append(('ERROR', linea[pos], linea_num, pos + 1))
+                pos += 1
+                continue
+            if match in keywords:
+                tipo = keywords[match]
+            elif match in operators:
+                tipo = operators[match]
+            elif match in delimiters:
+                tipo = delimiters[match]
+            else:
+                tipo = token_type
+            tokens_encontrados.append((tipo, match, linea_num, pos + 1))
+            pos += len(match)
+    return tokens_encontrados
+
+
+def bench_lexer(args):
+    codigo = generar_programa(args.lineas)
+    t_legado, tokens_legado = medir(_obtener_tokens_legado, codigo)
+    t_nuevo, tokens = medir(obtener_tokens, codigo)
+    assert tokens == tokens_legado, "los lexers no producen los mismos tokens"
+
+    mb = len(codigo.encode("utf-8")) / 1e6
+    print(f"Lexer ({len(tokens)} tokens, {mb:.2f} MB)")
+    print(f"  legado:        {t_legado:8.3f} s  {mb / t_legado:8.2f} MB/s")
+    print(f"  regex maestra: {t_nuevo:8.3f} s  {mb / t_nuevo:8.2f} MB/s")
+    print(f"  aceleración:   {t_legado / t_nuevo:8.1f}x")
+
+
+def _contar_lista(ruta):
+    with open(ruta, "r", encoding="utf-8") as f:
+        return len(obtener_tokens(f.read()))
+
+
+def _contar_stream(ruta, usar_mmap=False):
+    return sum(1 for _ in tokenizar(ruta, usar_mmap=usar_mmap))
+
+
+def bench_stream(args):
+    ruta = archivo_temporal(generar_programa(args.lineas))
+    try:
+        mb = os.path.getsize(ruta) / 1e6
+        print(f"Pico de memoria del lexer ({mb:.2f} MB de fuente)")
+        for nombre, fn, extra in [
+            ("read + lista", _contar_lista, ()),
+            ("streaming", _contar_stream, ()),
+            ("streaming mmap", _contar_stream, (True,)),
+        ]:
+            pico, n = pico_memoria(fn, ruta, *extra)
+            print(f"  {nombre:15} {pico / 1e6:8.2f} MB  ({n} tokens)")
+    finally:
+        os.remove(ruta)
+
+
+def bench_paralelo(args):
+    codigo = generar_programa(args.lineas)
+    t_seq, tokens = medir(obtener_tokens, codigo, repeticiones=1)
+    t_par, tokens_par = medir(obtener_tokens_paralelo, codigo, args.workers, repeticiones=1)
+    assert tokens == tokens_par, "el lexer paralelo no coincide con el secuencial"
+
+    mb = len(codigo.encode("utf-8")) / 1e6
+    print(f"Lexer paralelo ({len(tokens)} tokens, {mb:.2f} MB, workers={args.workers or os.cpu_count()})")
+    print(f"  secuencial: {t_seq:8.3f} s")
+    print(f"  paralelo:   {t_par:8.3f} s  ({t_seq / t_par:.2f}x)")
+
+
+def _tokens_objetos(codigo):
+    return [Token(*t) for t in obtener_tokens(codigo)]
+
+
+def _parse_objetos(codigo):
+    return Parser(_tokens_objetos(codigo)).parse()
+
+
+def _parse_buffer(codigo):
+    return Parser(obtener_buffer(codigo)).parse()
+
+
+def bench_tokens(args):
+    codigo = generar_programa(args.lineas)
+    m_obj, tokens = pico_memoria(_tokens_objetos, codigo)
+    m_buf, buf = pico_memoria(obtener_buffer, codigo)
+    t_obj, _ = medir(_tokens_objetos, codigo)
+    t_buf, _ = medir(obtener_buffer, codigo)
+    tp_obj, ast_obj = medir(_parse_objetos, codigo)
+    tp_buf, ast_buf = medir(_parse_buffer, codigo)
+    assert ast_obj == ast_buf, "los dos caminos producen AST distintos"
+
+    print(f"Tokens ({len(tokens)} tokens)")
+    print(f"  {'':22}{'memoria':>10}{'lexer':>10}{'lexer+parser':>14}")
+    print(f"  {'tuplas + Token':22}{m_obj / 1e6:8.2f}MB{t_obj:9.3f}s{tp_obj:13.3f}s")
+    print(f"  {'TokenBuffer':22}{m_buf / 1e6:8.2f}MB{t_buf:9.3f}s{tp_buf:13.3f}s")
+    print(f"  bytes/token: {m_obj / len(tokens):.1f} -> {m_buf / len(buf):.1f}")
+
+
+class _NodoLegado:
+    pass
+
+
+class _AnotadorLegado:
+    # Anotaciones como atributos del nodo, como hacía el analizador antes
+    def anotar_tipo(self, node, tipo):
+        node._tipo = tipo
+
+    def anotar_ambito(self, node, ambito):
+        node._ambito = ambito
+
+
+def _clases_legado():
+    clases = {}
+    for nombre in ("Program", "VarDecl", "Assign", "BinaryOp", "Literal", "VarRef",
+                   "IfStmt", "WhileStmt", "PrintStmt", "InputStmt"):
+        cls = getattr(SintacticoSemantico, nombre)
+        campos = [(f.name, f.type, dataclasses.field(default=f.default, default_factory=f.default_factory))
+                  for f in dataclasses.fields(cls)]
+        clases[nombre] = dataclasses.make_dataclass(nombre, campos, bases=(_NodoLegado,))
+    return clases
+
+
+def _ast_anotado(codigo):
+    ast = Parser(obtener_buffer(codigo)).parse()
+    sem = SemanticAnalyzer()
+    sem.analyze(ast)
+    return ast, sem.tabla
+
+
+def _ast_legado(codigo):
+    # Mismo parser y analizador, con nodos con __dict__
+    legado = _clases_legado()
+    originales = {nombre: getattr(SintacticoSemantico, nombre) for nombre in legado}
+    try:
+        for nombre, cls in legado.items():
+            setattr(SintacticoSemantico, nombre, cls)
+        ast = Parser(obtener_buffer(codigo)).parse()
+        sem = SemanticAnalyzer()
+        sem.tabla = _AnotadorLegado()
+        sem.analyze(ast)
+    finally:
+        for nombre, cls in originales.items():
+            setattr(SintacticoSemantico, nombre, cls)
+    return ast
+
+
+def bench_ast(args):
+    # 4 nodos por sentencia: Assign, BinaryOp, VarRef, Literal
+    sentencias = max(1, args.nodos // 4)
+    codigo = "var x = 0;\n" + "x = x + 1;\n" * sentencias
+    m_legado, ast = memoria_retenida(_ast_legado, codigo)
+    del ast
+    m_slots, (ast, tabla) = memoria_retenida(_ast_anotado, codigo)
+
+    nodos = len(tabla)
+    print(f"AST anotado ({nodos} nodos anotados)")
+    print(f"  nodos con __dict__ + _tipo/_ambito: {m_legado / 1e6:8.2f} MB  ({m_legado / nodos:.0f} B/nodo)")
+    print(f"  slots + TablaSemantica:             {m_slots / 1e6:8.2f} MB  ({m_slots / nodos:.0f} B/nodo)")
+
+
+# -----------------------
+# VM
+# -----------------------
+class _TACInterpreterLegado:
+    # Intérprete anterior (reanaliza cada línea en cada paso), solo como referencia
+    def __init__(self, max_iterations):
+        self.memory = {}
+        self.output = []
+        self.labels = {}
+        self.max_iterations = max_iterations
+
+    def execute(self, tac_code):
+        lines = [line.strip() for line in tac_code if line.strip()]
+        for i, line in enumerate(lines):
+            if line.endswith(':'):
+                self.labels[line[:-1]] = i
+        pc = 0
+        iteration_count = 0
+        while pc < len(lines) and iteration_count < self.max_iterations:
+            iteration_count += 1
+            line = lines[pc]
+            if not line or line.endswith(':'):
+                pc += 1
+                continue
+            if line.startswith("print"):
+                value = line[5:].strip()
+                if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
+                    self.output.append(value[1:-1])
+                else:
+                    self.output.append(str(self.memory.get(value, 0)))
+                pc += 1
+            elif line.startswith("if"):
+                parts = line.split()
+                if len(parts) >= 5 and parts[2] == "==":
+                    if self.memory.get(parts[1], 0) == int(parts[3]) and parts[5] in self.labels:
+                        pc = self.labels[parts[5]]
+                    else:
+                        pc += 1
+                else:
+                    pc += 1
+            elif line.startswith("goto"):
+                parts = line.split()
+                pc = self.labels[parts[1]] if len(parts) >= 2 and parts[1] in self.labels else pc + 1
+            elif ":=" in line:
+                left, right = line.split(":=")
+                left = left.strip()
+                right = right.strip()
+                for sep in (" < ", " > ", " <= ", " >= ", " == ", " != ", " + ", " - ", " * ", " / "):
+                    if sep in right:
+                        a, b = right.split(sep)
+                        val_a = self.get_value(a)
+                        val_b = self.get_value(b)
+                        if sep == " < ": r = 1 if val_a < val_b else 0
+                        elif sep == " > ": r = 1 if val_a > val_b else 0
+                        elif sep == " <= ": r = 1 if val_a <= val_b else 0
+                        elif sep == " >= ": r = 1 if val_a >= val_b else 0
+                        elif sep == " == ": r = 1 if val_a == val_b else 0
+                        elif sep == " != ": r = 1 if val_a != val_b else 0
+                        elif sep == " + ":
+                            if isinstance(val_a, (int, float)) and isinstance(val_b, (int, float)):
+                                r = val_a + val_b
+                            else:
+                                r = str(val_a) + str(val_b)
+                        elif sep == " - ": r = val_a - val_b
+                        elif sep == " * ": r = val_a * val_b
+                        else: r = val_a / val_b if val_b != 0 else 0
+                        self.memory[left] = r
+                        break
+                else:
+                    self.memory[left] = self.get_value(right)
+                pc += 1
+            else:
+                pc += 1
+        return self.output
+
+    def get_value(self, operand):
+        if not operand:
+            return 0
+        if (operand.startswith('"') and operand.endswith('"')) or (operand.startswith("'") and operand.endswith("'")):
+            return operand[1:-1]
+        try:
+            if '.' in operand:
+                return float(operand)
+            else:
+                return int(operand)
+        except:
+            pass
+        if operand in self.memory:
+            return self.memory[operand]
+        return 0
+
+
+def _ejecutar_legado(tac):
+    return _TACInterpreterLegado(10 ** 9).execute(tac)
+
+
+def _ejecutar_vm(tac):
+    # Sin bucles cerrados: estas mediciones son del despacho, no del atajo
+    return TACInterpreter(max_instructions=None, bucles_cerrados=False).execute(tac)
+
+
+def bench_vm(args):
+    tac = compilar(programa_bucle(args.n))
+    t_legado, salida_legado = medir(_ejecutar_legado, tac, repeticiones=1)
+    t_vm, salida = medir(_ejecutar_vm, tac)
+    assert salida == salida_legado, "las salidas no coinciden"
+
+    print(f"VM: full_program.src con {args.n} iteraciones ({len(tac)} líneas TAC)")
+    print(f"  texto (legado):     {t_legado:8.3f} s")
+    print(f"  decodificado:       {t_vm:8.3f} s  ({t_legado / t_vm:.1f}x)")
+
+
+def _ejecutar_closures(tac):
+    return ClosureInterpreter(max_instructions=None).execute(tac)
+
+
+def _ejecutar_python(ast, tipos):
+    backend = PythonBackend(tipos=tipos, max_instructions=None)
+    salida = backend.execute(ast)
+    assert backend.fallback is None, backend.fallback
+    return salida
+
+
+def bench_backends(args):
+    ast = Parser(obtener_buffer(programa_bucle(args.n))).parse()
+    sem = SemanticAnalyzer()
+    assert not sem.analyze(ast)
+    tac = CodeGenerator().generate(ast)
+    t_vm, salida_vm = medir(_ejecutar_vm, tac)
+    t_closures, salida = medir(_ejecutar_closures, tac)
+    assert salida == salida_vm, "las salidas no coinciden"
+    t_python, salida = medir(_ejecutar_python, ast, sem.tipos_variables)
+    assert salida == salida_vm, "las salidas no coinciden"
+
+    print(f"Backends: full_program.src con {args.n} iteraciones ({len(tac)} líneas TAC)")
+    print(f"  tabla de despacho:  {t_vm:8.3f} s")
+    print(f"  closures:           {t_closures:8.3f} s  ({t_vm / t_closures:.1f}x)")
+    print(f"  python (compile):   {t_python:8.3f} s  ({t_vm / t_python:.1f}x)")
+
+
+def bench_tipados(args):
+    ast = Parser(obtener_buffer(programa_bucle(args.n))).parse()
+    sem = SemanticAnalyzer()
+    assert not sem.analyze(ast)
+    generico = CodeGenerator().generate(ast)
+    tipado = CodeGenerator(sem.tabla).generate(ast)
+
+    print(f"Opcodes tipados: full_program.src con {args.n} iteraciones")
+    for nombre, ejecutar in (("tabla de despacho", _ejecutar_vm), ("closures", _ejecutar_closures)):
+        t_generico, salida = medir(ejecutar, generico)
+        t_tipado, salida_tipado = medir(ejecutar, tipado)
+        assert salida == salida_tipado, "las salidas no coinciden"
+        print(f"  {nombre + ':':19} {t_generico:8.3f} s -> {t_tipado:8.3f} s  ({t_generico / t_tipado:.2f}x)")
+
+
+def programa_while(n):
+    """tests/while_loop.src con el bucle escalado a n iteraciones."""
+    with open(os.path.join(DIRECTORIO_TESTS, "while_loop.src"), encoding="utf-8") as f:
+        return f.read().replace("counter <= 5", f"counter <= {n}")
+
+
+def _despachar(tac, superinstrucciones):
+    interprete = TACInterpreter(max_instructions=None, superinstrucciones=superinstrucciones,
+                                bucles_cerrados=False)
+    interprete.execute(tac)
+    return interprete
+
+
+def bench_superinstrucciones(args):
+    ast = Parser(obtener_buffer(programa_while(args.n))).parse()
+    sem = SemanticAnalyzer()
+    assert not sem.analyze(ast)
+    tac = CodeGenerator(sem.tabla).generate(ast)
+    t_simple, simple = medir(_despachar, tac, False, repeticiones=1)
+    t_fusion, fusion = medir(_despachar, tac, True, repeticiones=1)
+    assert simple.output == fusion.output, "las salidas no coinciden"
+    instrucciones = fusion.governor.instructions
+    despachos = instrucciones - fusion.fusionadas
+
+    print(f"Superinstrucciones: while_loop.src con {args.n} iteraciones")
+    print(f"  instrucciones TAC:  {instrucciones:>12}")
+    print(f"  despachos:          {simple.governor.instructions:>12} -> {despachos:>12}"
+          f"  ({1 - despachos / instrucciones:.0%} menos)")
+    print(f"  tiempo:             {t_simple:12.3f} s -> {t_fusion:12.3f} s  ({t_simple / t_fusion:.2f}x)")
+
+
+def programa_suma(n):
+    """tests/full_program.src con el bucle escalado a n iteraciones."""
+    with open(os.path.join(DIRECTORIO_TESTS, "full_program.src"), encoding="utf-8") as f:
+        return f.read().replace("i <= 10", f"i <= {n}")
+
+
+def _resolver(tac, bucles_cerrados):
+    interprete = TACInterpreter(max_instructions=None, bucles_cerrados=bucles_cerrados)
+    interprete.execute(tac)
+    return interprete
+
+
+def bench_bucles(args):
+    print("Bucles contados: full_program.src paso a paso vs en forma cerrada")
+    print(f"  {'n':>10} {'instrs':>12} {'cerradas':>12} {'paso a paso':>12} {'cerrado':>10}  (s)")
+    for n in (args.n // 100, args.n // 10, args.n):
+        ast = Parser(obtener_buffer(programa_suma(n))).parse()
+        sem = SemanticAnalyzer()
+        assert not sem.analyze(ast)
+        tac = CodeGenerator(sem.tabla).generate(ast)
+        t_pasos, pasos = medir(_resolver, tac, False, repeticiones=1)
+        t_cerrado, cerrado = medir(_resolver, tac, True, repeticiones=1)
+        assert pasos.output == cerrado.output, "las salidas no coinciden"
+        assert pasos.memory == cerrado.memory, "los marcos no coinciden"
+        assert pasos.governor.instructions == cerrado.governor.instructions
+        print(f"  {n:>10} {cerrado.governor.instructions:>12} {cerrado.cerradas:>12}"
+              f" {t_pasos:12.4f} {t_cerrado:10.4f}")
+
+
+def bench_ir(args):
+    print("IR: tiempo por instrucción TAC (constante si escala linealmente)")
+    print(f"  {'instrs':>8} {'CFG':>8} {'dom':>8} {'vivas':>8} {'ud':>8} {'ssa':>8} {'-O':>8} {'a_tac':>8}  (µs)")
+    filas = []
+    for lineas in (args.lineas // 4, args.lineas // 2, args.lineas):
+        # El programa sintético redeclara variables; solo interesa su TAC
+        tac = CodeGenerator().generate(Parser(obtener_buffer(generar_programa(lineas))).parse())
+        n = len(tac)
+        t_cfg, cfg = medir(CFG.desde_tac, tac, repeticiones=1)
+        t_dom, _ = medir(cfg.dominadores, repeticiones=1)
+        t_vivas, _ = medir(cfg.vivas, repeticiones=1)
+        t_ud, _ = medir(lambda: cfg.definiciones_alcanzables().cadenas(), repeticiones=1)
+        t_ssa, _ = medir(construir_ssa, cfg, repeticiones=1)
+        t_opt, _ = medir(optimizar, tac, repeticiones=1)
+        t_tac, _ = medir(cfg.a_tac, repeticiones=1)
+        por = [t / n * 1e6 for t in (t_cfg, t_dom, t_vivas, t_ud, t_ssa, t_opt, t_tac)]
+        print(f"  {n:>8} " + " ".join(f"{x:8.2f}" for x in por))
+        filas.append(por)
+    # Razón entre el tamaño mayor y el menor: cerca de 1 es lineal, 4 sería cuadrático
+    print(f"  {'razón':>8} " + " ".join(f"{b / a:8.2f}" for a, b in zip(filas[0], filas[-1])))
+
+
+def bench_cse(args):
+    """Subexpresiones que elimina la numeración local de valores en los programas de prueba."""
+    # (nombre, código, si hay que saltarlo cuando tiene errores semánticos)
+    programas = []
+    for ruta in sorted(glob.glob(os.path.join(DIRECTORIO_TESTS, "*.src"))):
+        with open(ruta, encoding="utf-8") as f:
+            programas.append((os.path.basename(ruta), f.read(), True))
+    # El programa sintético redeclara variables; su TAC sirve igual
+    programas.append((f"generar_programa({args.lineas})", generar_programa(args.lineas), False))
+    programas.append(("redundante", PROGRAMA_REDUNDANTE, True))
+
+    print("CSE: numeración local de valores sobre el TAC de CodeGenerator")
+    print(f"  {'programa':28} {'instrs':>8} {'comunes':>8} {'copias':>8} {'después':>8} {'ms':>8}")
+    total = 0
+    for nombre, codigo, validar in programas:
+        ast = Parser(obtener_buffer(codigo)).parse()
+        sem = SemanticAnalyzer()
+        if sem.analyze(ast) and validar:
+            continue
+        tac = CodeGenerator().generate(ast)
+        tiempo, (nuevo, informe) = medir(optimizar, tac,
+                                         [eliminar_subexpresiones, quitar_temporales_muertos],
+                                         sem.tipos_variables, repeticiones=1)
+        comunes = informe.cuentas.get("subexpresiones comunes", 0)
+        total += comunes
+        print(f"  {nombre:28} {informe.antes:>8} {comunes:>8} "
+              f"{informe.cuentas.get('copias propagadas', 0):>8} {informe.despues:>8} {tiempo * 1000:8.1f}")
+    print(f"  {total} cálculos redundantes eliminados")
+
+
+def _marco_vm(tac):
+    interprete = TACInterpreter(max_instructions=None)
+    interprete.execute(tac)
+    return interprete
+
+
+def bench_registros(args):
+    print("Registros: slots del marco de la VM con y sin asignación")
+    print(f"  {'instrs':>8} {'temps':>8} {'pico':>6} {'regs':>6} {'slots':>8} {'después':>8}"
+          f" {'ms':>8} {'KB VM':>8} {'KB regs':>8}")
+    for lineas in (args.lineas // 10, args.lineas):
+        # El programa sintético redeclara variables; solo interesa su TAC
+        tac = CodeGenerator().generate(Parser(obtener_buffer(generar_programa(lineas))).parse())
+        tiempo, (nuevo, informe) = medir(asignar_registros, tac, repeticiones=1)
+        memoria, vm = pico_memoria(_marco_vm, tac)
+        memoria_regs, vm_regs = pico_memoria(_marco_vm, nuevo)
+        assert vm.output == vm_regs.output, "las salidas no coinciden"
+        print(f"  {len(tac):>8} {informe.temporales:>8} {informe.pico:>6} {informe.registros:>6}"
+              f" {len(decodificar(tac).nombres):>8} {len(decodificar(nuevo).nombres):>8}"
+              f" {tiempo * 1000:8.1f} {memoria // 1024:>8} {memoria_regs // 1024:>8}")
+
+
+def _compilar_optimizado(codigo):
+    ast = Parser(obtener_buffer(codigo)).parse()
+    sem = SemanticAnalyzer()
+    sem.analyze(ast)      # el programa sintético redeclara variables
+    tac, _ = optimizar(CodeGenerator(sem.tabla).generate(ast), tipos=sem.tipos_variables)
+    return Compilado(tac=tac, tipos=sem.tipos_variables)
+
+
+def _cargar_preparado(cache, k):
+    # Lo que hace una ejecución en caliente antes de la primera instrucción
+    cargado = cache.cargar(k)
+    return cargado, preparar_programa(cargado.programa)
+
+
+def bench_cache(args):
+    print("Caché de compilación: compilar con -O vs cargar de disco y preparar para la VM")
+    print("  (desde TAC: lo que costaría preparar si la caché solo guardara el texto del TAC)")
+    print(f"  {'lineas':>8} {'TAC':>8} {'KB':>8} {'compilar':>10} {'clave':>8} {'cargar':>8}"
+          f" {'desde TAC':>10}  (ms)")
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = CacheCompilacion(directorio)
+        for lineas in (args.lineas // 10, args.lineas):
+            codigo = generar_programa(lineas)
+            fuente = codigo.encode("utf-8")
+            t_compilar, compilado = medir(_compilar_optimizado, codigo, repeticiones=1)
+            t_clave, k = medir(clave, fuente, {"optimize": True})
+            cache.guardar(k, compilado)
+            t_cargar, (cargado, codigo) = medir(_cargar_preparado, cache, k)
+            t_texto, esperado = medir(preparar, cargado.tac, cargado.tipos)
+            assert cargado.tac == compilado.tac and cargado.tipos == compilado.tipos
+            assert codigo.simple == esperado.simple
+            kb = os.path.getsize(cache.ruta(k)) // 1024
+            print(f"  {lineas:>8} {len(compilado.tac):>8} {kb:>8} {t_compilar * 1000:10.1f}"
+                  f" {t_clave * 1000:8.2f} {t_cargar * 1000:8.2f} {t_texto * 1000:10.2f}")
+
+
+def _compilar_y_ejecutar(codigo):
+    ast = Parser(obtener_buffer(codigo)).parse()
+    sem = SemanticAnalyzer()
+    sem.analyze(ast)
+    interprete = TACInterpreter(sem.tipos_variables)
+    return interprete.execute(CodeGenerator(sem.tabla).generate(ast))
+
+
+def bench_embed(args):
+    from concurrent.futures import ThreadPoolExecutor
+    with open(os.path.join(DIRECTORIO_TESTS, "full_program.src"), encoding="utf-8") as f:
+        codigo = f.read()
+    n = args.ejecuciones
+    print(f"Embebido: {n} ejecuciones de full_program.src")
+    t_cada_vez, _ = medir(lambda: [_compilar_y_ejecutar(codigo) for _ in range(n)], repeticiones=1)
+    programa = compile_source(codigo)
+    t_una_vez, salidas = medir(lambda: [programa.run().output for _ in range(n)], repeticiones=1)
+    with ThreadPoolExecutor(args.hilos) as pool:
+        t_hilos, en_hilos = medir(lambda: list(pool.map(lambda _: programa.run().output, range(n))),
+                                  repeticiones=1)
+    assert salidas == en_hilos == [_compilar_y_ejecutar(codigo)] * n, "las salidas no coinciden"
+    print(f"  compilar y ejecutar cada vez: {t_cada_vez / n * 1e6:10.1f} µs por ejecución")
+    print(f"  compile_source + run():       {t_una_vez / n * 1e6:10.1f} µs por ejecución")
+    print(f"  run() en {args.hilos} hilos:             {t_hilos / n * 1e6:10.1f} µs por ejecución")
+
+
+def bench_batch(args):
+    from batch import procesar_lote
+    print(f"Lote: {args.archivos} archivos de {args.lineas} líneas, compilar con -O y ejecutar")
+    with tempfile.TemporaryDirectory() as directorio:
+        archivos = []
+        for i in range(args.archivos):
+            archivos.append(os.path.join(directorio, f"p{i}.src"))
+            with open(archivos[-1], "w", encoding="utf-8") as f:
+                f.write(generar_programa(args.lineas))
+        t_uno, en_serie = medir(lambda: list(procesar_lote(archivos, 1, optimize=True)), repeticiones=1)
+        t_pool, en_pool = medir(lambda: list(procesar_lote(archivos, args.workers, optimize=True)),
+                                repeticiones=1)
+    quitar = ("compile_seconds", "run_seconds")
+    assert [{k: v for k, v in r.items() if k not in quitar} for r in en_serie] == \
+           [{k: v for k, v in r.items() if k not in quitar} for r in en_pool], "los informes no coinciden"
+    print(f"  un proceso:          {t_uno:8.2f} s")
+    print(f"  pool ({args.workers or os.cpu_count()} procesos):   {t_pool:8.2f} s   x{t_uno / t_pool:.1f}")
+
+
+def bench_mirilla(args):
+    """Instrucciones que quita la mirilla sola, regla por regla, en los programas de prueba."""
+    programas = []
+    for ruta in sorted(glob.glob(os.path.join(DIRECTORIO_TESTS, "*.src"))):
+        with open(ruta, encoding="utf-8") as f:
+            programas.append((os.path.basename(ruta), f.read(), True))
+    programas.append((f"generar_programa({args.lineas})", generar_programa(args.lineas), False))
+    programas.append(("redundante", PROGRAMA_REDUNDANTE, True))
+
+    print("Mirilla sobre el TAC tipado de CodeGenerator")
+    print(f"  {'programa':28} {'instrs':>8} {'después':>8} {'ms':>8}")
+    mirilla = Mirilla()
+    aciertos = {}
+    for nombre, codigo, validar in programas:
+        ast = Parser(obtener_buffer(codigo)).parse()
+        sem = SemanticAnalyzer()
+        if sem.analyze(ast) and validar:
+            continue
+        tac = CodeGenerator(sem.tabla).generate(ast)
+        tiempo, (nuevo, informe) = medir(optimizar, tac, [mirilla], sem.tipos_variables, repeticiones=1)
+        print(f"  {nombre:28} {informe.antes:>8} {informe.despues:>8} {tiempo * 1000:8.1f}")
+        for clave, n in informe.cuentas.items():
+            prefijo, _, regla = clave.partition("mirilla: ")
+            if regla and not prefijo:
+                aciertos[regla] = aciertos.get(regla, 0) + n
+    print("  aciertos: " + ", ".join(f"{regla} {n}" for regla, n in aciertos.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de Mini-Lang")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("lexer", help="throughput del analizador léxico")
+    p.add_argument("--lineas", type=int, default=50000)
+    p.set_defaults(func=bench_lexer)
+
+    p = sub.add_parser("stream", help="memoria del lexer en streaming")
+    p.add_argument("--lineas", type=int, default=200000)
+    p.set_defaults(func=bench_stream)
+
+    p = sub.add_parser("paralelo", help="lexer secuencial vs pool de procesos")
+    p.add_argument("--lineas", type=int, default=1000000)
+    p.add_argument("--workers", type=int, default=None)
+    p.set_defaults(func=bench_paralelo)
+
+    p = sub.add_parser("tokens", help="tuplas + Token vs TokenBuffer compacto")
+    p.add_argument("--lineas", type=int, default=50000)
+    p.set_defaults(func=bench_tokens)
+
+    p = sub.add_parser("ast", help="memoria del AST anotado")
+    p.add_argument("--nodos", type=int, default=1000000)
+    p.set_defaults(func=bench_ast)
+
+    p = sub.add_parser("vm", help="intérprete de TAC en un bucle escalado")
+    p.add_argument("--n", type=int, default=200000)
+    p.set_defaults(func=bench_vm)
+
+    p = sub.add_parser("backends", help="motores de ejecución sobre el mismo TAC")
+    p.add_argument("--n", type=int, default=200000)
+    p.set_defaults(func=bench_backends)
+
+    p = sub.add_parser("tipados", help="TAC genérico vs opcodes tipados")
+    p.add_argument("--n", type=int, default=200000)
+    p.set_defaults(func=bench_tipados)
+
+    p = sub.add_parser("superinstrucciones", help="despachos de la VM con y sin fusionar")
+    p.add_argument("--n", type=int, default=2000000)
+    p.set_defaults(func=bench_superinstrucciones)
+
+    p = sub.add_parser("bucles", help="bucles contados en forma cerrada")
+    p.add_argument("--n", type=int, default=1000000)
+    p.set_defaults(func=bench_bucles)
+
+    p = sub.add_parser("cache", help="caché de compilación en disco")
+    p.add_argument("--lineas", type=int, default=20000)
+    p.set_defaults(func=bench_cache)
+
+    p = sub.add_parser("embed", help="compilar una vez y ejecutar muchas")
+    p.add_argument("--ejecuciones", type=int, default=5000)
+    p.add_argument("--hilos", type=int, default=8)
+    p.set_defaults(func=bench_embed)
+
+    p = sub.add_parser("batch", help="muchos archivos en un proceso vs en un pool")
+    p.add_argument("--archivos", type=int, default=64)
+    p.add_argument("--lineas", type=int, default=2000)
+    p.add_argument("--workers", type=int, default=None)
+    p.set_defaults(func=bench_batch)
+
+    p = sub.add_parser("cse", help="subexpresiones comunes en los programas de prueba")
+    p.add_argument("--lineas", type=int, default=10000)
+    p.set_defaults(func=bench_cse)
+
+    p = sub.add_parser("registros", help="temporales reciclados en registros")
+    p.add_argument("--lineas", type=int, default=100000)
+    p.set_defaults(func=bench_registros)
+
+    p = sub.add_parser("mirilla", help="reglas de mirilla en los programas de prueba")
+    p.add_argument("--lineas", type=int, default=10000)
+    p.set_defaults(func=bench_mirilla)
+
+    p = sub.add_parser("ir", help="escalado del CFG, análisis y -O")
+    p.add_argument("--lineas", type=int, default=100000)
+    p.set_defaults(func=bench_ir)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# cache.py
+# Caché en disco de programas compilados, direccionada por contenido.
+#
+# Cada entrada es un archivo <clave>.mlc en el directorio de la caché. La
+# clave es el SHA-256 del código fuente, de la versión del compilador
+# (el contenido de sus módulos) y de las opciones que cambian el TAC
+# (-O, --unroll, --registers). Formato, todo little-endian:
+#
+#   cabecera   "MLC2", nº de errores, nº de líneas de TAC, nº de tipos y
+#              bytes del programa (uint32)
+#   offsets    n + 1 uint32, con n = errores + líneas + 2 * tipos
+#   cadenas    UTF-8 seguidas: errores, TAC, y pares nombre/tipo
+#   programa   marshal de ProgramaTAC.volcar(): el TAC ya decodificado
+#              (opcodes, slots, constantes, etiquetas); vacío sin TAC
+#
+# Cargar una entrada es mapear el archivo, cortar las cadenas por sus
+# offsets y reconstruir el ProgramaTAC con marshal; no se vuelve a
+# analizar ni el fuente ni el TAC, y la VM solo tiene que prepararlo.
+
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from tac_interpreter import ProgramaTAC, decodificar as decodificar_tac
+
+MAGICO = b"MLC2"
+EXTENSION = ".mlc"
+_CABECERA = struct.Struct("<4sIIII")
+
+# Módulos cuyo código decide el TAC; si cambia alguno, cambian las claves
+MODULOS_COMPILADOR = (
+    "AnalizadorLexico.py", "SintacticoSemantico.py", "CodeGen.py",
+    "optimizer.py", "ir.py", "ssa.py", "registros.py", "tac_interpreter.py",
+)
+
+_version = None
+
+
+def version_compilador():
+    """
+    Huella del código del compilador y de la versión de Python, que fija
+    el formato de marshal (se calcula una vez por proceso).
+    """
+    global _version
+    if _version is None:
+        h = hashlib.sha256(sys.version.encode() + b"\0")
+        directorio = os.path.dirname(os.path.abspath(__file__))
+        for nombre in MODULOS_COMPILADOR:
+            with open(os.path.join(directorio, nombre), "rb") as f:
+                h.update(nombre.encode() + b"\0" + f.read() + b"\0")
+        _version = h.hexdigest()
+    return _version
+
+
+def opciones_clave(optimize=False, registers=False, unroll=None):
+    """Opciones que entran en la clave; --unroll solo cuenta con -O."""
+    return {"optimize": bool(optimize), "registers": bool(registers),
+            "unroll": unroll if optimize else None}
+
+
+def clave(fuente, opciones):
+    """
+    Clave de caché de un programa: `fuente` son los bytes del código (o un
+    iterable de trozos) y `opciones` un dict con lo que cambia el TAC.
+    """
+    h = hashlib.sha256(version_compilador().encode())
+    h.update(repr(sorted(opciones.items())).encode() + b"\0")
+    for trozo in ([fuente] if isinstance(fuente, bytes) else fuente):
+        h.update(trozo)
+    return h.hexdigest()
+
+
+def clave_archivo(ruta, opciones, tam_trozo=1 << 20):
+    """clave() de un archivo, leído por trozos."""
+    with open(ruta, "rb") as f:
+        return clave(iter(lambda: f.read(tam_trozo), b""), opciones)
+
+
+class Compilado:
+    """
+    Resultado de compilar un programa: errores semánticos (si los hay, no
+    hay TAC), el TAC final, los tipos de SemanticAnalyzer y el TAC ya
+    decodificado (ProgramaTAC, o None sin TAC; codificar lo decodifica si
+    falta).
+    """
+    __slots__ = ('errores', 'tac', 'tipos', 'programa')
+
+    def __init__(self, errores=(), tac=(), tipos=None, programa=None):
+        self.errores = list(errores)
+        self.tac = list(tac)
+        self.tipos = dict(tipos or {})
+        self.programa = programa
+
+
+def codificar(compilado):
+    """Bytes de un Compilado en el formato de la caché."""
+    cadenas = list(compilado.errores) + list(compilado.tac)
+    for nombre, tipo in compilado.tipos.items():
+        cadenas += [nombre, tipo]
+    datos = [c.encode("utf-8") for c in cadenas]
+    offsets = [0]
+    for d in datos:
+        offsets.append(offsets[-1] + len(d))
+    programa = b""
+    if compilado.tac:
+        decodificado = compilado.programa or decodificar_tac(compilado.tac, compilado.tipos)
+        programa = marshal.dumps(decodificado.volcar())
+    return b"".join([
+        _CABECERA.pack(MAGICO, len(compilado.errores), len(compilado.tac), len(compilado.tipos),
+                       len(programa)),
+        struct.pack(f"<{len(offsets)}I", *offsets),
+    ] + datos + [programa])
+
+
+def decodificar(buffer):
+    """Compilado de un buffer en el formato de la caché, o None si no es válido."""
+    if len(buffer) < _CABECERA.size:
+        return None
+    magico, n_errores, n_tac, n_tipos, n_programa = _CABECERA.unpack_from(buffer, 0)
+    n = n_errores + n_tac + 2 * n_tipos
+    inicio = _CABECERA.size + 4 * (n + 1)
+    if magico != MAGICO or len(buffer) < inicio:
+        return None
+    offsets = struct.unpack_from(f"<{n + 1}I", buffer, _CABECERA.size)
+    fin = inicio + offsets[-1]
+    if fin + n_programa != len(buffer) or (n_programa == 0) != (n_tac == 0):
+        return None
+    vista = memoryview(buffer)
+    try:
+        cadenas = [str(vista[inicio + a:inicio + b], "utf-8") for a, b in zip(offsets, offsets[1:])]
+        programa = ProgramaTAC.desde_volcado(marshal.loads(vista[fin:])) if n_programa else None
+    finally:
+        vista.release()
+    tipos = cadenas[n_errores + n_tac:]
+    return Compilado(cadenas[:n_errores], cadenas[n_errores:n_errores + n_tac],
+                     zip(tipos[::2], tipos[1::2]), programa)
+
+
+class CacheCompilacion:
+    """
+    Directorio de entradas Compilado por clave. Una entrada ilegible o de
+    otro formato cuenta como fallo; las escrituras son atómicas (archivo
+    temporal + os.replace), así que varios procesos pueden compartirla.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        self.aciertos = 0
+        self.fallos = 0
+
+    def ruta(self, clave):
+        return os.path.join(self.directorio, clave + EXTENSION)
+
+    def cargar(self, clave):
+        """Compilado guardado con `clave`, o None."""
+        try:
+            with open(self.ruta(clave), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    compilado = None
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                        compilado = decodificar(mapa)
+        except (OSError, ValueError, TypeError, EOFError, UnicodeDecodeError, struct.error):
+            compilado = None
+        if compilado is None:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+        return compilado
+
+    def guardar(self, clave, compilado):
+        """
+        Guarda `compilado` con `clave`. Devuelve False si no se pudo
+        escribir: la caché es una ayuda y no debe parar la ejecución.
+        """
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix=".tmp")
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(codificar(compilado))
+            os.replace(temporal, self.ruta(clave))
+        except OSError:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return False
+        return True
@@ -0,0 +1,336 @@
+from tac_interpreter import (
+    TACInterpreter, BudgetExceeded, ProgramaTAC, decodificar, SEMANTICA, _suma,
+    OP_NOP, OP_PRINT_CONST, OP_PRINT, OP_IF_EQ, OP_GOTO, OP_COPY,
+    OP_LT, OP_GT, OP_LE, OP_GE, OP_EQ, OP_NE,
+    OP_ADD, OP_SUB, OP_DIV, OP_IADD, OP_FADD, GENERICO,
+)
+
+
+# ---------------------------------------------------------
+# Bloques básicos
+# ---------------------------------------------------------
+def bloques_basicos(instrucciones):
+    """
+    Índices de inicio de cada bloque básico: la primera instrucción, los
+    destinos de salto y la instrucción que sigue a un salto.
+    """
+    n = len(instrucciones)
+    lideres = {0} if n else set()
+    for pc, (op, d, a, b) in enumerate(instrucciones):
+        if op == OP_IF_EQ or op == OP_GOTO:
+            if d < n:
+                lideres.add(d)
+            if pc + 1 < n:
+                lideres.add(pc + 1)
+    return sorted(lideres)
+
+
+# ---------------------------------------------------------
+# Closures por instrucción (operandos fijados al compilar)
+# ---------------------------------------------------------
+def _cerrar_binaria(op, m, d, a, b, ka, kb):
+    """
+    Closure para m[d] = m[a] op m[b]. `ka`/`kb` son tuplas (valor,) cuando
+    el operando es un literal, o None si es una variable.
+    """
+    if ka is not None and kb is not None:
+        try:
+            valor = SEMANTICA[op](ka[0], kb[0])
+        except Exception:
+            # Se deja a la closure de ejecución: falla como la VM, y solo
+            # si la instrucción llega a ejecutarse
+            pass
+        else:
+            def constante():
+                m[d] = valor
+            return constante
+
+    if op == OP_IADD or op == OP_FADD:
+        # Suma tipada: los dos operandos son números, sin comprobar tipos
+        if kb is not None:
+            vb = kb[0]
+            def f():
+                m[d] = m[a] + vb
+        elif ka is not None:
+            va = ka[0]
+            def f():
+                m[d] = va + m[b]
+        else:
+            def f():
+                m[d] = m[a] + m[b]
+        return f
+    # El resto de opcodes tipados tiene la misma closure que su genérico
+    op = GENERICO.get(op, op)
+
+    if op == OP_ADD:
+        if kb is not None:
+            vb = kb[0]
+            if isinstance(vb, str):
+                def f():
+                    m[d] = str(m[a]) + vb
+            else:
+                def f():
+                    va = m[a]
+                    m[d] = va + vb if isinstance(va, (int, float)) else str(va) + str(vb)
+            return f
+        if ka is not None:
+            va = ka[0]
+            if isinstance(va, str):
+                def f():
+                    m[d] = va + str(m[b])
+            else:
+                def f():
+                    vb = m[b]
+                    m[d] = va + vb if isinstance(vb, (int, float)) else str(va) + str(vb)
+            return f
+        def f():
+            m[d] = _suma(m[a], m[b])
+        return f
+
+    if op == OP_DIV:
+        if kb is not None:
+            vb = kb[0]
+            if vb == 0:
+                def f():
+                    m[d] = 0
+            else:
+                def f():
+                    m[d] = m[a] / vb
+            return f
+        if ka is not None:
+            va = ka[0]
+            def f():
+                vb = m[b]
+                m[d] = va / vb if vb != 0 else 0
+            return f
+        def f():
+            vb = m[b]
+            m[d] = m[a] / vb if vb != 0 else 0
+        return f
+
+    if kb is not None:
+        vb = kb[0]
+        if op == OP_LT:
+            def f(): m[d] = 1 if m[a] < vb else 0
+        elif op == OP_GT:
+            def f(): m[d] = 1 if m[a] > vb else 0
+        elif op == OP_LE:
+            def f(): m[d] = 1 if m[a] <= vb else 0
+        elif op == OP_GE:
+            def f(): m[d] = 1 if m[a] >= vb else 0
+        elif op == OP_EQ:
+            def f(): m[d] = 1 if m[a] == vb else 0
+        elif op == OP_NE:
+            def f(): m[d] = 1 if m[a] != vb else 0
+        elif op == OP_SUB:
+            def f(): m[d] = m[a] - vb
+        else:
+            def f(): m[d] = m[a] * vb
+        return f
+
+    if ka is not None:
+        va = ka[0]
+        if op == OP_LT:
+            def f(): m[d] = 1 if va < m[b] else 0
+        elif op == OP_GT:
+            def f(): m[d] = 1 if va > m[b] else 0
+        elif op == OP_LE:
+            def f(): m[d] = 1 if va <= m[b] else 0
+        elif op == OP_GE:
+            def f(): m[d] = 1 if va >= m[b] else 0
+        elif op == OP_EQ:
+            def f(): m[d] = 1 if va == m[b] else 0
+        elif op == OP_NE:
+            def f(): m[d] = 1 if va != m[b] else 0
+        elif op == OP_SUB:
+            def f(): m[d] = va - m[b]
+        else:
+            def f(): m[d] = va * m[b]
+        return f
+
+    if op == OP_LT:
+        def f(): m[d] = 1 if m[a] < m[b] else 0
+    elif op == OP_GT:
+        def f(): m[d] = 1 if m[a] > m[b] else 0
+    elif op == OP_LE:
+        def f(): m[d] = 1 if m[a] <= m[b] else 0
+    elif op == OP_GE:
+        def f(): m[d] = 1 if m[a] >= m[b] else 0
+    elif op == OP_EQ:
+        def f(): m[d] = 1 if m[a] == m[b] else 0
+    elif op == OP_NE:
+        def f(): m[d] = 1 if m[a] != m[b] else 0
+    elif op == OP_SUB:
+        def f(): m[d] = m[a] - m[b]
+    else:
+        def f(): m[d] = m[a] * m[b]
+    return f
+
+
+def _cerrar_instruccion(instr, programa, m, out):
+    op, d, a, b = instr
+
+    def literal(slot):
+        return (programa.marco_inicial[slot],) if slot in programa.constantes else None
+
+    if op == OP_PRINT_CONST:
+        def f():
+            out(d)
+        return f
+    if op == OP_PRINT:
+        def f():
+            out(str(m[d]))
+        return f
+    if op == OP_COPY:
+        ka = literal(a)
+        if ka is not None:
+            valor = ka[0]
+            def f():
+                m[d] = valor
+        else:
+            def f():
+                m[d] = m[a]
+        return f
+    if op == OP_NOP:
+        def f():
+            pass
+        return f
+    return _cerrar_binaria(op, m, d, a, b, literal(a), literal(b))
+
+
+def _encadenar(cuerpo, salto, bloque_de, siguiente, m):
+    """
+    Una sola closure por bloque: ejecuta el cuerpo y devuelve el índice del
+    siguiente bloque (None al salir del programa). Los bloques cortos, los
+    habituales en el TAC de CodeGenerator, llaman a sus closures sin bucle,
+    y la salida por goto o por caída se devuelve como constante.
+    """
+    if salto is not None and salto[0] == OP_IF_EQ:
+        _, d, a, k = salto
+        destino = bloque_de.get(d)
+
+        def salida():
+            return destino if m[a] == k else siguiente
+        if len(cuerpo) == 0:
+            return salida
+        if len(cuerpo) == 1:
+            f0, = cuerpo
+            def bloque():
+                f0()
+                return destino if m[a] == k else siguiente
+            return bloque
+        def bloque():
+            for f in cuerpo:
+                f()
+            return destino if m[a] == k else siguiente
+        return bloque
+
+    proximo = bloque_de.get(salto[1]) if salto is not None else siguiente
+    k = len(cuerpo)
+    if k == 0:
+        def bloque():
+            return proximo
+    elif k == 1:
+        f0, = cuerpo
+        def bloque():
+            f0()
+            return proximo
+    elif k == 2:
+        f0, f1 = cuerpo
+        def bloque():
+            f0(); f1()
+            return proximo
+    elif k == 3:
+        f0, f1, f2 = cuerpo
+        def bloque():
+            f0(); f1(); f2()
+            return proximo
+    elif k == 4:
+        f0, f1, f2, f3 = cuerpo
+        def bloque():
+            f0(); f1(); f2(); f3()
+            return proximo
+    else:
+        def bloque():
+            for f in cuerpo:
+                f()
+            return proximo
+    return bloque
+
+
+# ---------------------------------------------------------
+# Backend
+# ---------------------------------------------------------
+class ClosureInterpreter(TACInterpreter):
+    """
+    Segundo motor de ejecución para el TAC de CodeGenerator: cada bloque
+    básico se compila a una lista de closures, una por instrucción, con los
+    slots y literales ya fijados, más una closure de salida que devuelve el
+    siguiente bloque. No hay decodificación ni despacho por opcode en
+    tiempo de ejecución. Mismo contrato que TACInterpreter.
+    """
+
+    def compilar(self, programa):
+        """
+        Bloques compilados sobre self.marco: una closure por bloque, las
+        closures de su cuerpo (para cortar un bloque a mitad) y su largo en
+        instrucciones TAC.
+        """
+        code = programa.instrucciones
+        n = len(code)
+        m = self.marco
+        out = self.output.append
+
+        lideres = bloques_basicos(code)
+        bloque_de = {pc: i for i, pc in enumerate(lideres)}
+        bloques, cuerpos, largos = [], [], []
+        for i, inicio in enumerate(lideres):
+            fin = lideres[i + 1] if i + 1 < len(lideres) else n
+            ultima = code[fin - 1]
+            salto = ultima if ultima[0] in (OP_IF_EQ, OP_GOTO) else None
+            cuerpo = tuple(_cerrar_instruccion(instr, programa, m, out)
+                           for instr in code[inicio:fin - (salto is not None)])
+            siguiente = i + 1 if fin < n else None
+            bloques.append(_encadenar(cuerpo, salto, bloque_de, siguiente, m))
+            cuerpos.append(cuerpo)
+            largos.append(fin - inicio)
+        return bloques, cuerpos, largos
+
+    def execute(self, tac_code):
+        """Como TACInterpreter.execute: líneas TAC o un ProgramaTAC ya decodificado."""
+        if not tac_code:
+            return ["Error: No hay código para ejecutar"]
+
+        programa = tac_code if isinstance(tac_code, ProgramaTAC) else decodificar(tac_code, self.tipos)
+        self._reiniciar(programa)
+        bloques, cuerpos, largos = self.compilar(programa)
+
+        governor = self.governor
+        governor.start()
+        actual = 0 if bloques else None
+
+        try:
+            while actual is not None:
+                # Bloques completos hasta agotar el tramo; el presupuesto de
+                # instrucciones se respeta exactamente cortando el último bloque
+                cupo = governor.quota()
+                limite = governor.restantes()
+                ejecutadas = 0
+                while ejecutadas < cupo:
+                    largo = largos[actual]
+                    if limite is not None and ejecutadas + largo > limite:
+                        for f in cuerpos[actual][:limite - ejecutadas]:
+                            f()
+                        ejecutadas = limite
+                        break
+                    ejecutadas += largo
+                    actual = bloques[actual]()
+                    if actual is None:
+                        break
+                governor.charge(ejecutadas, self.marco, self.output)
+        except BudgetExceeded as e:
+            self.output.append(str(e))
+            self.had_errors = True
+        governor.finish(self.marco, self.output)
+
+        return self.output
@@ -0,0 +1,116 @@
+# differential.py
+# Comparación diferencial de los motores de ejecución contra TACInterpreter.
+#
+#   python differential.py                  # todos los tests/*.src
+#   python differential.py prog.src ...     # programas concretos
+#   python differential.py --backend python --max-instructions 100000
+
+import argparse
+import glob
+import os
+import sys
+
+from AnalizadorLexico import obtener_buffer
+from SintacticoSemantico import Parser, SemanticAnalyzer
+from CodeGen import CodeGenerator
+from tac_interpreter import TACInterpreter, DEFAULT_MAX_INSTRUCTIONS
+from backends import BACKENDS
+
+DIRECTORIO_TESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests")
+
+
+def compilar(codigo):
+    """AST, tipos y TAC de un programa, o None si no pasa el análisis."""
+    ast = Parser(obtener_buffer(codigo)).parse()
+    sem = SemanticAnalyzer()
+    if sem.analyze(ast):
+        return None
+    return ast, sem.tipos_variables, CodeGenerator(sem.tabla).generate(ast)
+
+
+def ejecutar(clase, ast, tipos, tac, **limites):
+    """
+    Motor, salida y error: si el motor lanza una excepción, la salida es
+    lo que llegó a imprimir y el error es el texto de la excepción.
+    """
+    motor = clase(tipos=tipos, **limites)
+    entrada = ast if motor.entrada == "ast" else tac
+    try:
+        salida = list(motor.execute(entrada))
+    except Exception as e:
+        return motor, list(motor.output), f"{type(e).__name__}: {e}"
+    return motor, salida, None
+
+
+def comparar(compilado, backends, **limites):
+    """
+    Ejecuta un programa compilado (ver compilar) con TACInterpreter y con
+    cada backend de `backends`. Devuelve (estado, detalle) por backend;
+    estado es "ok", "presupuesto" (ambos agotaron un presupuesto),
+    "fallback" (el backend delegó en el TAC) o "DIFERENTE". Una excepción
+    de un backend cuenta como diferencia salvo que la referencia lance la
+    misma.
+    """
+    ast, tipos, tac = compilado
+    referencia, esperado, error_referencia = ejecutar(TACInterpreter, ast, tipos, tac, **limites)
+
+    resultados = {}
+    for nombre in backends:
+        motor, salida, error = ejecutar(BACKENDS[nombre], ast, tipos, tac, **limites)
+        if error != error_referencia:
+            resultados[nombre] = ("DIFERENTE", f"TAC {error_referencia or 'sin excepción'} / "
+                                               f"backend {error or 'sin excepción'}")
+        elif getattr(motor, "fallback", None):
+            resultados[nombre] = ("fallback", motor.fallback)
+        elif salida == esperado and motor.had_execution_errors() == referencia.had_execution_errors():
+            resultados[nombre] = ("ok", "")
+        elif referencia.had_execution_errors() and motor.had_execution_errors():
+            # Los motores cortan en puntos distintos al agotar un presupuesto
+            resultados[nombre] = ("presupuesto", salida[-1])
+        else:
+            resultados[nombre] = ("DIFERENTE", _primera_diferencia(esperado, salida))
+    return resultados
+
+
+def _primera_diferencia(esperado, obtenido):
+    for i, (a, b) in enumerate(zip(esperado, obtenido)):
+        if a != b:
+            return f"línea {i + 1}: TAC {a!r} / backend {b!r}"
+    return f"TAC {len(esperado)} líneas / backend {len(obtenido)} líneas"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backends de Mini-Lang contra TACInterpreter")
+    parser.add_argument("files", nargs="*", help="programas .src (por defecto tests/*.src)")
+    parser.add_argument("--backend", action="append", choices=sorted(set(BACKENDS) - {"tac"}),
+                        help="backend a comparar (por defecto todos)")
+    parser.add_argument("--max-instructions", type=int, default=DEFAULT_MAX_INSTRUCTIONS)
+    args = parser.parse_args()
+
+    archivos = args.files or sorted(glob.glob(os.path.join(DIRECTORIO_TESTS, "*.src")))
+    backends = args.backend or sorted(set(BACKENDS) - {"tac"})
+
+    fallos = 0
+    for ruta in archivos:
+        with open(ruta, encoding="utf-8") as f:
+            codigo = f.read()
+        nombre = os.path.basename(ruta)
+        try:
+            compilado = compilar(codigo)
+        except Exception as e:
+            print(f"{nombre:24} error de compilación: {e}")
+            continue
+        if compilado is None:
+            print(f"{nombre:24} omitido (errores semánticos)")
+            continue
+        resultados = comparar(compilado, backends, max_instructions=args.max_instructions)
+        for backend, (estado, detalle) in resultados.items():
+            fallos += estado == "DIFERENTE"
+            print(f"{nombre:24} {backend:10} {estado}" + (f"  {detalle}" if detalle else ""))
+
+    print(f"\n{len(archivos)} programas, {fallos} diferencias")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# embed.py
+# API para usar Mini-Lang desde otro programa: se compila una vez y se
+# ejecuta muchas, también desde varios hilos a la vez.
+#
+#   programa = compile_source('var n = 0; input(n); print(n * 2);')
+#   resultado = programa.run(inputs=[21])
+#   resultado.output            # ['42']
+
+from AnalizadorLexico import obtener_buffer
+from SintacticoSemantico import Parser, SemanticAnalyzer
+from CodeGen import CodeGenerator
+from optimizer import optimizar, pases_con_desenrollado
+from registros import asignar_registros
+from tac_interpreter import TACInterpreter, decodificar, preparar_programa
+
+
+class CompilationError(Exception):
+    """El programa tiene errores semánticos; están en `errors`."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} error(es) semántico(s): " + "; ".join(errors))
+        self.errors = list(errors)
+
+
+class RunResult:
+    """Resultado de una ejecución de CompiledProgram."""
+    __slots__ = ('output', 'had_errors', 'variables', 'usage')
+
+    def __init__(self, output, had_errors, variables, usage):
+        self.output = output            # líneas impresas (y el error de presupuesto, si lo hubo)
+        self.had_errors = had_errors    # se agotó algún presupuesto
+        self.variables = variables      # nombre -> valor al terminar, sin temporales
+        self.usage = usage              # ResourceGovernor.usage()
+
+    def __repr__(self):
+        return f"RunResult(output={self.output!r}, had_errors={self.had_errors})"
+
+
+def _es_temporal(nombre):
+    # Los temporales de CodeGenerator y de asignar_registros: tN
+    return nombre[:1] == 't' and nombre[1:].isdigit()
+
+
+def convertir_entrada(valor, tipo):
+    """
+    Valor de la VM para un input de una variable de tipo `tipo`: int y
+    float aceptan números o texto numérico, bool True/False, 0/1 o
+    "true"/"false" (la VM usa 1 y 0) y string texto, que se guarda entre
+    comillas como los literales. Con un tipo desconocido el valor pasa tal
+    cual. Lanza ValueError si el valor no es del tipo.
+    """
+    if tipo == 'int':
+        if isinstance(valor, int) and not isinstance(valor, bool):
+            return valor
+        if isinstance(valor, str):
+            try:
+                return int(valor.strip())
+            except ValueError:
+                pass
+    elif tipo == 'float':
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            return float(valor)
+        if isinstance(valor, str):
+            try:
+                return float(valor.strip())
+            except ValueError:
+                pass
+    elif tipo == 'bool':
+        if isinstance(valor, bool) or valor in (0, 1):
+            return int(valor)
+        if isinstance(valor, str) and valor.strip().lower() in ('true', 'false'):
+            return int(valor.strip().lower() == 'true')
+    elif tipo == 'string':
+        if isinstance(valor, str):
+            return f'"{valor}"'
+    else:
+        return valor
+    raise ValueError(f"input {valor!r} no es un valor de tipo {tipo}")
+
+
+class CompiledProgram:
+    """
+    Programa ya compilado y decodificado para la VM. Cada run() crea un
+    TACInterpreter con su propio marco, salida y presupuestos, y solo lee
+    el código compartido, así que se puede llamar desde varios hilos a la
+    vez sin bloqueos. `programa` es el TAC ya decodificado, si se tiene
+    (p. ej. de la caché); `limits` son los presupuestos por defecto de cada
+    ejecución (max_instructions, max_seconds, ...).
+    """
+
+    def __init__(self, tac, tipos=None, programa=None, **limits):
+        self.tac = list(tac)
+        self.tipos = dict(tipos or {})
+        leidas = [linea.split()[1:] for linea in self.tac if linea.split()[:1] == ["input"]]
+        self.reads_input = bool(leidas)
+        # Tipos de las variables que lee input, sin repetir
+        self.input_types = tuple(dict.fromkeys(self.tipos.get(nombre) for nombre, in leidas))
+        self.limits = limits
+        self.codigo = preparar_programa(programa or decodificar(self.tac, self.tipos))
+
+    def run(self, inputs=None, **limits):
+        """
+        Ejecuta el programa desde cero. `inputs` son los valores que toman
+        los `input x` en orden, convertidos con convertir_entrada al tipo
+        declarado de x; sin ellos (o agotados) input no cambia la variable,
+        como en la VM. Si todas las variables que lee input son del mismo
+        tipo, un valor que no lo sea lanza ValueError antes de ejecutar; si
+        no, al llegar al input. `limits` cambia los presupuestos de esta
+        ejecución.
+        """
+        convertir = convertir_entrada
+        if inputs is not None and len(self.input_types) == 1:
+            tipo, = self.input_types
+            inputs = [convertir_entrada(valor, tipo) for valor in inputs]
+            convertir = None
+        interprete = TACInterpreter(self.tipos, **{**self.limits, **limits})
+        salida = interprete.ejecutar(self.codigo, inputs, convertir)
+        variables = {nombre: valor for nombre, valor in interprete.memory.items()
+                     if not _es_temporal(nombre)}
+        return RunResult(salida, interprete.had_errors, variables,
+                         interprete.governor.usage())
+
+
+def compile_source(source, optimize=False, registers=False, unroll=None, **limits):
+    """
+    Compila código Mini-Lang a un CompiledProgram. `optimize` aplica -O,
+    `unroll` es su factor de desenrollado como --unroll y
+    `registers` recicla los temporales como --registers. Lanza CompilationError si hay errores semánticos; los errores
+    léxicos y sintácticos salen como en Parser.
+    """
+    ast = Parser(obtener_buffer(source)).parse()
+    analizador = SemanticAnalyzer()
+    errores = analizador.analyze(ast)
+    if errores:
+        raise CompilationError(errores)
+    tac = CodeGenerator(analizador.tabla).generate(ast)
+    if optimize:
+        pases = pases_con_desenrollado(unroll) if unroll is not None else None
+        tac, _ = optimizar(tac, pases, tipos=analizador.tipos_variables)
+    if registers:
+        tac, _ = asignar_registros(tac)
+    return CompiledProgram(tac, analizador.tipos_variables, **limits)
@@ -0,0 +1,508 @@
+import time
+
+from tac_interpreter import analizar_linea, valor_literal
+
+# Pseudo-definición de cada variable al entrar al programa (la VM la pone a 0)
+INICIAL = (-1, -1)
+
+
+def texto_instruccion(instr):
+    """Línea TAC de una instrucción analizada con analizar_linea."""
+    tipo = instr[0]
+    if tipo == 'copy':
+        return f"{instr[1]} := {instr[2]}"
+    if tipo == 'binop':
+        return f"{instr[1]} := {instr[2]} {instr[3]} {instr[4]}"
+    if tipo == 'print_const':
+        return f'print "{instr[1]}"'
+    if tipo == 'print':
+        return f"print {instr[1]}"
+    if tipo == 'if':
+        return f"if {instr[1]} == {instr[2]} goto {instr[3]}"
+    if tipo == 'goto':
+        return f"goto {instr[1]}"
+    if tipo == 'label':
+        return f"{instr[1]}:"
+    return instr[1]     # nop: la línea original
+
+
+def lecturas(instr):
+    """Variables que lee una instrucción (los literales no cuentan)."""
+    tipo = instr[0]
+    if tipo == 'print' or tipo == 'if':
+        return (instr[1],)
+    if tipo == 'copy':
+        return (instr[2],) if valor_literal(instr[2]) is None else ()
+    if tipo == 'binop':
+        return tuple(x for x in (instr[2], instr[4]) if valor_literal(x) is None)
+    return ()
+
+
+def escritura(instr):
+    """Variable que escribe una instrucción, o None."""
+    if instr[0] == 'copy' or instr[0] == 'binop':
+        return instr[1]
+    return None
+
+
+def definida_por_input(instr):
+    """
+    Variable que escribe un `input x`, o None. Con entradas la VM le da un
+    valor de fuera; sin ellas la deja igual. En los dos casos, para el
+    análisis es una definición de valor desconocido.
+    """
+    if instr[0] == 'nop':
+        partes = instr[1].split()
+        if len(partes) == 2 and partes[0] == 'input':
+            return partes[1]
+    return None
+
+
+def renombrar(instr, lee, escribe):
+    """`instr` con sus lecturas pasadas por `lee` y su destino por `escribe`."""
+    tipo = instr[0]
+    # Las lecturas se renombran antes que el destino: x := x + 1 lee la versión anterior
+    if tipo == 'copy':
+        _, destino, a = instr
+        a = lee(a) if a in lecturas(instr) else a
+        return ('copy', escribe(destino), a)
+    if tipo == 'binop':
+        _, destino, a, op, b = instr
+        leidas = lecturas(instr)
+        a = lee(a) if a in leidas else a
+        b = lee(b) if b in leidas else b
+        return ('binop', escribe(destino), a, op, b)
+    if tipo == 'print':
+        return ('print', lee(instr[1]))
+    if tipo == 'if':
+        return ('if', lee(instr[1]), instr[2], instr[3])
+    leida = definida_por_input(instr)
+    if leida is not None:
+        return ('nop', f"input {escribe(leida)}")
+    return instr
+
+
+def es_salto(instr):
+    return instr[0] == 'if' or instr[0] == 'goto'
+
+
+class Bloque:
+    """
+    Bloque básico: etiquetas de cabecera, instrucciones analizadas (un
+    if/goto solo puede ir al final) y aristas del CFG. Si el bloque no
+    termina en goto, cae al siguiente bloque del orden de `CFG.bloques`.
+    """
+    __slots__ = ('id', 'etiquetas', 'instrs', 'sucesores', 'predecesores')
+
+    def __init__(self, id, etiquetas=None, instrs=None):
+        self.id = id
+        self.etiquetas = etiquetas or []
+        self.instrs = instrs or []
+        self.sucesores = []
+        self.predecesores = []
+
+    def salto(self):
+        """La instrucción de salto final, o None."""
+        if self.instrs and es_salto(self.instrs[-1]):
+            return self.instrs[-1]
+        return None
+
+    def __repr__(self):
+        return f"Bloque({self.id}, {self.etiquetas}, {len(self.instrs)} instrs)"
+
+
+class CFG:
+    """
+    Grafo de flujo de control de un programa TAC. El orden de `bloques` es
+    el orden del código, que decide a dónde cae cada bloque; `a_tac()`
+    lo vuelve a escribir como lista de líneas. `tipos` son los tipos
+    semánticos de las variables (SemanticAnalyzer.tipos_variables).
+    """
+
+    def __init__(self, bloques, tipos=None):
+        self.bloques = bloques
+        self.tipos = tipos or {}
+        self.recalcular_aristas()
+
+    # --- Construcción ---
+    @classmethod
+    def desde_tac(cls, tac, tipos=None):
+        bloques = []
+        actual = None
+        for linea in tac:
+            linea = linea.strip()
+            if not linea:
+                continue
+            instr = analizar_linea(linea)
+            if instr[0] == 'label':
+                # Una racha de etiquetas abre un único bloque
+                if actual is None or actual.instrs:
+                    actual = Bloque(len(bloques))
+                    bloques.append(actual)
+                actual.etiquetas.append(instr[1])
+                continue
+            if actual is None:
+                actual = Bloque(len(bloques))
+                bloques.append(actual)
+            actual.instrs.append(instr)
+            if es_salto(instr):
+                actual = None
+        return cls(bloques, tipos)
+
+    def a_tac(self):
+        lineas = []
+        for bloque in self.bloques:
+            lineas.extend(f"{etiqueta}:" for etiqueta in bloque.etiquetas)
+            lineas.extend(texto_instruccion(instr) for instr in bloque.instrs)
+        return lineas
+
+    def etiquetas(self):
+        """Etiqueta -> bloque; como en la VM, la última definición gana."""
+        return {etiqueta: bloque for bloque in self.bloques for etiqueta in bloque.etiquetas}
+
+    def recalcular_aristas(self):
+        """Renumera los bloques y rehace sucesores y predecesores."""
+        for i, bloque in enumerate(self.bloques):
+            bloque.id = i
+            bloque.sucesores = []
+            bloque.predecesores = []
+        destinos = self.etiquetas()
+        for i, bloque in enumerate(self.bloques):
+            siguiente = self.bloques[i + 1] if i + 1 < len(self.bloques) else None
+            salto = bloque.salto()
+            # Un salto a una etiqueta inexistente es nop en la VM
+            destino = destinos.get(salto[-1]) if salto is not None else None
+            if destino is not None:
+                bloque.sucesores.append(destino)
+            if siguiente is not None and (destino is None or salto[0] == 'if'):
+                if siguiente is not destino:
+                    bloque.sucesores.append(siguiente)
+            for sucesor in bloque.sucesores:
+                sucesor.predecesores.append(bloque)
+
+    @property
+    def entrada(self):
+        return self.bloques[0] if self.bloques else None
+
+    def instrucciones(self):
+        return sum(len(bloque.instrs) for bloque in self.bloques)
+
+    # --- Recorridos ---
+    def alcanzables(self):
+        """Bloques a los que se llega desde la entrada."""
+        vistos = set()
+        pendientes = [self.entrada] if self.bloques else []
+        while pendientes:
+            bloque = pendientes.pop()
+            if bloque.id not in vistos:
+                vistos.add(bloque.id)
+                pendientes.extend(bloque.sucesores)
+        return [bloque for bloque in self.bloques if bloque.id in vistos]
+
+    def postorden(self):
+        """Postorden desde la entrada (sin recursión)."""
+        orden = []
+        if not self.bloques:
+            return orden
+        vistos = {self.entrada.id}
+        pila = [(self.entrada, iter(self.entrada.sucesores))]
+        while pila:
+            bloque, hijos = pila[-1]
+            for hijo in hijos:
+                if hijo.id not in vistos:
+                    vistos.add(hijo.id)
+                    pila.append((hijo, iter(hijo.sucesores)))
+                    break
+            else:
+                pila.pop()
+                orden.append(bloque)
+        return orden
+
+    def rpo(self):
+        """Orden postorden inverso: cada bloque antes que sus sucesores (salvo arcos de vuelta)."""
+        return self.postorden()[::-1]
+
+    # --- Análisis ---
+    def dominadores(self):
+        """
+        Dominador inmediato de cada bloque alcanzable (id -> id; la entrada
+        se domina a sí misma), con el algoritmo iterativo de Cooper, Harvey
+        y Kennedy sobre el RPO.
+        """
+        orden = self.rpo()
+        numero = {bloque.id: i for i, bloque in enumerate(orden)}
+        idom = {}
+        if not orden:
+            return idom
+        entrada = orden[0].id
+        idom[entrada] = entrada
+
+        def interseccion(a, b):
+            while a != b:
+                while numero[a] > numero[b]:
+                    a = idom[a]
+                while numero[b] > numero[a]:
+                    b = idom[b]
+            return a
+
+        cambio = True
+        while cambio:
+            cambio = False
+            for bloque in orden[1:]:
+                nuevo = None
+                for pred in bloque.predecesores:
+                    if pred.id in idom:
+                        nuevo = pred.id if nuevo is None else interseccion(pred.id, nuevo)
+                if idom.get(bloque.id) != nuevo:
+                    idom[bloque.id] = nuevo
+                    cambio = True
+        return idom
+
+    @staticmethod
+    def domina(idom, a, b):
+        """True si el bloque `a` domina al bloque `b` (ids)."""
+        while True:
+            if a == b:
+                return True
+            padre = idom.get(b)
+            if padre is None or padre == b:
+                return False
+            b = padre
+
+    def vivas(self):
+        """
+        Variables vivas a la entrada y a la salida de cada bloque (listas
+        de sets indexadas por id).
+        """
+        usos, defs = [], []
+        for bloque in self.bloques:
+            usadas, definidas = set(), set()
+            for instr in bloque.instrs:
+                for nombre in lecturas(instr):
+                    if nombre not in definidas:
+                        usadas.add(nombre)
+                destino = escritura(instr) or definida_por_input(instr)
+                if destino is not None:
+                    definidas.add(destino)
+            usos.append(usadas)
+            defs.append(definidas)
+
+        entrada = [set() for _ in self.bloques]
+        salida = [set() for _ in self.bloques]
+        orden = self.postorden()
+        # Los inalcanzables también reciben un resultado
+        vistos = {bloque.id for bloque in orden}
+        orden += [bloque for bloque in self.bloques if bloque.id not in vistos]
+        cambio = True
+        while cambio:
+            cambio = False
+            for bloque in orden:
+                i = bloque.id
+                fuera = set()
+                for sucesor in bloque.sucesores:
+                    fuera |= entrada[sucesor.id]
+                dentro = usos[i] | (fuera - defs[i])
+                if len(dentro) != len(entrada[i]) or len(fuera) != len(salida[i]):
+                    entrada[i], salida[i] = dentro, fuera
+                    cambio = True
+        return entrada, salida
+
+    def bucles(self, idom=None):
+        """
+        Bucles naturales: {id de cabecera: ids de los bloques del bucle}.
+        Cada arco de vuelta (a un bloque que domina al origen) aporta los
+        bloques que llegan a él sin pasar por la cabecera; los arcos a una
+        misma cabecera, como el `goto` del final de un while, forman un
+        solo bucle.
+        """
+        if idom is None:
+            idom = self.dominadores()
+        # Numeración del árbol de dominadores: a domina a b si el intervalo
+        # [entra, sale] de a contiene al de b; CFG.domina recorrería la
+        # cadena de idom, que en código lineal es tan larga como el programa
+        hijos = {}
+        for b, padre in idom.items():
+            if b != padre:
+                hijos.setdefault(padre, []).append(b)
+        entra, sale = {}, {}
+        contador = 0
+        pendientes = [(raiz, False) for raiz, padre in idom.items() if raiz == padre]
+        while pendientes:
+            b, saliendo = pendientes.pop()
+            contador += 1
+            if saliendo:
+                sale[b] = contador
+                continue
+            entra[b] = contador
+            pendientes.append((b, True))
+            pendientes.extend((hijo, False) for hijo in hijos.get(b, ()))
+
+        bucles = {}
+        for bloque in self.bloques:
+            if bloque.id not in idom:
+                continue
+            for sucesor in bloque.sucesores:
+                s = sucesor.id
+                if not (entra[s] <= entra[bloque.id] and sale[bloque.id] <= sale[s]):
+                    continue
+                cuerpo = bucles.setdefault(sucesor.id, {sucesor.id})
+                pendientes = [bloque]
+                while pendientes:
+                    actual = pendientes.pop()
+                    if actual.id in cuerpo:
+                        continue
+                    cuerpo.add(actual.id)
+                    pendientes.extend(p for p in actual.predecesores if p.id in idom)
+        return bucles
+
+    def definiciones_alcanzables(self):
+        """Cadenas uso-definición: ver DefinicionesAlcanzables."""
+        return DefinicionesAlcanzables(self)
+
+
+class DefinicionesAlcanzables:
+    """
+    Definiciones que alcanzan cada lectura de una variable. Una definición
+    es (id de bloque, índice de instrucción); INICIAL es el 0 con el que la
+    VM arranca cada variable.
+
+    Se resuelve por variable y solo en la región que sube desde sus lecturas
+    hasta sus definiciones, así que el coste es proporcional a esas regiones
+    y no a bloques × definiciones. El resultado es cadenas uso-definición.
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self._defs = {}         # variable -> {id de bloque: índice de su última definición}
+        self._usos = {}         # variable -> [(id, índice)] de lecturas sin definición previa en el bloque
+        self._entrada = {}      # variable -> {id de bloque: frozenset de definiciones}
+        self._previa = {}       # (id, índice, variable) -> definición previa en el mismo bloque
+        for bloque in cfg.bloques:
+            ultima = {}
+            for k, instr in enumerate(bloque.instrs):
+                for nombre in lecturas(instr):
+                    if nombre in ultima:
+                        self._previa[(bloque.id, k, nombre)] = (bloque.id, ultima[nombre])
+                    else:
+                        self._usos.setdefault(nombre, []).append((bloque.id, k))
+                destino = escritura(instr) or definida_por_input(instr)
+                if destino is not None:
+                    ultima[destino] = k
+            for nombre, k in ultima.items():
+                self._defs.setdefault(nombre, {})[bloque.id] = k
+
+    def alcanzan(self, bloque_id, indice, nombre):
+        """Definiciones de `nombre` que alcanzan la instrucción `indice` del bloque."""
+        previa = self._previa.get((bloque_id, indice, nombre))
+        if previa is not None:
+            return frozenset((previa,))
+        return self.en_entrada(bloque_id, nombre)
+
+    def en_entrada(self, bloque_id, nombre):
+        por_bloque = self._entrada.get(nombre)
+        if por_bloque is None:
+            por_bloque = self._entrada[nombre] = self._resolver(nombre)
+        resultado = por_bloque.get(bloque_id)
+        if resultado is None:
+            resultado = self._resolver_bloque(nombre, bloque_id, por_bloque)
+        return resultado
+
+    def cadenas(self):
+        """(id, índice, variable) -> definiciones, para todas las lecturas."""
+        cadenas = {}
+        for bloque in self.cfg.bloques:
+            for k, instr in enumerate(bloque.instrs):
+                for nombre in lecturas(instr):
+                    cadenas[(bloque.id, k, nombre)] = self.alcanzan(bloque.id, k, nombre)
+        return cadenas
+
+    def _resolver(self, nombre):
+        por_bloque = {}
+        for bloque_id, _ in self._usos.get(nombre, ()):
+            if bloque_id not in por_bloque:
+                self._resolver_bloque(nombre, bloque_id, por_bloque)
+        return por_bloque
+
+    def _resolver_bloque(self, nombre, bloque_id, por_bloque):
+        bloques = self.cfg.bloques
+        defs = self._defs.get(nombre, {})
+
+        # Región: bloques cuyo valor de entrada hace falta, subiendo por
+        # predecesores que no definen la variable
+        region = []
+        en_region = set()
+        pendientes = [bloque_id]
+        while pendientes:
+            i = pendientes.pop()
+            if i in en_region or i in por_bloque:
+                continue
+            en_region.add(i)
+            region.append(i)
+            for pred in bloques[i].predecesores:
+                if pred.id not in defs:
+                    pendientes.append(pred.id)
+
+        def valor(i):
+            conjunto = set()
+            if i == 0:
+                conjunto.add(INICIAL)
+            for pred in bloques[i].predecesores:
+                if pred.id in defs:
+                    conjunto.add((pred.id, defs[pred.id]))
+                else:
+                    conjunto |= por_bloque.get(pred.id, frozenset())
+            return frozenset(conjunto)
+
+        for i in region:
+            por_bloque[i] = frozenset()
+        cambio = True
+        while cambio:
+            cambio = False
+            for i in region:
+                nuevo = valor(i)
+                if nuevo != por_bloque[i]:
+                    por_bloque[i] = nuevo
+                    cambio = True
+        return por_bloque[bloque_id]
+
+
+# ---------------------------------------------------------
+# Gestor de pasadas
+# ---------------------------------------------------------
+class PassManager:
+    """
+    Encadena pasadas sobre un CFG y mide cuánto tarda cada una. Una pasada
+    es una función (cfg, informe) que modifica el CFG en su sitio, o que
+    devuelve un CFG nuevo. Con `hasta_fijo=True` la secuencia se repite
+    mientras alguna pasada cambie el TAC resultante.
+    """
+
+    def __init__(self, pases=None, hasta_fijo=False, max_rondas=10):
+        self.pases = []
+        self.hasta_fijo = hasta_fijo
+        self.max_rondas = max_rondas
+        self.tiempos = {}
+        for pase in pases or ():
+            self.agregar(pase)
+
+    def agregar(self, pase, nombre=None):
+        self.pases.append((nombre or pase.__name__, pase))
+        return self
+
+    def ejecutar(self, cfg, informe=None):
+        # El TAC de fin de una ronda es el de inicio de la siguiente
+        antes = cfg.a_tac() if self.hasta_fijo else None
+        for _ in range(self.max_rondas if self.hasta_fijo else 1):
+            for nombre, pase in self.pases:
+                inicio = time.perf_counter()
+                resultado = pase(cfg, informe)
+                if resultado is not None:
+                    cfg = resultado
+                self.tiempos[nombre] = self.tiempos.get(nombre, 0.0) + time.perf_counter() - inicio
+            if not self.hasta_fijo:
+                break
+            despues = cfg.a_tac()
+            if despues == antes:
+                break
+            antes = despues
+        return cfg
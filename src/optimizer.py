@@ -0,0 +1,1326 @@
+import re
+from collections import deque
+
+from tac_interpreter import valor_literal, OPCODES, SEMANTICA, TIPADOS
+from ir import (CFG, Bloque, PassManager, INICIAL, lecturas, escritura, definida_por_input,
+                renombrar)
+from ssa import Phi, construir_ssa
+
+# Temporales que genera CodeGenerator.new_temp
+TEMPORAL = re.compile(r't\d+$')
+
+# Secuencias que la VM usa para partir una asignación; un literal que las
+# contenga no se puede escribir en otra instrucción sin cambiar su lectura
+SEPARADORES = tuple(f" {op} " for op in OPCODES) + (":=",)
+
+NAC = object()      # valor no constante
+_SIN_VALOR = object()   # definición que el análisis aún no ha evaluado
+
+
+def texto_literal(valor):
+    """
+    Texto de un operando literal que la VM lee exactamente como `valor`,
+    o None si no existe (floats sin '.', inf/nan, cadenas con separadores).
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        try:
+            texto = str(valor)
+        except ValueError:      # más dígitos de los que str() convierte
+            return None
+    elif isinstance(valor, float):
+        texto = repr(valor)
+    elif isinstance(valor, str):
+        texto = f'"{valor}"'
+    else:
+        return None
+    leido = valor_literal(texto)
+    if type(leido) is not type(valor) or repr(leido) != repr(valor):
+        return None
+    if any(sep in texto for sep in SEPARADORES):
+        return None
+    return texto
+
+
+def _mismo_valor(a, b):
+    return a is b or (type(a) is type(b) and repr(a) == repr(b))
+
+
+class InformeOptimizacion:
+    """Cuentas de lo que hicieron las pasadas sobre el TAC."""
+
+    def __init__(self, antes):
+        self.antes = antes
+        self.despues = antes
+        self.cuentas = {}
+        self.tiempos = {}       # pasada -> segundos
+        self.notas = []         # una línea por cambio que merece detalle
+
+    def sumar(self, clave, n=1):
+        self.cuentas[clave] = self.cuentas.get(clave, 0) + n
+
+    @property
+    def eliminadas(self):
+        return self.antes - self.despues
+
+    def lineas(self):
+        detalle = ", ".join(f"{k}: {v}" for k, v in self.cuentas.items() if v)
+        resumen = f"{self.antes} -> {self.despues} instrucciones ({self.eliminadas} eliminadas)"
+        tiempos = ", ".join(f"{k} {v * 1000:.1f} ms" for k, v in self.tiempos.items())
+        return [resumen] + ([detalle] if detalle else []) + self.notas + ([tiempos] if tiempos else [])
+
+
+# ---------------------------------------------------------
+# Plegado y propagación de constantes
+# ---------------------------------------------------------
+def _evaluar(op, a, b):
+    if a is NAC or b is NAC:
+        return NAC
+    if a is _SIN_VALOR or b is _SIN_VALOR:
+        return _SIN_VALOR
+    try:
+        return SEMANTICA[OPCODES[op]](a, b)
+    except Exception:
+        # La VM fallaría en tiempo de ejecución: se deja la instrucción
+        return NAC
+
+
+def _conocido(valor):
+    return NAC if valor is _SIN_VALOR else valor
+
+
+def _quitar_temporales_constantes(cfg, informe):
+    """Quita las asignaciones constantes a temporales que ya no se leen."""
+    bloques = cfg.bloques
+    leidas = set()
+    for bloque in bloques:
+        for instr in bloque.instrs:
+            leidas.update(lecturas(instr))
+    for bloque in bloques:
+        nuevas = [instr for instr in bloque.instrs
+                  if not (instr[0] == 'copy' and TEMPORAL.match(instr[1])
+                          and instr[1] not in leidas and valor_literal(instr[2]) is not None)]
+        informe.sumar("temporales constantes", len(bloque.instrs) - len(nuevas))
+        bloque.instrs = nuevas
+
+
+def _reescribir(instr, valor, informe):
+    """
+    `instr` reescrita con las constantes conocidas, o None si sobra.
+    `valor(nombre)` es la constante que tiene la variable en ese punto, o NAC.
+    """
+    tipo = instr[0]
+
+    def operando(texto):
+        literal = valor_literal(texto)
+        return literal if literal is not None else valor(texto)
+
+    if tipo == 'binop':
+        _, destino, a, op, b = instr
+        va, vb = operando(a), operando(b)
+        resultado = _evaluar(op, va, vb)
+        texto = texto_literal(resultado) if resultado is not NAC else None
+        if texto is not None:
+            informe.sumar("expresiones plegadas")
+            return ('copy', destino, texto)
+        nueva = ('binop', destino, _sustituir(a, va, informe), op, _sustituir(b, vb, informe))
+        return instr if nueva == instr else nueva
+    if tipo == 'copy':
+        _, destino, a = instr
+        nueva = ('copy', destino, _sustituir(a, operando(a), informe))
+        return instr if nueva == instr else nueva
+    if tipo == 'print':
+        resultado = valor(instr[1])
+        if resultado is not NAC:
+            informe.sumar("constantes propagadas")
+            return ('print_const', str(resultado))
+    if tipo == 'if':
+        _, operando_if, k_texto, etiqueta = instr
+        resultado = valor(operando_if)
+        if resultado is not NAC and k_texto.lstrip('-').isdigit():
+            informe.sumar("saltos resueltos")
+            return ('goto', etiqueta) if resultado == int(k_texto) else None
+    return instr
+
+
+def _sustituir(texto, valor, informe):
+    if valor is NAC or valor_literal(texto) is not None:
+        return texto
+    literal = texto_literal(valor)
+    if literal is None:
+        return texto
+    informe.sumar("constantes propagadas")
+    return literal
+
+
+# ---------------------------------------------------------
+# Numeración local de valores
+# ---------------------------------------------------------
+# Operadores que se pueden reordenar: == y != siempre; + y * solo entre
+# números (con cadenas + concatena); las comparaciones de orden, entre
+# números y cambiando al operador espejo. Los operadores tipados ya
+# garantizan operandos numéricos.
+_CONMUTATIVOS = ('==', '!=', 'iadd', 'imul', 'fadd', 'fmul')
+_CONMUTATIVOS_NUMERICOS = ('+', '*')
+_ESPEJO = {'<': '>', '>': '<', '<=': '>=', '>=': '<='}
+_ESPEJO_TIPADO = {p + a: p + b for p in 'if' for a, b in
+                  (('lt', 'gt'), ('gt', 'lt'), ('le', 'ge'), ('ge', 'le'))}
+_COMPARACIONES = ('<', '>', '<=', '>=', '==', '!=') + tuple(_ESPEJO_TIPADO)
+TIPOS_NUMERICOS = ('int', 'float', 'bool')
+
+
+def _tipo_literal(valor):
+    if isinstance(valor, str):
+        return 'string'
+    return type(valor).__name__
+
+
+def _tipo_resultado(op, ta, tb):
+    """Tipo semántico del resultado de `a op b`, o None si no se sabe."""
+    if op in _COMPARACIONES:
+        return 'bool'       # 1 o 0
+    if op in TIPADOS:
+        # idiv es la / de la VM: con enteros también da float
+        generico, tipo = TIPADOS[op]
+        return 'float' if generico == '/' else tipo
+    if ta in TIPOS_NUMERICOS and tb in TIPOS_NUMERICOS:
+        return 'float' if 'float' in (ta, tb) or op == '/' else 'int'
+    if op == '+' and 'string' in (ta, tb):
+        return 'string'
+    return None
+
+
+def _clave(op, na, nb, numericos):
+    """Clave de `a op b` con números de valor na/nb, en forma canónica."""
+    if repr(na) > repr(nb):
+        if op in _CONMUTATIVOS or (numericos and op in _CONMUTATIVOS_NUMERICOS):
+            na, nb = nb, na
+        elif numericos and op in _ESPEJO:
+            op, na, nb = _ESPEJO[op], nb, na
+        elif op in _ESPEJO_TIPADO:
+            op, na, nb = _ESPEJO_TIPADO[op], nb, na
+    return (op, na, nb)
+
+
+def eliminar_subexpresiones(cfg, informe):
+    """
+    Eliminación de subexpresiones comunes dentro de cada bloque básico con
+    numeración local de valores. Cada variable lleva el número del valor
+    que guarda; una asignación o un `input` le dan uno nuevo, así que una
+    expresión solo se reutiliza mientras la variable que la guarda no se
+    haya vuelto a escribir. Una expresión repetida pasa a ser una copia y
+    la lectura de una copia lee el original. Los tipos deciden qué
+    operaciones se pueden reordenar, como en numerar_valores.
+    """
+    for bloque in cfg.bloques:
+        numero = {}         # variable -> número del valor que guarda
+        literales = {}      # literal -> número
+        tipos = {}          # variable -> tipo, para las escritas en el bloque
+        tabla = {}          # clave de expresión -> número
+        guardan = {}        # número -> variables que lo guardaron (algunas ya no)
+        siguiente = [0]
+
+        def nuevo():
+            siguiente[0] += 1
+            return siguiente[0]
+
+        def numero_de(texto):
+            literal = valor_literal(texto)
+            if literal is not None:
+                clave_literal = (type(literal).__name__, repr(literal))
+                if clave_literal not in literales:
+                    literales[clave_literal] = nuevo()
+                return literales[clave_literal]
+            if texto not in numero:
+                # Valor con el que la variable entra al bloque
+                numero[texto] = nuevo()
+                guardan.setdefault(numero[texto], deque()).append(texto)
+            return numero[texto]
+
+        def tipo(texto):
+            literal = valor_literal(texto)
+            if literal is not None:
+                return _tipo_literal(literal)
+            return tipos.get(texto, cfg.tipos.get(texto))
+
+        def quien_guarda(n):
+            # Las que ya guardan otro valor se descartan al pasar
+            candidatas = guardan.get(n)
+            while candidatas:
+                if numero.get(candidatas[0]) == n:
+                    return candidatas[0]
+                candidatas.popleft()
+            return None
+
+        def asignar(nombre, n, tipo_valor):
+            numero[nombre] = n
+            tipos[nombre] = tipo_valor
+            guardan.setdefault(n, deque()).append(nombre)
+
+        def leer(texto):
+            if valor_literal(texto) is not None:
+                return texto
+            original = quien_guarda(numero_de(texto))
+            if original is not None and original != texto:
+                informe.sumar("copias propagadas")
+                return original
+            return texto
+
+        nuevas = []
+        for instr in bloque.instrs:
+            tipo_instr = instr[0]
+            if tipo_instr == 'binop':
+                _, destino, a, op, b = instr
+                a, b = leer(a), leer(b)
+                tipo_valor = _tipo_resultado(op, tipo(a), tipo(b))
+                numericos = tipo(a) in TIPOS_NUMERICOS and tipo(b) in TIPOS_NUMERICOS
+                k = _clave(op, numero_de(a), numero_de(b), numericos)
+                n = tabla.get(k)
+                original = quien_guarda(n) if n is not None else None
+                if original is not None:
+                    informe.sumar("subexpresiones comunes")
+                    instr = ('copy', destino, original)
+                else:
+                    instr = ('binop', destino, a, op, b)
+                    n = tabla[k] = nuevo()
+                asignar(destino, n, tipo_valor)
+            elif tipo_instr == 'copy':
+                _, destino, a = instr
+                a = leer(a)
+                instr = ('copy', destino, a)
+                asignar(destino, numero_de(a), tipo(a))
+            elif tipo_instr == 'print':
+                instr = ('print', leer(instr[1]))
+            elif tipo_instr == 'if':
+                instr = ('if', leer(instr[1]), instr[2], instr[3])
+            else:
+                leida = definida_por_input(instr)
+                if leida is not None:
+                    asignar(leida, nuevo(), cfg.tipos.get(leida))
+            nuevas.append(instr)
+        bloque.instrs = nuevas
+
+
+# ---------------------------------------------------------
+# Pasadas sobre SSA
+# ---------------------------------------------------------
+def propagar_constantes_ssa(cfg, informe):
+    """
+    Propagación condicional dispersa de constantes (SCCP, Wegman-Zadeck)
+    sobre la forma SSA, con todas las variables a 0 al entrar como en la
+    VM. Solo cuenta las aristas que alguna ejecución puede tomar: lo que se
+    asigna en una rama que nunca se ejecuta no estropea la constante del
+    resto del programa. Sustituye operandos, convierte `print x` de valor
+    conocido en un print constante, resuelve los `if` con condición
+    conocida y quita las asignaciones constantes a temporales que ya nadie
+    lee.
+    """
+    if not cfg.bloques:
+        return
+    bloques = cfg.bloques
+    ssa = construir_ssa(cfg)
+    destinos = cfg.etiquetas()
+    usos = ssa.usos()
+    valores = {}            # versión -> constante o NAC; ausente = sin valor aún
+    aristas = set()         # (id de origen, id de destino) ejecutables; None es el inicio
+    ejecutables = set()
+    flujo = deque([(None, 0)])
+    pendientes = deque()    # versiones cuyo valor cambió
+
+    def operando(texto):
+        literal = valor_literal(texto)
+        if literal is not None:
+            return literal
+        if texto not in ssa.definicion:
+            return 0        # versión inicial: la VM arranca las variables a 0
+        return valores.get(texto, _SIN_VALOR)
+
+    def fijar(version, nuevo):
+        if nuevo is _SIN_VALOR:
+            return
+        anterior = valores.get(version, _SIN_VALOR)
+        if anterior is NAC or (anterior is not _SIN_VALOR and _mismo_valor(anterior, nuevo)):
+            return
+        valores[version] = nuevo if anterior is _SIN_VALOR else NAC
+        pendientes.append(version)
+
+    def evaluar_phi(b, phi):
+        resultado = _SIN_VALOR
+        for pred, version in phi.args.items():
+            if (pred, b) not in aristas:
+                continue
+            valor = operando(version)
+            if valor is _SIN_VALOR:
+                continue
+            if resultado is _SIN_VALOR:
+                resultado = valor
+            elif not _mismo_valor(resultado, valor):
+                resultado = NAC
+                break
+        fijar(phi.destino, resultado)
+
+    def salidas(b):
+        """Sucesores que el bloque puede tomar con los valores de ahora."""
+        instrs = ssa.instrs[b]
+        salto = instrs[-1] if instrs and instrs[-1][0] == 'if' else None
+        if salto is not None and salto[3] in destinos and salto[2].lstrip('-').isdigit():
+            valor = operando(salto[1])
+            if valor is _SIN_VALOR:
+                return ()
+            if valor is not NAC:
+                if valor == int(salto[2]):
+                    return (destinos[salto[3]].id,)
+                return (b + 1,) if b + 1 < len(bloques) else ()
+        return tuple(sucesor.id for sucesor in bloques[b].sucesores)
+
+    def visitar(b, k):
+        instr = ssa.instrs[b][k]
+        tipo = instr[0]
+        if tipo == 'copy':
+            fijar(instr[1], operando(instr[2]))
+        elif tipo == 'binop':
+            fijar(instr[1], _evaluar(instr[3], operando(instr[2]), operando(instr[4])))
+        elif tipo == 'if':
+            flujo.extend((b, s) for s in salidas(b))
+        elif (leida := definida_por_input(instr)) is not None:
+            fijar(leida, NAC)
+
+    while flujo or pendientes:
+        while flujo:
+            arista = flujo.popleft()
+            if arista in aristas:
+                continue
+            aristas.add(arista)
+            b = arista[1]
+            for phi in ssa.phis[b]:
+                evaluar_phi(b, phi)
+            if b in ejecutables:
+                continue
+            ejecutables.add(b)
+            instrs = ssa.instrs[b]
+            for k in range(len(instrs)):
+                visitar(b, k)
+            if not instrs or instrs[-1][0] != 'if':
+                flujo.extend((b, s) for s in salidas(b))
+        while pendientes:
+            version = pendientes.popleft()
+            for b, sitio in usos.get(version, ()):
+                if b not in ejecutables:
+                    continue
+                if isinstance(sitio, Phi):
+                    evaluar_phi(b, sitio)
+                else:
+                    visitar(b, sitio)
+
+    def valor(version):
+        return _conocido(operando(version))
+
+    saltos_cambiados = False
+    for b in ejecutables:
+        nuevas = []
+        for instr in ssa.instrs[b]:
+            nueva = _reescribir(instr, valor, informe)
+            if nueva is not instr and instr[0] == 'if':
+                saltos_cambiados = True
+            if nueva is not None:
+                nuevas.append(nueva)
+        ssa.instrs[b] = nuevas
+    ssa.a_cfg()
+
+    _quitar_temporales_constantes(cfg, informe)
+    if saltos_cambiados:
+        cfg.recalcular_aristas()
+
+
+def numerar_valores(cfg, informe):
+    """
+    Numeración global de valores (GVN) sobre la forma SSA, en preorden del
+    árbol de dominadores. Una expresión cuyo valor ya calculó una
+    instrucción que la domina pasa a ser una copia de ese resultado, y una
+    lectura de una copia pasa a leer el original, siempre que la versión
+    original siga vigente en ese punto. Los tipos semánticos (`cfg.tipos`,
+    y los de los temporales deducidos de sus operandos) deciden qué
+    operaciones se pueden reordenar al comparar expresiones.
+    """
+    if not cfg.bloques:
+        return
+    ssa = construir_ssa(cfg)
+    base = ssa.base
+    tipos = {}          # versión de temporal -> tipo deducido
+    numero = {}         # versión -> número de valor: una versión o ('k', literal)
+    tabla = {}          # (op, número, número) -> versión que lo calculó
+    vigentes = {}       # variable -> pila de versiones en el camino del árbol
+
+    def tipo(texto):
+        literal = valor_literal(texto)
+        if literal is not None:
+            return _tipo_literal(literal)
+        if texto in tipos:
+            return tipos[texto]
+        return cfg.tipos.get(base.get(texto, texto))
+
+    def numero_de(texto):
+        literal = valor_literal(texto)
+        if literal is not None:
+            return ('k', type(literal).__name__, repr(literal))
+        return numero.get(texto, texto)
+
+    def vigente(version):
+        pila = vigentes.get(base[version])
+        return (pila[-1] if pila else ssa.version_inicial(base[version])) == version
+
+    def clave(op, a, b):
+        numericos = tipo(a) in TIPOS_NUMERICOS and tipo(b) in TIPOS_NUMERICOS
+        return _clave(op, numero_de(a), numero_de(b), numericos)
+
+    def leer(texto):
+        """Lectura cambiada al representante de su valor, si está vigente."""
+        if texto not in base:
+            return texto    # literal
+        lider = numero_de(texto)
+        if isinstance(lider, str) and lider != texto and vigente(lider):
+            informe.sumar("copias propagadas")
+            return lider
+        return texto
+
+    def definir(version, deshacer):
+        pila = vigentes.setdefault(base[version], [])
+        pila.append(version)
+        deshacer.append(pila)
+
+    pendientes = [(0, None)] if ssa.idom else []
+    while pendientes:
+        b, deshacer = pendientes.pop()
+        if deshacer is not None:
+            # Salida del bloque: se retiran sus versiones y entradas de la tabla
+            for cosa in reversed(deshacer):
+                if isinstance(cosa, list):
+                    cosa.pop()
+                elif cosa[1] is None:
+                    del tabla[cosa[0]]
+                else:
+                    tabla[cosa[0]] = cosa[1]
+            continue
+        deshacer = []
+
+        for phi in ssa.phis[b]:
+            numeros = {numero_de(v) for v in phi.args.values() if v != phi.destino}
+            if len(numeros) == 1:
+                numero[phi.destino] = numeros.pop()
+            definir(phi.destino, deshacer)
+
+        nuevas = []
+        for instr in ssa.instrs[b]:
+            tipo_instr = instr[0]
+            if tipo_instr == 'copy':
+                _, destino, a = instr
+                a = leer(a)
+                instr = ('copy', destino, a)
+                numero[destino] = numero_de(a)
+                tipos[destino] = tipo(a)
+            elif tipo_instr == 'binop':
+                _, destino, a, op, b2 = instr
+                a, b2 = leer(a), leer(b2)
+                instr = ('binop', destino, a, op, b2)
+                tipos[destino] = _tipo_resultado(op, tipo(a), tipo(b2))
+                k = clave(op, a, b2)
+                previa = tabla.get(k)
+                if previa is not None and vigente(previa):
+                    informe.sumar("expresiones redundantes")
+                    instr = ('copy', destino, previa)
+                    numero[destino] = numero_de(previa)
+                else:
+                    deshacer.append((k, previa))
+                    tabla[k] = destino
+            elif tipo_instr == 'print':
+                instr = ('print', leer(instr[1]))
+            elif tipo_instr == 'if':
+                instr = ('if', leer(instr[1]), instr[2], instr[3])
+            destino = escritura(instr) or definida_por_input(instr)
+            if destino is not None:
+                definir(destino, deshacer)
+            nuevas.append(instr)
+        ssa.instrs[b] = nuevas
+
+        pendientes.append((b, deshacer))
+        for hijo in reversed(ssa.hijos.get(b, ())):
+            pendientes.append((hijo, None))
+    ssa.a_cfg()
+
+
+# ---------------------------------------------------------
+# Código invariante de los bucles
+# ---------------------------------------------------------
+# Operaciones que no fallan en la VM con ningún operando (+ concatena si no son números)
+_NUNCA_FALLAN = ('+', '==', '!=')
+
+
+def _temporales_locales(cfg):
+    """
+    Temporales con una sola asignación cuyas lecturas están todas después
+    de ella y en su mismo bloque, como los que genera CodeGenerator.
+    """
+    definiciones = {}
+    fuera = set()       # leídos antes de su asignación o en otro bloque
+    bloque_de = {}
+    for bloque in cfg.bloques:
+        definidas = set()
+        for instr in bloque.instrs:
+            for nombre in lecturas(instr):
+                if nombre not in definidas or bloque_de.get(nombre) is not bloque:
+                    fuera.add(nombre)
+            destino = escritura(instr) or definida_por_input(instr)
+            if destino is not None:
+                definiciones[destino] = definiciones.get(destino, 0) + 1
+                definidas.add(destino)
+                bloque_de[destino] = bloque
+    return {nombre for nombre, n in definiciones.items()
+            if n == 1 and TEMPORAL.match(nombre) and nombre not in fuera}
+
+
+def _tipos_temporales(cfg):
+    """Tipo de cada temporal deducido de sus operandos (None si no se sabe)."""
+    tipos = {}
+
+    def tipo(texto):
+        literal = valor_literal(texto)
+        if literal is not None:
+            return _tipo_literal(literal)
+        return tipos[texto] if texto in tipos else cfg.tipos.get(texto)
+
+    for bloque in cfg.bloques:
+        for instr in bloque.instrs:
+            destino = escritura(instr)
+            if destino is None or not TEMPORAL.match(destino):
+                continue
+            if instr[0] == 'binop':
+                nuevo = _tipo_resultado(instr[3], tipo(instr[2]), tipo(instr[4]))
+            else:
+                nuevo = tipo(instr[2])
+            tipos[destino] = nuevo if tipos.get(destino, nuevo) == nuevo else None
+    return tipos
+
+
+def sacar_invariantes(cfg, informe):
+    """
+    Saca de cada bucle natural (los while de CodeGenerator) los cálculos
+    que no dependen de nada que el bucle modifique, a un prebloque que se
+    ejecuta una vez antes de la cabecera. Los bucles internos van primero,
+    y lo que queda en su prebloque se puede seguir sacando del externo.
+
+    El prebloque se ejecuta aunque el bucle dé cero vueltas, así que solo
+    se sacan asignaciones a temporales locales (nadie fuera del bucle ve el
+    valor) y operaciones que no pueden fallar: copias, + == != con
+    cualquier operando, y el resto solo con operandos numéricos según los
+    tipos semánticos.
+    """
+    idom = cfg.dominadores()
+    bucles = cfg.bucles(idom)
+    if not bucles:
+        return
+    bloques = cfg.bloques
+    locales = _temporales_locales(cfg)
+    tipos = _tipos_temporales(cfg)
+
+    def numerico(texto):
+        literal = valor_literal(texto)
+        if literal is not None:
+            return _tipo_literal(literal) in TIPOS_NUMERICOS
+        return (tipos[texto] if texto in tipos else cfg.tipos.get(texto)) in TIPOS_NUMERICOS
+
+    def seguro(instr):
+        if instr[0] == 'copy':
+            return True
+        _, _, a, op, b = instr
+        return op in _NUNCA_FALLAN or op in TIPADOS or (numerico(a) and numerico(b))
+
+    prebloques = {}         # cabecera -> prebloque
+    cuerpos = {cabecera: {bloques[i] for i in ids} for cabecera, ids in bucles.items()}
+    contenido_en = {}       # id de bloque -> cabeceras de los bucles que lo contienen
+    for cabecera, ids in bucles.items():
+        for i in ids:
+            contenido_en.setdefault(i, []).append(cabecera)
+    for cabecera, cuerpo in sorted(cuerpos.items(), key=lambda par: len(par[1])):
+        entrada = bloques[cabecera]
+        anterior = bloques[cabecera - 1] if cabecera > 0 else None
+        # El prebloque va justo antes de la cabecera: solo se puede si al
+        # bucle se entra únicamente cayendo desde el bloque anterior
+        entradas = [p for p in entrada.predecesores if p not in cuerpo]
+        if any(p is not anterior for p in entradas) or (anterior is not None and not entradas):
+            continue
+        if anterior is not None and anterior in cuerpo:
+            continue
+
+        # Orden del código; los ids siguen siendo posiciones hasta el final
+        orden = []
+        for i in sorted(bucles[cabecera]):
+            bloque = bloques[i]
+            if bloque.id in prebloques and prebloques[bloque.id] in cuerpo:
+                orden.append(prebloques[bloque.id])
+            orden.append(bloque)
+        modificadas = set()
+        for bloque in orden:
+            for instr in bloque.instrs:
+                destino = escritura(instr) or definida_por_input(instr)
+                if destino is not None:
+                    modificadas.add(destino)
+
+        sacadas = []
+        for bloque in orden:
+            quedan = []
+            for instr in bloque.instrs:
+                if (instr[0] in ('copy', 'binop') and instr[1] in locales
+                        and not any(nombre in modificadas for nombre in lecturas(instr))
+                        and seguro(instr)):
+                    sacadas.append(instr)
+                    modificadas.discard(instr[1])
+                else:
+                    quedan.append(instr)
+            bloque.instrs = quedan
+        if not sacadas:
+            continue
+        informe.sumar("invariantes sacadas", len(sacadas))
+        prebloque = Bloque(-1, instrs=sacadas)
+        prebloques[cabecera] = prebloque
+        for otra in contenido_en[cabecera]:
+            if otra != cabecera:
+                cuerpos[otra].add(prebloque)
+
+    if prebloques:
+        nuevos = []
+        for bloque in bloques:
+            if bloque.id in prebloques:
+                nuevos.append(prebloques[bloque.id])
+            nuevos.append(bloque)
+        cfg.bloques = nuevos
+        cfg.recalcular_aristas()
+
+
+# ---------------------------------------------------------
+# Optimización de mirilla
+# ---------------------------------------------------------
+def _enteros(cfg):
+    """
+    Nombres que en la VM siempre valen un int de Python. El tipo semántico
+    no basta: una variable int guarda un float si se le asigna una
+    división, y ahí x + 0 cambia -0.0 por 0.0 y x * 0 da 0.0.
+    """
+    definiciones = [(escritura(instr), instr) for bloque in cfg.bloques
+                    for instr in bloque.instrs if escritura(instr) is not None]
+    no_enteros = set()
+
+    def entero(texto):
+        literal = valor_literal(texto)
+        if literal is not None:
+            return type(literal) is int
+        return texto not in no_enteros
+
+    cambio = True
+    while cambio:
+        cambio = False
+        for destino, instr in definiciones:
+            if destino in no_enteros:
+                continue
+            if instr[0] == 'copy':
+                ok = entero(instr[2])
+            else:
+                op = TIPADOS.get(instr[3], (instr[3],))[0]
+                ok = op in _COMPARACIONES or (op != '/' and entero(instr[2]) and entero(instr[4]))
+            if not ok:
+                no_enteros.add(destino)
+                cambio = True
+    return entero
+
+
+class ContextoMirilla:
+    """Lo que las guardas de las reglas pueden preguntar sobre el programa."""
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.tipos = _tipos_temporales(cfg)
+        self.entero = _enteros(cfg)
+        self.locales = _temporales_locales(cfg)
+        self.lecturas = {}
+        for bloque in cfg.bloques:
+            for instr in bloque.instrs:
+                self.contar(instr, 1)
+
+    def contar(self, instr, n):
+        for nombre in lecturas(instr):
+            self.lecturas[nombre] = self.lecturas.get(nombre, 0) + n
+
+    def tipo(self, texto):
+        literal = valor_literal(texto)
+        if literal is not None:
+            return _tipo_literal(literal)
+        return self.tipos[texto] if texto in self.tipos else self.cfg.tipos.get(texto)
+
+    def numerico(self, texto):
+        return self.tipo(texto) in TIPOS_NUMERICOS
+
+
+class Regla:
+    """
+    Regla de mirilla sobre `ventana` instrucciones seguidas de un bloque.
+    `aplicar(instrs, contexto)` devuelve las instrucciones que las
+    sustituyen, o None si no encaja; las que cambian valores según el tipo
+    lo comprueban con el contexto antes de reescribir.
+    """
+    __slots__ = ('nombre', 'ventana', 'aplicar')
+
+    def __init__(self, nombre, ventana, aplicar):
+        self.nombre = nombre
+        self.ventana = ventana
+        self.aplicar = aplicar
+
+
+def _literal_es(texto, valor):
+    literal = valor_literal(texto)
+    return type(literal) is int and literal == valor
+
+
+def _binop(instr, *ops):
+    """(destino, a, b) si `instr` es a op b con op genérico o tipado en `ops`."""
+    if instr[0] != 'binop' or TIPADOS.get(instr[3], (instr[3],))[0] not in ops:
+        return None
+    return instr[1], instr[2], instr[4]
+
+
+def _suma_cero(instrs, contexto):
+    # x + 0 -> x, solo con ints: -0.0 + 0 es 0.0 y "s" + 0 es "s0"
+    partes = _binop(instrs[0], '+')
+    if partes:
+        destino, a, b = partes
+        for x, cero in ((a, b), (b, a)):
+            if _literal_es(cero, 0) and contexto.entero(x):
+                return [('copy', destino, x)]
+    return None
+
+
+def _resta_cero(instrs, contexto):
+    partes = _binop(instrs[0], '-')
+    if partes and _literal_es(partes[2], 0) and contexto.numerico(partes[1]):
+        return [('copy', partes[0], partes[1])]
+    return None
+
+
+def _producto_uno(instrs, contexto):
+    # x * 1 -> x con cualquier número (con cadenas * repite)
+    partes = _binop(instrs[0], '*')
+    if partes:
+        destino, a, b = partes
+        for x, uno in ((a, b), (b, a)):
+            if _literal_es(uno, 1) and contexto.numerico(x):
+                return [('copy', destino, x)]
+    return None
+
+
+def _producto_cero(instrs, contexto):
+    # x * 0 -> 0 solo con ints: con floats da 0.0, -0.0 o nan
+    partes = _binop(instrs[0], '*')
+    if partes:
+        destino, a, b = partes
+        for x, cero in ((a, b), (b, a)):
+            if _literal_es(cero, 0) and contexto.entero(x):
+                return [('copy', destino, '0')]
+    return None
+
+
+def _resta_propia(instrs, contexto):
+    partes = _binop(instrs[0], '-')
+    if partes and partes[1] == partes[2] and contexto.entero(partes[1]):
+        return [('copy', partes[0], '0')]
+    return None
+
+
+def _doble(instrs, contexto):
+    # x * 2 -> x + x: exacto también en float
+    instr = instrs[0]
+    partes = _binop(instr, '*')
+    if partes:
+        destino, a, b = partes
+        suma = {'*': '+', 'imul': 'iadd', 'fmul': 'fadd'}[instr[3]]
+        for x, dos in ((a, b), (b, a)):
+            if _literal_es(dos, 2) and (instr[3] in TIPADOS or contexto.numerico(x)):
+                return [('binop', destino, x, suma, x)]
+    return None
+
+
+def _autoasignacion(instrs, contexto):
+    instr = instrs[0]
+    if instr[0] == 'copy' and instr[1] == instr[2]:
+        return []
+    return None
+
+
+def _copia_de_vuelta(instrs, contexto):
+    # a := b; b := a  y  a := b; a := b: la segunda no cambia nada
+    primera, segunda = instrs
+    if primera[0] == 'copy' and segunda[0] == 'copy' and primera[1] != primera[2]:
+        if (segunda[1], segunda[2]) in ((primera[2], primera[1]), (primera[1], primera[2])):
+            return [primera]
+    return None
+
+
+def _operacion_a_variable(instrs, contexto):
+    # t := a op b; x := t -> x := a op b si nadie más lee el temporal
+    primera, segunda = instrs
+    if (primera[0] == 'binop' and segunda[0] == 'copy' and segunda[2] == primera[1]
+            and primera[1] in contexto.locales and contexto.lecturas.get(primera[1]) == 1):
+        return [('binop', segunda[1]) + primera[2:]]
+    return None
+
+
+REGLAS_MIRILLA = [
+    Regla("x + 0", 1, _suma_cero),
+    Regla("x - 0", 1, _resta_cero),
+    Regla("x * 1", 1, _producto_uno),
+    Regla("x * 0", 1, _producto_cero),
+    Regla("x - x", 1, _resta_propia),
+    Regla("x * 2 -> x + x", 1, _doble),
+    Regla("x := x", 1, _autoasignacion),
+    Regla("copia de vuelta", 2, _copia_de_vuelta),
+    Regla("operación a variable", 2, _operacion_a_variable),
+]
+
+
+class Mirilla:
+    """
+    Optimización de mirilla: una ventana que recorre cada bloque y
+    reescribe las instrucciones que encajan con alguna regla. Tras una
+    reescritura la ventana retrocede una instrucción por si el resultado
+    encaja con otra regla. El informe cuenta cuántas veces se aplicó cada
+    regla como "mirilla: <regla>".
+    """
+
+    def __init__(self, reglas=None):
+        self.reglas = list(REGLAS_MIRILLA if reglas is None else reglas)
+        self.__name__ = "mirilla"
+
+    def __call__(self, cfg, informe):
+        contexto = ContextoMirilla(cfg)
+        for bloque in cfg.bloques:
+            instrs = bloque.instrs
+            i = 0
+            while i < len(instrs):
+                for regla in self.reglas:
+                    ventana = instrs[i:i + regla.ventana]
+                    if len(ventana) < regla.ventana:
+                        continue
+                    nuevas = regla.aplicar(ventana, contexto)
+                    if nuevas is not None:
+                        for instr in ventana:
+                            contexto.contar(instr, -1)
+                        for instr in nuevas:
+                            contexto.contar(instr, 1)
+                        instrs[i:i + regla.ventana] = nuevas
+                        informe.sumar(f"mirilla: {regla.nombre}")
+                        i = max(0, i - 1)
+                        break
+                else:
+                    i += 1
+
+
+mirilla = Mirilla()
+
+
+# ---------------------------------------------------------
+# Desenrollado de bucles
+# ---------------------------------------------------------
+ETIQUETA = re.compile(r'L\d+$')
+
+# Comparación de la condición -> signo que debe tener el paso del contador
+_SENTIDO = {'<': 1, '<=': 1, '>': -1, '>=': -1}
+
+
+def _vueltas(inicio, op, limite, paso):
+    """Vueltas de `while (c op limite) c = c + paso` desde c = inicio."""
+    op = TIPADOS.get(op, (op,))[0]
+    if paso < 0:
+        inicio, limite, paso = -inicio, -limite, -paso
+    distancia = limite - inicio
+    if op in ('<', '>'):
+        return max(0, -(-distancia // paso))
+    return max(0, distancia // paso + 1)
+
+
+class Desenrollado:
+    """
+    Desenrolla los while contados: cabecera "t := c op n; if t == 0 goto
+    salida", cuerpo en línea recta que cierra con "goto cabecera" y un
+    contador int c que el cuerpo cambia una sola vez, con c := c + k.
+
+    Si la entrada del contador y el límite son constantes y las vueltas
+    por el cuerpo caben en `max_instrucciones`, el bucle se cambia por
+    las copias del cuerpo en fila. Si no, y el límite es un int que el
+    bucle no toca, queda un bucle de `factor` copias que solo entra si
+    caben todas (c + (factor-1)*k op n) y un resto de factor-1 copias con
+    su comprobación cada una. El resto no es un bucle, y el cuerpo del
+    principal cambia el contador varias veces, así que otra ronda de -O
+    no vuelve a desenrollar lo mismo. Los temporales locales del cuerpo
+    se renombran en cada copia para que las demás pasadas los traten por
+    separado. Cada bucle desenrollado deja una línea en las notas del
+    informe.
+    """
+
+    def __init__(self, factor=4, max_instrucciones=64):
+        self.factor = factor
+        self.max_instrucciones = max_instrucciones
+        self.__name__ = "desenrollar"
+
+    def __call__(self, cfg, informe):
+        bucles = cfg.bucles()
+        if not bucles:
+            return
+        bloques = cfg.bloques
+        entero = _enteros(cfg)
+        locales = _temporales_locales(cfg)
+        definiciones = cfg.definiciones_alcanzables()
+        temporales, etiquetas = [0], [0]
+        for bloque in bloques:
+            for etiqueta in bloque.etiquetas:
+                if ETIQUETA.match(etiqueta):
+                    etiquetas[0] = max(etiquetas[0], int(etiqueta[1:]) + 1)
+            for instr in bloque.instrs:
+                for nombre in lecturas(instr) + (escritura(instr),):
+                    if nombre is not None and TEMPORAL.match(nombre):
+                        temporales[0] = max(temporales[0], int(nombre[1:]) + 1)
+
+        def temporal():
+            temporales[0] += 1
+            return f"t{temporales[0] - 1}"
+
+        def etiqueta():
+            etiquetas[0] += 1
+            return f"L{etiquetas[0] - 1}"
+
+        def copia(cuerpo):
+            # Los temporales locales del cuerpo se definen antes de leerse
+            nombres = {}
+
+            def escribe(nombre):
+                if nombre in locales:
+                    nombres[nombre] = temporal()
+                return nombres.get(nombre, nombre)
+
+            return [renombrar(instr, lambda nombre: nombres.get(nombre, nombre), escribe)
+                    for instr in cuerpo]
+
+        cambios = {}        # id de cabecera -> bloques que sustituyen a cabecera y cuerpo
+        for cabecera, ids in bucles.items():
+            forma = self._forma(cfg, cabecera, ids, entero, locales)
+            if forma is None:
+                continue
+            contador, op, limite, paso, suma, resta, salida = forma
+            entrada, cuerpo = bloques[cabecera], bloques[cabecera + 1].instrs[:-1]
+            nombre = entrada.etiquetas[0]
+
+            inicio = self._inicio(cfg, definiciones, cabecera, contador)
+            vueltas = None
+            if inicio is not None and type(valor_literal(limite)) is int:
+                vueltas = _vueltas(inicio, op, valor_literal(limite), paso)
+            if vueltas is not None and vueltas * len(cuerpo) <= self.max_instrucciones:
+                instrs = [instr for _ in range(vueltas) for instr in copia(cuerpo)]
+                cambios[cabecera] = [Bloque(-1, entrada.etiquetas, instrs + [('goto', salida)])]
+                informe.sumar("bucles desenrollados del todo")
+                informe.notas.append(f"bucle {nombre}: {vueltas} vueltas, desenrollado del todo")
+                continue
+
+            factor = self.factor
+            if (factor < 2 or not entero(limite)
+                    or (2 * factor - 1) * len(cuerpo) + 2 * factor + 2 > self.max_instrucciones):
+                continue
+            salto = (factor - 1) * paso
+            ultimo, condicion = temporal(), temporal()
+            principal = Bloque(-1, entrada.etiquetas, [
+                ('binop', ultimo, contador, suma if salto > 0 else resta, str(abs(salto))),
+                ('binop', condicion, ultimo, op, limite),
+                ('if', condicion, '0', etiqueta()),
+            ])
+            copias = [instr for _ in range(factor) for instr in copia(cuerpo)]
+            nuevos = [principal, Bloque(-1, instrs=copias + [('goto', nombre)])]
+            etiqueta_resto = principal.instrs[-1][-1]
+            for k in range(factor - 1):
+                condicion = temporal()
+                nuevos.append(Bloque(-1, [etiqueta_resto] if k == 0 else [], [
+                    ('binop', condicion, contador, op, limite),
+                    ('if', condicion, '0', salida),
+                ]))
+                nuevos.append(Bloque(-1, instrs=copia(cuerpo)))
+            nuevos[-1].instrs.append(('goto', salida))
+            cambios[cabecera] = nuevos
+            informe.sumar(f"bucles desenrollados x{factor}")
+            vueltas = f"{vueltas} vueltas" if vueltas is not None else "vueltas desconocidas"
+            informe.notas.append(f"bucle {nombre}: {vueltas}, desenrollado x{factor} con resto")
+
+        if cambios:
+            nuevos = []
+            for bloque in bloques:
+                if bloque.id in cambios:
+                    nuevos.extend(cambios[bloque.id])
+                elif bloque.id - 1 not in cambios:
+                    nuevos.append(bloque)
+            cfg.bloques = nuevos
+            cfg.recalcular_aristas()
+
+    def _forma(self, cfg, cabecera, ids, entero, locales):
+        """
+        (contador, op, límite, paso, suma, resta, salida) de un bucle
+        contado con contador a la izquierda de la comparación, o None.
+        `suma` y `resta` son los operadores con que se escribe c ± k.
+        """
+        bloques = cfg.bloques
+        if len(ids) != 2 or cabecera + 1 not in ids:
+            return None
+        entrada, cuerpo = bloques[cabecera], bloques[cabecera + 1]
+        if len(entrada.instrs) != 2 or not entrada.etiquetas:
+            return None
+        comparacion, salto = entrada.instrs
+        vuelta = cuerpo.salto()
+        if (comparacion[0] != 'binop' or salto[0] != 'if' or salto[1] != comparacion[1]
+                or comparacion[1] not in locales or valor_literal(salto[2]) != 0
+                or type(valor_literal(salto[2])) is not int
+                or vuelta is None or vuelta[0] != 'goto' or vuelta[1] not in entrada.etiquetas
+                or salto[3] in entrada.etiquetas or cuerpo.etiquetas):
+            return None
+
+        _, _, a, op, b = comparacion
+        generico = TIPADOS.get(op, (op,))[0]
+        if generico not in _SENTIDO:
+            return None
+        escritas = {}
+        for instr in cuerpo.instrs[:-1]:
+            destino = escritura(instr) or definida_por_input(instr)
+            if destino is not None:
+                escritas.setdefault(destino, []).append(instr)
+        if a not in escritas:
+            op = _ESPEJO_TIPADO.get(op) or _ESPEJO[op]
+            generico = TIPADOS.get(op, (op,))[0]
+            a, b = b, a
+        contador, limite = a, b
+        if (valor_literal(contador) is not None or contador in locales
+                or limite in escritas or not entero(contador)
+                or len(escritas.get(contador, ())) != 1):
+            return None
+
+        paso = escritas[contador][0]
+        if paso[0] != 'binop':
+            return None
+        _, _, x, operador, y = paso
+        generico_paso = TIPADOS.get(operador, (operador,))[0]
+        if x == contador and generico_paso in ('+', '-'):
+            k = valor_literal(y)
+        elif y == contador and generico_paso == '+':
+            k = valor_literal(x)
+        else:
+            return None
+        if type(k) is not int:
+            return None
+        k = -k if generico_paso == '-' else k
+        if k * _SENTIDO[generico] <= 0:
+            return None
+        suma, resta = ('iadd', 'isub') if operador in TIPADOS else ('+', '-')
+        return contador, op, limite, k, suma, resta, salto[3]
+
+    @staticmethod
+    def _inicio(cfg, definiciones, cabecera, contador):
+        """Valor int del contador al entrar al bucle si es constante, o None."""
+        valores = set()
+        for definicion in definiciones.en_entrada(cabecera, contador):
+            if definicion == INICIAL:
+                valores.add(0)
+                continue
+            bloque_id, k = definicion
+            if bloque_id == cabecera + 1:
+                continue
+            instr = cfg.bloques[bloque_id].instrs[k]
+            valor = valor_literal(instr[2]) if instr[0] == 'copy' else None
+            if type(valor) is not int:
+                return None
+            valores.add(valor)
+        return valores.pop() if len(valores) == 1 else None
+
+
+desenrollar = Desenrollado()
+
+
+# ---------------------------------------------------------
+# Limpieza del flujo de control
+# ---------------------------------------------------------
+def _saltar_a(instr, etiqueta):
+    """El mismo if/goto con otro destino."""
+    if instr[0] == 'goto':
+        return ('goto', etiqueta)
+    return ('if', instr[1], instr[2], etiqueta)
+
+
+def quitar_inalcanzables(cfg, informe):
+    """Quita los bloques a los que no se llega desde la entrada."""
+    alcanzables = cfg.alcanzables()
+    if len(alcanzables) == len(cfg.bloques):
+        return
+    ids = {bloque.id for bloque in alcanzables}
+    informe.sumar("instrucciones inalcanzables",
+                  sum(len(b.instrs) for b in cfg.bloques if b.id not in ids))
+    cfg.bloques = alcanzables
+    cfg.recalcular_aristas()
+
+
+def enhebrar_saltos(cfg, informe):
+    """
+    Redirige los saltos cuyo destino es otro goto al destino final y borra
+    los que van a parar a la instrucción siguiente.
+    """
+    bloques = cfg.bloques
+    destinos = cfg.etiquetas()
+
+    def primer_real(bloque):
+        # Los bloques vacíos caen al siguiente
+        while bloque is not None and not bloque.instrs:
+            bloque = bloques[bloque.id + 1] if bloque.id + 1 < len(bloques) else None
+        return bloque
+
+    def destino_final(etiqueta):
+        vistas = {etiqueta}
+        while True:
+            real = primer_real(destinos[etiqueta])
+            if real is None or len(real.instrs) != 1 or real.instrs[0][0] != 'goto':
+                return etiqueta
+            siguiente = real.instrs[0][1]
+            if siguiente not in destinos or siguiente in vistas:    # bucle de gotos
+                return etiqueta
+            vistas.add(siguiente)
+            etiqueta = siguiente
+
+    cambio = False
+    for bloque in bloques:
+        salto = bloque.salto()
+        if salto is None or salto[-1] not in destinos:
+            continue
+        etiqueta = destino_final(salto[-1])
+        siguiente = bloques[bloque.id + 1] if bloque.id + 1 < len(bloques) else None
+        if primer_real(destinos[etiqueta]) is primer_real(siguiente):
+            informe.sumar("saltos al siguiente")
+            bloque.instrs.pop()
+            cambio = True
+        elif etiqueta != salto[-1]:
+            informe.sumar("saltos encadenados")
+            bloque.instrs[-1] = _saltar_a(salto, etiqueta)
+            cambio = True
+    if cambio:
+        cfg.recalcular_aristas()
+
+
+def fusionar_etiquetas(cfg, informe):
+    """
+    Pasa las etiquetas de los bloques vacíos al bloque siguiente, deja una
+    sola etiqueta por bloque, quita las que ningún salto usa y junta los
+    bloques que quedan unidos solo por caída.
+    """
+    bloques = []
+    pendientes = []
+    for bloque in cfg.bloques:
+        bloque.etiquetas = pendientes + bloque.etiquetas
+        pendientes = []
+        if not bloque.instrs and bloque is not cfg.bloques[-1]:
+            pendientes = bloque.etiquetas
+            continue
+        bloques.append(bloque)
+
+    alias = {}
+    for bloque in bloques:
+        for etiqueta in bloque.etiquetas[1:]:
+            alias[etiqueta] = bloque.etiquetas[0]
+        if len(bloque.etiquetas) > 1:
+            informe.sumar("etiquetas fusionadas", len(bloque.etiquetas) - 1)
+            del bloque.etiquetas[1:]
+
+    usadas = set()
+    for bloque in bloques:
+        salto = bloque.salto()
+        if salto is not None and salto[-1] in alias:
+            bloque.instrs[-1] = salto = _saltar_a(salto, alias[salto[-1]])
+        if salto is not None:
+            usadas.add(salto[-1])
+
+    fusionados = []
+    for bloque in bloques:
+        if bloque.etiquetas and bloque.etiquetas[0] not in usadas:
+            informe.sumar("etiquetas sin uso")
+            bloque.etiquetas = []
+        anterior = fusionados[-1] if fusionados else None
+        if not bloque.etiquetas and anterior is not None and anterior.salto() is None:
+            anterior.instrs.extend(bloque.instrs)
+            continue
+        fusionados.append(bloque)
+    cfg.bloques = fusionados
+    cfg.recalcular_aristas()
+
+
+def quitar_temporales_muertos(cfg, informe):
+    """Quita asignaciones a temporales que ninguna instrucción lee."""
+    while True:
+        leidas = set()
+        for bloque in cfg.bloques:
+            for instr in bloque.instrs:
+                leidas.update(lecturas(instr))
+        quitadas = 0
+        for bloque in cfg.bloques:
+            nuevas = [instr for instr in bloque.instrs
+                      if not ((destino := escritura(instr)) is not None
+                              and TEMPORAL.match(destino) and destino not in leidas)]
+            quitadas += len(bloque.instrs) - len(nuevas)
+            bloque.instrs = nuevas
+        if not quitadas:
+            return
+        informe.sumar("temporales muertos", quitadas)
+
+
+# ---------------------------------------------------------
+# Punto de entrada
+# ---------------------------------------------------------
+# Pasadas de -O, en orden; se repiten hasta que el TAC deja de cambiar
+PASES = [
+    eliminar_subexpresiones,
+    propagar_constantes_ssa,
+    numerar_valores,
+    sacar_invariantes,
+    mirilla,
+    desenrollar,
+    quitar_inalcanzables,
+    enhebrar_saltos,
+    fusionar_etiquetas,
+    quitar_temporales_muertos,
+]
+
+
+def pases_con_desenrollado(factor):
+    """PASES con el desenrollado cambiado por uno de `factor` copias."""
+    return [Desenrollado(factor) if pase is desenrollar else pase for pase in PASES]
+
+
+def contar_instrucciones(lineas):
+    """Instrucciones ejecutables (sin etiquetas) de un TAC."""
+    return sum(1 for linea in lineas if not linea.endswith(':'))
+
+
+def optimizar(tac, pases=None, tipos=None):
+    """
+    Optimiza el TAC de CodeGenerator.generate conservando exactamente lo
+    que imprime la VM. `tipos` son los tipos de SemanticAnalyzer, que
+    algunas pasadas usan para saber qué pueden reordenar. Devuelve el TAC
+    nuevo y un InformeOptimizacion.
+    """
+    cfg = CFG.desde_tac(tac, tipos)
+    informe = InformeOptimizacion(cfg.instrucciones())
+    gestor = PassManager(PASES if pases is None else pases, hasta_fijo=True)
+    cfg = gestor.ejecutar(cfg, informe)
+    informe.tiempos = gestor.tiempos
+    informe.despues = cfg.instrucciones()
+    nuevo = cfg.a_tac()
+    if tac and not nuevo:
+        # Un TAC vacío es "no hay código" para la VM; un programa que se
+        # queda sin instrucciones se deja en una etiqueta y ejecuta sin más
+        nuevo = ["L0:"]
+    return nuevo, informe
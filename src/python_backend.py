@@ -0,0 +1,347 @@
+import ast
+import re
+from collections import OrderedDict
+
+from SintacticoSemantico import Program, BinaryOp, Literal, VarRef
+from CodeGen import CodeGenerator
+from tac_interpreter import TACInterpreter, BudgetExceeded, _suma, _division
+
+
+class NoTraducible(Exception):
+    """El programa depende de una particularidad del TAC que no se transpila."""
+
+
+# Operadores de CodeGenerator y su nodo de ast
+OPS_COMPARACION = {
+    'LT': ast.Lt, 'GT': ast.Gt, 'LE': ast.LtE, 'GE': ast.GtE,
+    'EQ': ast.Eq, 'NEQ': ast.NotEq,
+}
+OPS_ARITMETICOS = {'PLUS': ast.Add, 'MINUS': ast.Sub, 'MUL': ast.Mult, 'DIV': ast.Div}
+
+# Nombres que el intérprete de TAC no trata como variables normales
+_NOMBRE_RESERVADO_TAC = re.compile(r't\d+$|print|if|goto')
+
+TIPOS_NUMERICOS = ('int', 'float')
+
+
+def _nombre(nombre, ctx=None):
+    return ast.Name(id=f"v_{nombre}", ctx=ctx or ast.Load())
+
+
+def _llamada(funcion, *args):
+    return ast.Call(func=ast.Name(id=funcion, ctx=ast.Load()), args=list(args), keywords=[])
+
+
+class TranspiladorPython:
+    """
+    Baja el AST de Mini-Lang a un ast.Module de Python con while/if
+    estructurados. Reproduce lo que hace TACInterpreter con el TAC de
+    CodeGenerator: las variables son locales inicializadas a 0, `print`
+    y las condiciones leen su operando como nombre de variable, `+` suma
+    números y concatena en otro caso, y dividir entre 0 da 0.
+
+    Cada iteración de un while descuenta del cupo del ResourceGovernor las
+    instrucciones TAC de una vuelta (cota superior si hay if dentro); las
+    que quedan fuera de bucles se cargan al final.
+    """
+
+    def __init__(self, tipos=None):
+        self.tipos = tipos or {}
+        self.nombres = {}           # nombre -> None, en orden de aparición
+        self.instrucciones = 0      # instrucciones TAC fuera de bucles
+        self._marcos = []           # tuplas de variables que ve _tramo
+
+    # --- Punto de entrada ---
+    def traducir(self, programa):
+        cuerpo, self.instrucciones = self.bloque(programa.statements)
+        nombres = list(self.nombres)
+        for marco in self._marcos:
+            marco.elts = [_nombre(n) for n in nombres]
+        marco = ast.Tuple(elts=[_nombre(n) for n in nombres], ctx=ast.Load())
+
+        inicio = [ast.Assign(targets=[_nombre(n, ast.Store())], value=ast.Constant(0))
+                  for n in nombres]
+        inicio.append(ast.Assign(targets=[ast.Name(id="_g", ctx=ast.Store())],
+                                 value=ast.Name(id="_cupo", ctx=ast.Load())))
+        fin = ast.Expr(_llamada("_fin", ast.Name(id="_g", ctx=ast.Load()), marco))
+        protegido = ast.Try(body=cuerpo or [ast.Pass()], handlers=[], orelse=[], finalbody=[fin])
+
+        args = ast.arguments(posonlyargs=[], args=[ast.arg(arg=a) for a in
+                                                   ("_out", "_tramo", "_fin", "_cupo")],
+                             kwonlyargs=[], kw_defaults=[], defaults=[])
+        funcion = ast.FunctionDef(name="_programa", args=args, body=inicio + [protegido],
+                                  decorator_list=[], returns=None)
+        modulo = ast.Module(body=[funcion], type_ignores=[])
+        return ast.fix_missing_locations(modulo), nombres
+
+    def bloque(self, sentencias):
+        """Sentencias Python de un bloque y sus instrucciones TAC (sin bucles internos)."""
+        cuerpo = []
+        total = 0
+        for sentencia in sentencias:
+            traducidas, instrucciones = self.visit(sentencia)
+            cuerpo.extend(traducidas)
+            total += instrucciones
+        return cuerpo, total
+
+    def visit(self, node):
+        method = f'visit_{type(node).__name__}'
+        if hasattr(self, method):
+            return getattr(self, method)(node)
+        return [], 0
+
+    def variable(self, nombre):
+        if _NOMBRE_RESERVADO_TAC.match(nombre):
+            raise NoTraducible(f"la variable '{nombre}' choca con la sintaxis del TAC")
+        self.nombres.setdefault(nombre, None)
+        return nombre
+
+    # --- Sentencias ---
+    def visit_VarDecl(self, node):
+        if not node.expr:
+            return [], 0
+        return self.asignar(node.name, node.expr)
+
+    def visit_Assign(self, node):
+        return self.asignar(node.name, node.expr)
+
+    def asignar(self, nombre, expr):
+        valor, instrucciones = self.expresion(expr)
+        destino = _nombre(self.variable(nombre), ast.Store())
+        return [ast.Assign(targets=[destino], value=valor)], instrucciones + 1
+
+    def visit_PrintStmt(self, node):
+        expr = node.expr
+        if isinstance(expr, Literal) and expr.value_type == 'string':
+            return [ast.Expr(_llamada("_out", ast.Constant(expr.value[1:-1])))], 1
+        valor, instrucciones = self.operando_nombre(expr)
+        return [ast.Expr(_llamada("_out", _llamada("str", valor)))], instrucciones + 1
+
+    def visit_InputStmt(self, node):
+        # input no hace nada en la VM, pero cuenta como instrucción
+        self.variable(node.name)
+        return [], 1
+
+    def visit_IfStmt(self, node):
+        prueba, instrucciones = self.condicion(node.cond)
+        entonces, n_entonces = self.bloque(node.then_block)
+        sino, n_sino = self.bloque(node.else_block or [])
+        sentencia = ast.If(test=prueba, body=entonces or [ast.Pass()], orelse=sino)
+        return [sentencia], instrucciones + 1 + max(n_entonces + 1, n_sino)
+
+    def visit_WhileStmt(self, node):
+        prueba, n_cond = self.condicion(node.cond)
+        cuerpo, n_cuerpo = self.bloque(node.body)
+        # Cargo de una vuelta: condición, salto condicional, cuerpo y goto
+        cargo = ast.AugAssign(target=ast.Name(id="_g", ctx=ast.Store()), op=ast.Sub(),
+                              value=ast.Constant(n_cond + 1 + n_cuerpo + 1))
+        marco = ast.Tuple(elts=[], ctx=ast.Load())
+        revisar = ast.If(
+            test=ast.Compare(left=ast.Name(id="_g", ctx=ast.Load()), ops=[ast.LtE()],
+                             comparators=[ast.Constant(0)]),
+            body=[ast.Assign(targets=[ast.Name(id="_g", ctx=ast.Store())],
+                             value=_llamada("_tramo", ast.Name(id="_g", ctx=ast.Load()), marco))],
+            orelse=[])
+        self._marcos.append(marco)
+        sentencia = ast.While(test=prueba, body=cuerpo + [cargo, revisar], orelse=[])
+        # Fuera del bucle solo queda la última evaluación de la condición
+        return [sentencia], n_cond + 1
+
+    # --- Expresiones ---
+    def condicion(self, expr):
+        """
+        Prueba de un if/while. El TAC salta si el operando vale 0; una
+        comparación se usa directamente porque vale 1 o 0.
+        """
+        if isinstance(expr, BinaryOp) and expr.op in OPS_COMPARACION:
+            return self.comparacion(expr)
+        valor, instrucciones = self.operando_nombre(expr)
+        return ast.Compare(left=valor, ops=[ast.NotEq()], comparators=[ast.Constant(0)]), instrucciones
+
+    def operando_nombre(self, expr):
+        """
+        Operando de print/if: el TAC lo busca siempre como variable, así que
+        un literal numérico vale 0 y true/false leen las variables True/False.
+        """
+        if isinstance(expr, Literal):
+            texto = str(expr.value)
+            if texto.isidentifier():
+                return _nombre(self.variable(texto)), 0
+            return ast.Constant(0), 0
+        return self.expresion(expr)
+
+    def expresion(self, expr):
+        if isinstance(expr, VarRef):
+            return _nombre(self.variable(expr.name)), 0
+        if isinstance(expr, Literal):
+            return self.literal(expr), 0
+        if isinstance(expr, BinaryOp):
+            if expr.op in OPS_COMPARACION:
+                prueba, instrucciones = self.comparacion(expr)
+                return ast.IfExp(test=prueba, body=ast.Constant(1), orelse=ast.Constant(0)), instrucciones
+            return self.aritmetica(expr)
+        raise NoTraducible(f"expresión no soportada: {type(expr).__name__}")
+
+    def literal(self, expr):
+        if expr.value_type == 'string':
+            return ast.Constant(expr.value)
+        if expr.value_type in TIPOS_NUMERICOS:
+            return ast.Constant(expr.value)
+        # true/false: el TAC escribe True/False, que se leen como variables
+        return _nombre(self.variable(str(expr.value)))
+
+    def comparacion(self, expr):
+        izq, n_izq = self.expresion(expr.left)
+        der, n_der = self.expresion(expr.right)
+        op = OPS_COMPARACION[expr.op]()
+        return ast.Compare(left=izq, ops=[op], comparators=[der]), n_izq + n_der + 1
+
+    def aritmetica(self, expr):
+        izq, n_izq = self.expresion(expr.left)
+        der, n_der = self.expresion(expr.right)
+        instrucciones = n_izq + n_der + 1
+        if expr.op == 'PLUS' and not (self.numerico(expr.left) and self.numerico(expr.right)):
+            return _llamada("_suma", izq, der), instrucciones
+        if expr.op == 'DIV':
+            if isinstance(der, ast.Constant) and isinstance(der.value, (int, float)):
+                if der.value == 0:
+                    return ast.Constant(0), instrucciones
+            else:
+                return _llamada("_division", izq, der), instrucciones
+        op = OPS_ARITMETICOS.get(expr.op)
+        if op is None:
+            raise NoTraducible(f"operador no soportado: {expr.op}")
+        return ast.BinOp(left=izq, op=op(), right=der), instrucciones
+
+    def numerico(self, expr):
+        """True si la expresión siempre produce un número en la VM."""
+        if isinstance(expr, Literal):
+            return expr.value_type in TIPOS_NUMERICOS
+        if isinstance(expr, VarRef):
+            return self.tipos.get(expr.name) in TIPOS_NUMERICOS
+        if isinstance(expr, BinaryOp):
+            if expr.op in OPS_COMPARACION:
+                return True
+            return self.numerico(expr.left) and self.numerico(expr.right)
+        return False
+
+
+class ProgramaPython:
+    """Código compilado de un programa, sus variables y su coste fuera de bucles."""
+    __slots__ = ('codigo', 'nombres', 'instrucciones')
+
+    def __init__(self, codigo, nombres, instrucciones):
+        self.codigo = codigo
+        self.nombres = nombres
+        self.instrucciones = instrucciones
+
+
+# ---------------------------------------------------------
+# Caché de código compilado
+# ---------------------------------------------------------
+TAM_CACHE = 128
+_cache = OrderedDict()
+
+
+def compilar_programa(programa, tipos=None):
+    """
+    Transpila y compila un AST de Mini-Lang. El resultado se guarda en una
+    caché LRU indexada por el volcado del ast.Module generado, así que dos
+    AST equivalentes comparten el mismo objeto de código.
+    Lanza NoTraducible si el programa debe ejecutarse sobre el TAC.
+    """
+    transpilador = TranspiladorPython(tipos)
+    try:
+        modulo, nombres = transpilador.traducir(programa)
+        clave = ast.dump(modulo)
+    except RecursionError:
+        raise NoTraducible("expresión demasiado anidada")
+
+    compilado = _cache.get(clave)
+    if compilado is not None:
+        _cache.move_to_end(clave)
+        return compilado
+
+    try:
+        codigo = compile(modulo, "<mini-lang>", "exec")
+    except RecursionError:
+        raise NoTraducible("expresión demasiado anidada")
+    compilado = _cache[clave] = ProgramaPython(codigo, nombres, transpilador.instrucciones)
+    if len(_cache) > TAM_CACHE:
+        _cache.popitem(last=False)
+    return compilado
+
+
+# ---------------------------------------------------------
+# Backend
+# ---------------------------------------------------------
+class PythonBackend(TACInterpreter):
+    """
+    Ejecuta el AST transpilado a bytecode de CPython. Recibe el AST
+    (`entrada = "ast"`); si el programa no se puede transpilar, o si se le
+    pasa una lista de TAC, ejecuta el TAC con TACInterpreter y deja el
+    motivo en `self.fallback`.
+
+    Los presupuestos se comprueban al final de cada vuelta de un while, así
+    que el de instrucciones puede pasarse como mucho en una vuelta.
+    """
+    entrada = "ast"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fallback = None
+        self.variables = {}
+
+    @property
+    def memory(self):
+        if self.programa is not None:
+            return super().memory
+        return dict(self.variables)
+
+    def volcar_memoria(self):
+        if self.programa is not None:
+            return super().volcar_memoria()
+        tipos = self.tipos or {}
+        return [f"{nombre} = {valor!r}" + (f" ({tipos[nombre]})" if nombre in tipos else "")
+                for nombre, valor in self.variables.items()]
+
+    def execute(self, programa):
+        self.fallback = None
+        if not isinstance(programa, Program):
+            return super().execute(programa)
+        self._reiniciar(None)
+        self.variables = {}
+        try:
+            compilado = compilar_programa(programa, self.tipos)
+        except NoTraducible as e:
+            self.fallback = str(e)
+            return super().execute(CodeGenerator().generate(programa))
+
+        governor = self.governor
+        governor.start()
+        cupo = governor.quota()
+        salida = self.output
+        estado = {"cupo": cupo}
+
+        def tramo(g, marco):
+            governor.charge(estado["cupo"] - g, marco, salida)
+            estado["cupo"] = governor.quota()
+            return estado["cupo"]
+
+        def fin(g, marco):
+            governor.instructions += estado["cupo"] - g
+            estado["marco"] = marco
+
+        espacio = {"__builtins__": {"str": str}, "_suma": _suma, "_division": _division}
+        exec(compilado.codigo, espacio)
+        try:
+            espacio["_programa"](salida.append, tramo, fin, cupo)
+        except BudgetExceeded as e:
+            salida.append(str(e))
+            self.had_errors = True
+        marco = estado.get("marco", ())
+        self.variables = dict(zip(compilado.nombres, marco))
+        governor.instructions += compilado.instrucciones
+        governor.finish(marco, salida)
+
+        return salida
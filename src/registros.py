@@ -0,0 +1,137 @@
+import re
+
+from ir import CFG, lecturas, escritura, renombrar
+
+# Temporales que genera CodeGenerator.new_temp; los registros usan los
+# mismos nombres para no ocupar identificadores que un programa pueda usar
+TEMPORAL = re.compile(r't\d+$')
+
+
+class InformeRegistros:
+    """Resultado de asignar_registros sobre un programa."""
+
+    def __init__(self):
+        self.temporales = 0     # temporales distintos en el TAC original
+        self.pico = 0           # máximo de temporales vivos a la vez
+        self.registros = 0      # registros usados: slots de temporal del marco
+
+    def lineas(self):
+        return [f"{self.temporales} temporales -> {self.registros} slots del marco"
+                f" (pico de {self.pico} vivos)"]
+
+
+class _Intervalo:
+    __slots__ = ('nombre', 'inicio', 'fin', 'nace', 'lugar')
+
+    def __init__(self, nombre, posicion, nace):
+        self.nombre = nombre
+        self.inicio = self.fin = posicion
+        self.nace = nace        # el inicio es la asignación del temporal
+        self.lugar = None
+
+
+def _intervalos(cfg):
+    """
+    Intervalo de vida de cada temporal sobre el orden lineal del código:
+    de la primera a la última posición donde se escribe, se lee o está
+    vivo. Dos temporales vivos a la vez comparten alguna posición, así que
+    los intervalos que no se solapan pueden ir al mismo registro.
+    """
+    vivas_entrada, vivas_salida = cfg.vivas()
+    intervalos = {}
+    posicion = final = sum(len(bloque.instrs) for bloque in cfg.bloques)
+    for bloque in reversed(cfg.bloques):
+        vivas = {nombre for nombre in vivas_salida[bloque.id] if TEMPORAL.match(nombre)}
+        for instr in reversed(bloque.instrs):
+            posicion -= 1
+            destino = escritura(instr)
+            leidas = [nombre for nombre in lecturas(instr) if TEMPORAL.match(nombre)]
+            if destino is not None and TEMPORAL.match(destino):
+                vivas.add(destino)
+            for nombre in vivas:
+                intervalo = intervalos.get(nombre)
+                if intervalo is None:
+                    intervalo = intervalos[nombre] = _Intervalo(nombre, posicion, False)
+                intervalo.inicio = posicion
+                intervalo.nace = nombre == destino and nombre not in leidas
+            vivas.discard(destino)
+            vivas.update(leidas)
+            for nombre in leidas:
+                intervalo = intervalos.get(nombre)
+                if intervalo is None:
+                    intervalo = intervalos[nombre] = _Intervalo(nombre, posicion, False)
+                intervalo.inicio = posicion
+                intervalo.nace = False
+
+    # Un temporal que se lee antes de escribirse conserva el 0 inicial de
+    # la VM: ocupa su lugar durante todo el programa
+    for nombre in (vivas_entrada[0] if cfg.bloques else ()):
+        if nombre in intervalos:
+            intervalos[nombre].inicio, intervalos[nombre].fin = 0, final
+            intervalos[nombre].nace = False
+    return sorted(intervalos.values(), key=lambda intervalo: intervalo.inicio)
+
+
+def _libre_desde(activo, intervalo):
+    # Una instrucción lee sus operandos antes de escribir el destino, así
+    # que un temporal que muere donde otro nace le puede pasar el lugar
+    return activo.fin < intervalo.inicio or (activo.fin == intervalo.inicio and intervalo.nace)
+
+
+def _repartir(intervalos):
+    """
+    Reparto lineal (linear scan) de `intervalos`, ordenados por inicio,
+    entre lugares 0, 1, ... que se reciclan cuando su intervalo termina.
+    Devuelve cuántos lugares se usaron.
+    """
+    activos = []
+    libres = []
+    usados = 0
+    for intervalo in intervalos:
+        for activo in [a for a in activos if _libre_desde(a, intervalo)]:
+            activos.remove(activo)
+            libres.append(activo.lugar)
+        if libres:
+            intervalo.lugar = min(libres)
+            libres.remove(intervalo.lugar)
+        else:
+            intervalo.lugar = usados
+            usados += 1
+        activos.append(intervalo)
+    return usados
+
+
+def _pico(intervalos):
+    """Máximo de intervalos activos a la vez, con la misma regla de relevo."""
+    activos = []
+    pico = 0
+    for intervalo in intervalos:
+        activos = [a for a in activos if not _libre_desde(a, intervalo)]
+        activos.append(intervalo)
+        pico = max(pico, len(activos))
+    return pico
+
+
+def asignar_registros(tac):
+    """
+    Reparte los temporales del TAC entre registros t0, t1, ... que se
+    reutilizan según su vida, para que el marco de la VM crezca con los
+    valores vivos a la vez y no con el tamaño del código. No hay límite
+    de registros: la VM guarda variables y temporales en un mismo marco,
+    sin zona de derrame aparte, así que limitarlos no ahorraría memoria.
+    Devuelve el TAC nuevo y un InformeRegistros.
+    """
+    cfg = CFG.desde_tac(tac)
+    intervalos = _intervalos(cfg)
+    informe = InformeRegistros()
+    informe.temporales = len(intervalos)
+    informe.registros = _repartir(intervalos)
+    informe.pico = _pico(intervalos)
+    nombres = {intervalo.nombre: f"t{intervalo.lugar}" for intervalo in intervalos}
+
+    def nombre(texto):
+        return nombres.get(texto, texto)
+
+    for bloque in cfg.bloques:
+        bloque.instrs = [renombrar(instr, nombre, nombre) for instr in bloque.instrs]
+    return cfg.a_tac(), informe
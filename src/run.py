@@ -1,14 +1,45 @@
 import sys
-from AnalizadorLexico import obtener_tokens
-from SintacticoSemantico import Parser, Token, SemanticAnalyzer
+import os
+import argparse
+from AnalizadorLexico import tokenizar_buffers, obtener_buffers_paralelo
+from SintacticoSemantico import Parser, SemanticAnalyzer
 from CodeGen import CodeGenerator
-from tac_interpreter import TACInterpreter
+from optimizer import optimizar, pases_con_desenrollado
+from registros import asignar_registros
+from tac_interpreter import DEFAULT_MAX_INSTRUCTIONS, DEFAULT_CHECK_INTERVAL, decodificar
+from backends import BACKENDS, DEFAULT_BACKEND
+from cache import CacheCompilacion, Compilado, clave_archivo, opciones_clave
+from batch import run_batch, es_patron
 
-def run_file(path):
+
+def report_semantic_errors(sem_errors):
+    print("❌ SEMANTIC ERRORS FOUND - COMPILATION STOPPED:")
+    for error in sem_errors:
+        print(f"   ⚠ {error}")
+    print(f"\nCompilation failed with {len(sem_errors)} error(s)")
+    return 1
+
+
+def execute_program(interpreter, program):
+    print("\n--- Program Output ---")
+    output = interpreter.execute(program)
+
+    for line in output:
+        print(line)
+
+    if interpreter.had_execution_errors():
+        print(f"\n❌ Execution finished with errors")
+        return 1
+    else:
+        print(f"\n✅ Execution finished successfully")
+        return 0
+
+
+def run_file(path, lex_workers=None, limits=None, backend=DEFAULT_BACKEND, optimize=False,
+             registers=False, unroll=None, cache_dir=None):
 
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            code = f.read()
+        f = open(path, "r", encoding="utf-8")
     except FileNotFoundError:
         print(f"Error: file '{path}' not found.")
         return
@@ -16,11 +47,30 @@ def run_file(path):
     print(f"\n=== Running Mini-Lang Program: {path} ===\n")
 
     try:
-        # 1. Lexical analysis
-        tokens = obtener_tokens(code)
+        # 0. Compilation cache: a hit replays the semantic errors or runs
+        # the stored, already decoded program without lexing, parsing,
+        # optimizing or decoding the TAC again
+        cache = key = None
+        if cache_dir and BACKENDS[backend].entrada == "tac":
+            cache = CacheCompilacion(cache_dir)
+            key = clave_archivo(path, opciones_clave(optimize, registers, unroll))
+            cached = cache.cargar(key)
+            if cached is not None:
+                f.close()
+                print(f"--- Compilation cache hit ({key[:16]}) ---\n")
+                if cached.errores:
+                    return report_semantic_errors(cached.errores)
+                interpreter = BACKENDS[backend](tipos=cached.tipos, **(limits or {}))
+                return execute_program(interpreter, cached.programa or cached.tac)
 
-        # 2. Parsing
-        ast = Parser([Token(*t) for t in tokens]).parse()
+        # 1-2. Lexical analysis streamed straight into the parser,
+        # or lexed in parallel chunks when workers are requested
+        with f:
+            if lex_workers:
+                tokens = obtener_buffers_paralelo(f.read(), workers=lex_workers)
+            else:
+                tokens = tokenizar_buffers(f)
+            ast = Parser(tokens).parse()
 
         # 3. Semantic analysis
         sem_analyzer = SemanticAnalyzer()
@@ -28,41 +78,111 @@ def run_file(path):
         
        
         if sem_errors:
-            print("❌ SEMANTIC ERRORS FOUND - COMPILATION STOPPED:")
-            for error in sem_errors:
-                print(f"   ⚠ {error}")
-            print(f"\nCompilation failed with {len(sem_errors)} error(s)")
-            return 1  
+            if cache is not None:
+                cache.guardar(key, Compilado(errores=sem_errors))
+            return report_semantic_errors(sem_errors)
 
         # 4. TAC generation 
-        tac = CodeGenerator().generate(ast)
+        tac = CodeGenerator(sem_analyzer.tabla).generate(ast)
         print("\n--- Generated TAC ---")
         for i, instr in enumerate(tac, 1):
             print(f"{i:03}:", instr)
 
-        # 5. Execution 
-        print("\n--- Program Output ---")
-        interpreter = TACInterpreter()
-        output = interpreter.execute(tac)
+        interpreter = BACKENDS[backend](tipos=sem_analyzer.tipos_variables, **(limits or {}))
 
-        for line in output:
-            print(line)
+        # 4b. Optimization over the TAC (AST backends never see it)
+        if optimize and interpreter.entrada == "ast":
+            print(f"\n⚠ -O ignored: the '{backend}' backend runs the AST, not the TAC")
+        elif optimize:
+            passes = pases_con_desenrollado(unroll) if unroll is not None else None
+            tac, report = optimizar(tac, passes, tipos=sem_analyzer.tipos_variables)
+            print("\n--- Optimized TAC ---")
+            for i, instr in enumerate(tac, 1):
+                print(f"{i:03}:", instr)
+            print("\n--- Optimization Report ---")
+            for line in report.lineas():
+                print(line)
 
-        if interpreter.had_execution_errors():
-            print(f"\n❌ Execution finished with errors")
-            return 1
-        else:
-            print(f"\n✅ Execution finished successfully")
-            return 0
+        # 4c. Temporaries recycled through registers by liveness
+        if registers and interpreter.entrada == "ast":
+            print(f"\n⚠ --registers ignored: the '{backend}' backend runs the AST, not the TAC")
+        elif registers:
+            tac, report = asignar_registros(tac)
+            print("\n--- TAC with Registers ---")
+            for i, instr in enumerate(tac, 1):
+                print(f"{i:03}:", instr)
+            print("\n--- Register Allocation ---")
+            for line in report.lineas():
+                print(line)
+
+        program = ast if interpreter.entrada == "ast" else tac
+        if cache is not None:
+            # Decoded once, both for the cache entry and for this run
+            decoded = decodificar(tac, sem_analyzer.tipos_variables) if tac else None
+            cache.guardar(key, Compilado(tac=tac, tipos=sem_analyzer.tipos_variables, programa=decoded))
+            program = decoded or tac
+
+        # 5. Execution 
+        return execute_program(interpreter, program)
 
     except Exception as e:
         print(f"❌ COMPILATION ERROR: {e}")
         return 1
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python run.py <file.src>")
-        sys.exit(1)
+    arg_parser = argparse.ArgumentParser(description="Run a Mini-Lang program")
+    arg_parser.add_argument("files", nargs="+", metavar="file",
+                            help="Mini-Lang source file (.src); several files, directories or globs run as a batch")
+    arg_parser.add_argument("--lex-workers", type=int, metavar="N",
+                            help="lex the source in parallel with N processes")
+    arg_parser.add_argument("-O", dest="optimize", action="store_true",
+                            help="optimize the TAC before running it")
+    arg_parser.add_argument("--unroll", type=int, metavar="N",
+                            help="with -O, unroll counted loops N times plus a remainder (default 4, 1 = full unrolling only)")
+    arg_parser.add_argument("--registers", action="store_true",
+                            help="recycle TAC temporaries as registers by liveness, so the VM frame grows with the values live at once")
+    arg_parser.add_argument("--cache", dest="cache_dir", metavar="DIR",
+                            help="reuse compiled programs from DIR, keyed by source, compiler and flags")
+    arg_parser.add_argument("--jobs", type=int, metavar="N",
+                            help="batch mode: compile and run files in N worker processes (default one per CPU)")
+    arg_parser.add_argument("--report", metavar="PATH",
+                            help="batch mode: write a JSON (.json) or JSON Lines report to PATH ('-' = stdout)")
+    arg_parser.add_argument("--no-execute", dest="execute", action="store_false",
+                            help="only compile, do not run the programs (implies batch mode)")
+    arg_parser.add_argument("--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                            help=f"execution engine for the TAC (default {DEFAULT_BACKEND})")
+    arg_parser.add_argument("--max-instructions", type=int, default=DEFAULT_MAX_INSTRUCTIONS, metavar="N",
+                            help=f"instruction budget, 0 = unlimited (default {DEFAULT_MAX_INSTRUCTIONS})")
+    arg_parser.add_argument("--max-seconds", type=float, metavar="S",
+                            help="wall-clock budget in seconds")
+    arg_parser.add_argument("--max-memory", type=int, metavar="BYTES",
+                            help="approximate memory budget in bytes")
+    arg_parser.add_argument("--check-interval", type=int, default=DEFAULT_CHECK_INTERVAL, metavar="N",
+                            help=f"instructions between budget checks (default {DEFAULT_CHECK_INTERVAL})")
+    args = arg_parser.parse_args()
 
-    exit_code = run_file(sys.argv[1])
+    limits = {
+        "max_instructions": args.max_instructions,
+        "max_seconds": args.max_seconds,
+        "max_memory": args.max_memory,
+        "check_interval": args.check_interval,
+    }
+    if args.unroll is not None and not args.optimize:
+        print("⚠ --unroll ignored: loops are only unrolled with -O")
+    batch = (len(args.files) > 1 or os.path.isdir(args.files[0]) or es_patron(args.files[0])
+             or args.jobs is not None or args.report is not None or not args.execute)
+    if batch:
+        if args.backend != "tac":
+            print(f"⚠ --backend {args.backend} ignored: batch mode runs the TAC interpreter")
+        if args.lex_workers is not None:
+            print("⚠ --lex-workers ignored: batch mode parallelizes across files with --jobs")
+        exit_code = run_batch(args.files, jobs=args.jobs, report=args.report,
+                              ejecutar=args.execute, optimize=args.optimize,
+                              registers=args.registers, unroll=args.unroll,
+                              cache_dir=args.cache_dir, limits=limits)
+        sys.exit(exit_code)
+    exit_code = run_file(args.files[0], lex_workers=args.lex_workers, limits=limits,
+                         backend=args.backend, optimize=args.optimize,
+                         registers=args.registers, unroll=args.unroll,
+                         cache_dir=args.cache_dir)
     sys.exit(exit_code)
@@ -0,0 +1,192 @@
+from ir import lecturas, escritura, definida_por_input, renombrar
+
+# Las versiones se escriben nombre#k; '#' no aparece en identificadores ni
+# en temporales, y nombre#0 es el valor con el que la VM arranca (0)
+SEPARADOR = '#'
+
+
+class Phi:
+    """destino := phi(args), con args {id del predecesor: versión}; None es la entrada del programa."""
+    __slots__ = ('destino', 'nombre', 'args')
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.destino = None
+        self.args = {}
+
+    def __repr__(self):
+        return f"{self.destino} := phi({self.args})"
+
+
+class SSA:
+    """
+    Forma SSA de los bloques alcanzables de un CFG. Las instrucciones
+    renombradas viven en `instrs` (por id de bloque) y las phi en `phis`;
+    el CFG no se toca hasta `a_cfg()`. Las phi se colocan en la frontera
+    de dominancia de las definiciones y solo donde la variable está viva
+    (SSA podada), así que los temporales de CodeGenerator, que no salen de
+    su bloque, nunca llevan phi.
+
+    Las pasadas sobre la SSA pueden sustituir lecturas por literales y
+    reescribir instrucciones, pero una lectura solo puede cambiar a otra
+    versión si es la versión vigente de su variable en ese punto. Así las
+    versiones de una misma variable nunca están vivas a la vez y salir de
+    SSA es quitar el sufijo de versión y las phi.
+    """
+
+    def __init__(self, cfg):
+        self.cfg = cfg
+        self.idom = cfg.dominadores()
+        self.hijos = {}                 # árbol de dominadores: id -> [ids]
+        for b, padre in self.idom.items():
+            if b != padre:
+                self.hijos.setdefault(padre, []).append(b)
+        self.phis = {b: [] for b in self.idom}
+        self.instrs = {}
+        self.base = {}                  # versión -> nombre original
+        self.definicion = {}            # versión -> (id, índice), o (id, Phi)
+        self._contador = {}
+        self._colocar_phis()
+        self._renombrar()
+
+    # --- Construcción ---
+    def frontera_dominancia(self):
+        bloques = self.cfg.bloques
+        frontera = {b: set() for b in self.idom}
+        for b in self.idom:
+            preds = [p.id for p in bloques[b].predecesores if p.id in self.idom]
+            if len(preds) + (b == 0) < 2:
+                continue
+            # La entrada tiene además la arista implícita del inicio del programa
+            tope = self.idom[b] if b != 0 else None
+            for p in preds:
+                corredor = p
+                while corredor != tope:
+                    frontera[corredor].add(b)
+                    if corredor == 0:
+                        break
+                    corredor = self.idom[corredor]
+        return frontera
+
+    def _colocar_phis(self):
+        bloques = self.cfg.bloques
+        vivas_entrada, _ = self.cfg.vivas()
+        frontera = self.frontera_dominancia()
+        definen = {}
+        for b in self.idom:
+            for instr in bloques[b].instrs:
+                destino = escritura(instr) or definida_por_input(instr)
+                if destino is not None:
+                    definen.setdefault(destino, set()).add(b)
+        for nombre, sitios in definen.items():
+            con_phi = set()
+            pendientes = list(sitios)
+            while pendientes:
+                b = pendientes.pop()
+                for f in frontera[b]:
+                    if f in con_phi or nombre not in vivas_entrada[f]:
+                        continue
+                    con_phi.add(f)
+                    self.phis[f].append(Phi(nombre))
+                    if f not in sitios:
+                        pendientes.append(f)
+
+    def version_inicial(self, nombre):
+        version = f"{nombre}{SEPARADOR}0"
+        self.base[version] = nombre
+        return version
+
+    def _nueva(self, nombre, sitio):
+        k = self._contador[nombre] = self._contador.get(nombre, 0) + 1
+        version = f"{nombre}{SEPARADOR}{k}"
+        self.base[version] = nombre
+        self.definicion[version] = sitio
+        return version
+
+    def _renombrar(self):
+        bloques = self.cfg.bloques
+        pilas = {}
+
+        def lee(nombre):
+            pila = pilas.get(nombre)
+            return pila[-1] if pila else self.version_inicial(nombre)
+
+        if 0 in self.idom:
+            for phi in self.phis[0]:
+                phi.args[None] = self.version_inicial(phi.nombre)
+
+        # Recorrido en preorden del árbol de dominadores, sin recursión
+        pendientes = [(0, True)] if 0 in self.idom else []
+        while pendientes:
+            b, entrando = pendientes.pop()
+            if not entrando:
+                for instr in reversed(self.instrs[b]):
+                    destino = escritura(instr) or definida_por_input(instr)
+                    if destino is not None:
+                        pilas[self.base[destino]].pop()
+                for phi in self.phis[b]:
+                    pilas[phi.nombre].pop()
+                continue
+
+            for phi in self.phis[b]:
+                phi.destino = self._nueva(phi.nombre, (b, phi))
+                pilas.setdefault(phi.nombre, []).append(phi.destino)
+            renombradas = []
+            for k, instr in enumerate(bloques[b].instrs):
+                def escribe(nombre, sitio=(b, k)):
+                    version = self._nueva(nombre, sitio)
+                    pilas.setdefault(nombre, []).append(version)
+                    return version
+                renombradas.append(renombrar(instr, lee, escribe))
+            self.instrs[b] = renombradas
+            for sucesor in bloques[b].sucesores:
+                for phi in self.phis[sucesor.id]:
+                    phi.args[b] = lee(phi.nombre)
+
+            pendientes.append((b, False))
+            for hijo in reversed(self.hijos.get(b, ())):
+                pendientes.append((hijo, True))
+
+    # --- Consultas ---
+    def usos(self):
+        """Versión -> sitios que la leen: (id, índice) de instrucción o (id, Phi)."""
+        usos = {}
+        for b, phis in self.phis.items():
+            for phi in phis:
+                for version in phi.args.values():
+                    usos.setdefault(version, []).append((b, phi))
+        for b, instrs in self.instrs.items():
+            for k, instr in enumerate(instrs):
+                for version in lecturas(instr):
+                    usos.setdefault(version, []).append((b, k))
+        return usos
+
+    def preorden(self):
+        """Ids de bloque en preorden del árbol de dominadores."""
+        orden = []
+        pendientes = [0] if 0 in self.idom else []
+        while pendientes:
+            b = pendientes.pop()
+            orden.append(b)
+            pendientes.extend(reversed(self.hijos.get(b, ())))
+        return orden
+
+    # --- Salida de SSA ---
+    def a_cfg(self):
+        """
+        Devuelve las instrucciones al CFG con los nombres originales. Las phi
+        desaparecen: todas sus versiones vuelven a ser la misma variable.
+        """
+        base = self.base
+
+        def original(texto):
+            return base.get(texto, texto)
+
+        bloques = self.cfg.bloques
+        for b, instrs in self.instrs.items():
+            bloques[b].instrs = [renombrar(instr, original, original) for instr in instrs]
+        return self.cfg
+
+
+def construir_ssa(cfg):
+    return SSA(cfg)
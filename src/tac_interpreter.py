@@ -1,177 +1,987 @@
-class TACInterpreter:
+import sys
+import time
+
+# Códigos de operación del flujo de instrucciones decodificado
+(OP_NOP, OP_PRINT_CONST, OP_PRINT, OP_IF_EQ, OP_GOTO, OP_COPY,
+ OP_LT, OP_GT, OP_LE, OP_GE, OP_EQ, OP_NE,
+ OP_ADD, OP_SUB, OP_MUL, OP_DIV) = range(16)
+
+# Opcodes tipados que emite CodeGenerator cuando conoce los tipos
+# semánticos: i* con operandos int, f* con algún float
+(OP_IADD, OP_ISUB, OP_IMUL, OP_IDIV, OP_ILT, OP_IGT, OP_ILE, OP_IGE,
+ OP_FADD, OP_FSUB, OP_FMUL, OP_FDIV, OP_FLT, OP_FGT, OP_FLE, OP_FGE) = range(16, 32)
+
+# Superinstrucciones que arma `fusionar` con dos instrucciones seguidas:
+#   OP_IFNOT_*  t := a cmp b; if t == 0 goto L   -> (op, L, a, b)
+#   OP_*_VAR    t := a op b; x := t               -> (op, x, a, b)
+(OP_IFNOT_LT, OP_IFNOT_GT, OP_IFNOT_LE, OP_IFNOT_GE, OP_IFNOT_EQ, OP_IFNOT_NE,
+ OP_ADD_VAR, OP_NADD_VAR, OP_SUB_VAR, OP_MUL_VAR, OP_DIV_VAR) = range(32, 43)
+
+# Cabecera de un bucle contado que `cerrar_bucles` resuelve en forma
+# cerrada: (OP_BUCLE, BucleAfin, None, None)
+OP_BUCLE = 43
+
+# Operadores binarios de "x := a op b" y su opcode
+OPERADORES = (
+    ('<', OP_LT), ('>', OP_GT), ('<=', OP_LE), ('>=', OP_GE),
+    ('==', OP_EQ), ('!=', OP_NE),
+    ('+', OP_ADD), ('-', OP_SUB), ('*', OP_MUL), ('/', OP_DIV),
+    ('iadd', OP_IADD), ('isub', OP_ISUB), ('imul', OP_IMUL), ('idiv', OP_IDIV),
+    ('ilt', OP_ILT), ('igt', OP_IGT), ('ile', OP_ILE), ('ige', OP_IGE),
+    ('fadd', OP_FADD), ('fsub', OP_FSUB), ('fmul', OP_FMUL), ('fdiv', OP_FDIV),
+    ('flt', OP_FLT), ('fgt', OP_FGT), ('fle', OP_FLE), ('fge', OP_FGE),
+)
+
+# Operador tipado -> (operador genérico, tipo de los operandos)
+TIPADOS = {
+    texto: (generico, 'int' if texto[0] == 'i' else 'float')
+    for texto, generico in zip(
+        ('iadd', 'isub', 'imul', 'idiv', 'ilt', 'igt', 'ile', 'ige',
+         'fadd', 'fsub', 'fmul', 'fdiv', 'flt', 'fgt', 'fle', 'fge'),
+        ('+', '-', '*', '/', '<', '>', '<=', '>=') * 2)
+}
+
+# Opcode genérico con la misma semántica que cada opcode tipado; la suma
+# tipada no necesita el caso de cadenas de _suma
+GENERICO = {
+    OP_IADD: OP_ADD, OP_ISUB: OP_SUB, OP_IMUL: OP_MUL, OP_IDIV: OP_DIV,
+    OP_ILT: OP_LT, OP_IGT: OP_GT, OP_ILE: OP_LE, OP_IGE: OP_GE,
+    OP_FADD: OP_ADD, OP_FSUB: OP_SUB, OP_FMUL: OP_MUL, OP_FDIV: OP_DIV,
+    OP_FLT: OP_LT, OP_FGT: OP_GT, OP_FLE: OP_LE, OP_FGE: OP_GE,
+}
+
+
+def _suma(a, b):
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a + b
+    return str(a) + str(b)
+
+def _division(a, b):
+    if b != 0:
+        return a / b
+    return 0
+
+# Semántica de cada operador binario de la VM
+SEMANTICA = {
+    OP_LT: lambda a, b: 1 if a < b else 0,
+    OP_GT: lambda a, b: 1 if a > b else 0,
+    OP_LE: lambda a, b: 1 if a <= b else 0,
+    OP_GE: lambda a, b: 1 if a >= b else 0,
+    OP_EQ: lambda a, b: 1 if a == b else 0,
+    OP_NE: lambda a, b: 1 if a != b else 0,
+    OP_ADD: _suma,
+    OP_SUB: lambda a, b: a - b,
+    OP_MUL: lambda a, b: a * b,
+    OP_DIV: _division,
+}
+SEMANTICA.update({tipado: SEMANTICA[generico] for tipado, generico in GENERICO.items()})
+SEMANTICA[OP_IADD] = SEMANTICA[OP_FADD] = lambda a, b: a + b
+
+
+def valor_literal(operand):
+    """
+    Valor de un operando literal, o None si el operando es una variable.
+    Son literales las cadenas entre comillas y lo que int()/float() aceptan.
+    """
+    if not operand:
+        return 0
+    if (operand.startswith('"') and operand.endswith('"')) or (operand.startswith("'") and operand.endswith("'")):
+        return operand[1:-1]
+    try:
+        if '.' in operand:
+            return float(operand)
+        else:
+            return int(operand)
+    except ValueError:
+        return None
+
+
+class ProgramaTAC:
+    """
+    TAC decodificado una sola vez: instrucciones (opcode, destino, a, b) sin
+    etiquetas, con saltos absolutos y operandos ya resueltos a slots enteros
+    de un marco de memoria. Variables y temporales reciben un slot cada uno;
+    los literales ocupan slots precargados con su valor.
+    """
+    __slots__ = ('instrucciones', 'nombres', 'slots', 'marco_inicial', 'constantes',
+                 'etiquetas', 'tipos_slots')
+
     def __init__(self):
-        self.memory = {}
+        self.instrucciones = []
+        self.nombres = []           # slot -> nombre (o "#literal")
+        self.slots = {}             # nombre -> slot
+        self.marco_inicial = []     # valor inicial de cada slot
+        self.constantes = set()     # slots de literales
+        self.etiquetas = {}
+        self.tipos_slots = []       # slot -> tipo semántico (si se conoce)
+
+    def _slot(self, clave, valor):
+        slot = self.slots.get(clave)
+        if slot is None:
+            slot = self.slots[clave] = len(self.nombres)
+            self.nombres.append(clave)
+            self.marco_inicial.append(valor)
+            self.tipos_slots.append(None)
+        return slot
+
+    def operando(self, texto):
+        valor = valor_literal(texto)
+        if valor is None:
+            return self._slot(texto, 0)
+        # "#texto" no puede chocar con un nombre de variable
+        slot = self._slot("#" + texto, valor)
+        self.constantes.add(slot)
+        return slot
+
+    def variable(self, nombre):
+        return self._slot(nombre, 0)
+
+    def nuevo_marco(self):
+        return list(self.marco_inicial)
+
+    def anotar_tipos(self, tipos):
+        for nombre, tipo in tipos.items():
+            slot = self.slots.get(nombre)
+            if slot is not None:
+                self.tipos_slots[slot] = tipo
+
+    def variables(self, marco):
+        """Vista por nombre de un marco, solo para depuración."""
+        return {nombre: marco[slot] for slot, nombre in enumerate(self.nombres)
+                if slot not in self.constantes}
+
+    def volcar(self):
+        """Tupla de tipos básicos con el programa, para marshal (ver desde_volcado)."""
+        return (self.instrucciones, self.nombres, self.marco_inicial,
+                sorted(self.constantes), self.etiquetas, self.tipos_slots)
+
+    @classmethod
+    def desde_volcado(cls, datos):
+        """ProgramaTAC de una tupla de volcar(); los slots salen de los nombres."""
+        programa = cls()
+        (programa.instrucciones, programa.nombres, programa.marco_inicial,
+         constantes, programa.etiquetas, programa.tipos_slots) = datos
+        programa.constantes = set(constantes)
+        programa.slots = {nombre: slot for slot, nombre in enumerate(programa.nombres)}
+        return programa
+
+
+def _fin_literal(texto):
+    """
+    Índice donde termina el literal con que empieza `texto`. CodeGen
+    escribe las cadenas con su token entre comillas dobles, ""x"" o "'x'",
+    así que se cierra con las mismas comillas al revés.
+    """
+    apertura = texto[:2] if len(texto) > 2 and texto[1] in ('"', "'") else texto[:1]
+    fin = texto.find(apertura[::-1], len(apertura))
+    return len(texto) if fin < 0 else fin + len(apertura)
+
+
+def analizar_linea(line):
+    """
+    Forma de una línea TAC (sin espacios alrededor) según las reglas de la VM:
+      ('label', nombre)              ('print_const', texto)
+      ('print', operando)            ('if', operando, K, etiqueta)
+      ('goto', etiqueta)             ('copy', destino, operando)
+      ('binop', destino, a, op, b)   ('nop', linea)
+    Un if/goto mal formado es 'nop'; que la etiqueta exista lo comprueba
+    quien decodifica el programa completo.
+    """
+    if line.endswith(':'):
+        return ('label', line[:-1])
+
+    if line.startswith("print"):
+        value = line[5:].strip()
+        if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
+            return ('print_const', value[1:-1])
+        return ('print', value)
+
+    if line.startswith("if"):
+        parts = line.split()
+        # Formato: if t0 == 0 goto L1
+        if len(parts) >= 6 and parts[2] == "==":
+            return ('if', parts[1], parts[3], parts[5])
+        return ('nop', line)
+
+    if line.startswith("goto"):
+        parts = line.split()
+        if len(parts) >= 2:
+            return ('goto', parts[1])
+        return ('nop', line)
+
+    if ":=" in line:
+        left, right = line.split(":=", 1)
+        left = left.strip()
+        right = right.strip()
+        # El primer operando termina en su comilla de cierre o en el primer
+        # espacio; así un literal como "x iadd y" o "a + b" no se parte
+        if right[:1] in ('"', "'"):
+            corte = _fin_literal(right)
+        else:
+            corte = right.find(' ')
+        if corte > 0 and right[corte:corte + 1] == ' ':
+            partes = right[corte + 1:].split(' ', 1)
+            if len(partes) == 2 and partes[0] in OPCODES:
+                return ('binop', left, right[:corte], partes[0], partes[1].strip())
+        return ('copy', left, right)
+
+    return ('nop', line)
+
+
+# Opcode de cada operador binario por su texto
+OPCODES = dict(OPERADORES)
+
+
+def decodificar(tac_code, tipos=None):
+    """
+    Decodifica una lista de instrucciones TAC en un ProgramaTAC. `tipos`
+    (nombre -> tipo semántico) solo se usa para anotar los slots.
+    """
+    lines = [analizar_linea(line.strip()) for line in tac_code if line.strip()]
+    programa = ProgramaTAC()
+
+    # Etiquetas -> índice de la siguiente instrucción ejecutable
+    pc = 0
+    for instr in lines:
+        if instr[0] == 'label':
+            programa.etiquetas[instr[1]] = pc
+        else:
+            pc += 1
+
+    etiquetas = programa.etiquetas
+    emit = programa.instrucciones.append
+    for instr in lines:
+        tipo = instr[0]
+        if tipo == 'label':
+            continue
+        if tipo == 'print_const':
+            emit((OP_PRINT_CONST, instr[1], None, None))
+        elif tipo == 'print':
+            emit((OP_PRINT, programa.variable(instr[1]), None, None))
+        elif tipo == 'if' and instr[3] in etiquetas:
+            emit((OP_IF_EQ, etiquetas[instr[3]], programa.variable(instr[1]), int(instr[2])))
+        elif tipo == 'goto' and instr[1] in etiquetas:
+            emit((OP_GOTO, etiquetas[instr[1]], None, None))
+        elif tipo == 'binop':
+            _, left, a, op_text, b = instr
+            emit((OPCODES[op_text], programa.variable(left), programa.operando(a), programa.operando(b)))
+        elif tipo == 'copy':
+            emit((OP_COPY, programa.variable(instr[1]), programa.operando(instr[2]), None))
+        elif tipo == 'nop' and len(partes := instr[1].split()) == 2 and partes[0] == 'input':
+            # nop salvo que la ejecución reciba entradas: (OP_NOP, slot, None, None)
+            emit((OP_NOP, programa.variable(partes[1]), None, None))
+        else:
+            emit((OP_NOP, None, None, None))
+
+    if tipos:
+        programa.anotar_tipos(tipos)
+    return programa
+
+
+# ---------------------------------------------------------
+# Superinstrucciones
+# ---------------------------------------------------------
+_IFNOT = {OP_LT: OP_IFNOT_LT, OP_GT: OP_IFNOT_GT, OP_LE: OP_IFNOT_LE,
+          OP_GE: OP_IFNOT_GE, OP_EQ: OP_IFNOT_EQ, OP_NE: OP_IFNOT_NE}
+_A_VARIABLE = {OP_ADD: OP_ADD_VAR, OP_IADD: OP_NADD_VAR, OP_FADD: OP_NADD_VAR,
+               OP_SUB: OP_SUB_VAR, OP_MUL: OP_MUL_VAR, OP_DIV: OP_DIV_VAR}
+# La resta, el producto y la división tipados comparten semántica con los
+# genéricos (GENERICO), así que usan su misma superinstrucción
+_A_VARIABLE.update({tipado: _A_VARIABLE[generico] for tipado, generico in GENERICO.items()
+                    if tipado not in _A_VARIABLE and generico in _A_VARIABLE})
+
+
+def _lecturas(instr):
+    op, d, a, b = instr
+    if op == OP_PRINT:
+        return (d,)
+    if op == OP_IF_EQ or op == OP_COPY:
+        return (a,)
+    if op > OP_COPY:
+        return (a, b)
+    return ()
+
+
+def _temporales_que_mueren(programa):
+    """
+    pc -> slot del temporal que la instrucción pc lee y que no está vivo
+    después de ella. Solo cuentan los temporales de CodeGenerator (tN),
+    que la VM no expone; la vida se calcula sobre los bloques básicos.
+    """
+    code = programa.instrucciones
+    n = len(code)
+    temporales = {slot for slot, nombre in enumerate(programa.nombres)
+                  if nombre[:1] == 't' and nombre[1:].isdigit()}
+    lideres = {0}
+    for pc, (op, d, a, b) in enumerate(code):
+        if op == OP_IF_EQ or op == OP_GOTO:
+            lideres.add(d)
+            lideres.add(pc + 1)
+    inicios = sorted(pc for pc in lideres if pc < n)
+    fines = inicios[1:] + [n]
+    bloque_en = {inicio: i for i, inicio in enumerate(inicios)}
+
+    usos, defs, sucesores = [], [], []
+    for inicio, fin in zip(inicios, fines):
+        usadas, definidas = set(), set()
+        for op, d, a, b in code[inicio:fin]:
+            for slot in _lecturas((op, d, a, b)):
+                if slot in temporales and slot not in definidas:
+                    usadas.add(slot)
+            if op >= OP_COPY:
+                definidas.add(d)
+        op, d, a, b = code[fin - 1]
+        destinos = [] if op == OP_GOTO else [fin]
+        if op == OP_IF_EQ or op == OP_GOTO:
+            destinos.append(d)
+        sucesores.append([bloque_en[pc] for pc in destinos if pc < n])
+        usos.append(usadas)
+        defs.append(definidas)
+
+    entrada = [set() for _ in inicios]
+    cambio = True
+    while cambio:
+        cambio = False
+        for i in reversed(range(len(inicios))):
+            vivas = set()
+            for j in sucesores[i]:
+                vivas |= entrada[j]
+            vivas = usos[i] | (vivas - defs[i])
+            if len(vivas) != len(entrada[i]):
+                entrada[i] = vivas
+                cambio = True
+
+    mueren = {}
+    for i, (inicio, fin) in enumerate(zip(inicios, fines)):
+        vivas = set()
+        for j in sucesores[i]:
+            vivas |= entrada[j]
+        for pc in range(fin - 1, inicio - 1, -1):
+            instr = code[pc]
+            leidas = [slot for slot in _lecturas(instr) if slot in temporales]
+            for slot in leidas:
+                if slot not in vivas:
+                    mueren[pc] = slot
+            if instr[0] >= OP_COPY:
+                vivas.discard(instr[1])
+            vivas.update(leidas)
+    return mueren, lideres
+
+
+def fusionar(programa):
+    """
+    Instrucciones de `programa` con las parejas habituales de CodeGenerator
+    fusionadas en una superinstrucción, que ocupa el pc de la primera y
+    salta la segunda. La segunda se queda en su sitio, así que los pc no
+    cambian y se puede pasar de esta lista a la original en cualquier
+    instrucción. Solo se fusiona si el temporal muere en la pareja y nadie
+    salta a la segunda instrucción.
+    """
+    code = programa.instrucciones
+    fusionado = list(code)
+    mueren, lideres = _temporales_que_mueren(programa)
+    for pc in range(len(code) - 1):
+        op, t, a, b = code[pc]
+        if op <= OP_COPY or pc + 1 in lideres or mueren.get(pc + 1) != t:
+            continue
+        siguiente = code[pc + 1]
+        generico = GENERICO.get(op, op)
+        if siguiente[0] == OP_IF_EQ and siguiente[3] == 0 and generico in _IFNOT:
+            fusionado[pc] = (_IFNOT[generico], siguiente[1], a, b)
+        elif siguiente[0] == OP_COPY and op in _A_VARIABLE:
+            fusionado[pc] = (_A_VARIABLE[op], siguiente[1], a, b)
+    return fusionado
+
+
+# ---------------------------------------------------------
+# Bucles contados en forma cerrada
+# ---------------------------------------------------------
+# Vueltas mínimas para que valga la pena resolver un bucle de golpe
+VUELTAS_MINIMAS = 8
+
+# Opcodes con algún operando float: no entran en la forma cerrada
+_FLOTANTES = {OP_FADD, OP_FSUB, OP_FMUL, OP_FDIV, OP_FLT, OP_FGT, OP_FLE, OP_FGE}
+
+# Comparación -> (forma canónica, signo de la diferencia a - b)
+_CANONICA = {OP_LT: ('<', 1), OP_GT: ('<', -1), OP_LE: ('<=', 1),
+             OP_GE: ('<=', -1), OP_NE: ('!=', 1)}
+
+
+def _sumar_formas(x, y, signo=1):
+    suma = dict(x)
+    for slot, k in y.items():
+        suma[slot] = suma.get(slot, 0) + signo * k
+        if not suma[slot]:
+            del suma[slot]
+    return suma
+
+
+def _valor(forma, m):
+    # Una forma afín es {slot: coeficiente, None: constante}
+    total = 0
+    for slot, k in forma.items():
+        total += k if slot is None else k * m[slot]
+    return total
+
+
+class BucleAfin:
+    """
+    Bucle while cuyo cuerpo solo actualiza contadores (x := x + paso, con
+    un paso que no cambia dentro del bucle) y acumuladores de una
+    expresión afín de los contadores (s := s + a*i + b). Con los valores
+    de entrada se calcula cuántas vueltas da y dónde deja cada variable
+    tras k vueltas, con aritmética entera exacta.
+    """
+    __slots__ = ('cabecera', 'largo', 'pasos', 'acumulados', 'comparacion',
+                 'diferencia', 'simbolos', 'respaldo')
+
+    def vueltas(self, m):
+        """Vueltas que quedan desde el marco `m`, o None si no se sabe."""
+        for slot in self.simbolos:
+            if type(m[slot]) is not int:
+                return None
+        d0 = _valor(self.diferencia, m)
+        dd = sum(k * _valor(self.pasos[slot], m)
+                 for slot, k in self.diferencia.items() if slot in self.pasos)
+        # La condición es d0 + dd*k (<, <=, !=) 0 en la vuelta k
+        if self.comparacion == '<':
+            if d0 >= 0:
+                return 0
+            return (-d0 + dd - 1) // dd if dd > 0 else None
+        if self.comparacion == '<=':
+            if d0 > 0:
+                return 0
+            return -d0 // dd + 1 if dd > 0 else None
+        if d0 == 0:
+            return 0
+        if dd == 0 or -d0 % dd or -d0 // dd < 0:
+            return None
+        return -d0 // dd
+
+    def avanzar(self, m, k):
+        """Deja en `m` los contadores y acumuladores tras k vueltas."""
+        pasos = {slot: _valor(paso, m) for slot, paso in self.pasos.items()}
+        nuevos = []
+        for slot, suma in self.acumulados.items():
+            # sum(g0 + g1*j for j in range(k)) con g afín en los contadores
+            g0 = _valor(suma, m)
+            g1 = sum(c * pasos[s] for s, c in suma.items() if s in pasos)
+            nuevos.append((slot, m[slot] + k * g0 + g1 * (k * (k - 1) // 2)))
+        for slot, paso in pasos.items():
+            nuevos.append((slot, m[slot] + paso * k))
+        for slot, valor in nuevos:
+            m[slot] = valor
+
+
+def _bucle_afin(programa, code, cabecera, saltos):
+    """
+    BucleAfin que empieza en `cabecera`, o None si el bucle no tiene la
+    forma de CodeGenerator (cabecera y cuerpo en línea recta, cerrados con
+    "goto cabecera") o hace algo que no sea aritmética entera afín:
+    print, input, división, productos de variables, floats...
+    """
+    constantes = programa.constantes
+    estado = {}             # slot -> forma afín o ('cmp', op, forma, forma)
+    leidas = set()          # slots leídos antes de escribirse en la vuelta
+    condicion = None
+
+    def leer(slot):
+        if slot in constantes:
+            valor = programa.marco_inicial[slot]
+            if type(valor) is not int:
+                return None
+            return {None: valor} if valor else {}
+        if slot in estado:
+            return estado[slot]
+        leidas.add(slot)
+        return {slot: 1}
+
+    pc = cabecera
+    while True:
+        if pc >= len(code) or (pc != cabecera and pc in saltos):
+            return None
+        op, d, a, b = code[pc]
+        op = GENERICO.get(op, op) if op not in _FLOTANTES else None
+        if op == OP_GOTO:
+            if d != cabecera or condicion is None:
+                return None
+            break
+        if op == OP_IF_EQ:
+            forma = estado.get(a)
+            if condicion is not None or b != 0 or type(forma) is not tuple:
+                return None
+            condicion = forma
+        elif op == OP_COPY:
+            x = leer(a)
+            if x is None:
+                return None
+            estado[d] = x
+        elif op in (OP_ADD, OP_SUB, OP_MUL) or op in _CANONICA:
+            x, y = leer(a), leer(b)
+            if type(x) is not dict or type(y) is not dict:
+                return None
+            if op == OP_ADD:
+                estado[d] = _sumar_formas(x, y)
+            elif op == OP_SUB:
+                estado[d] = _sumar_formas(x, y, -1)
+            elif op == OP_MUL:
+                if set(x) <= {None}:
+                    x, y = y, x
+                if not set(y) <= {None}:
+                    return None
+                k = y.get(None, 0)
+                estado[d] = {slot: c * k for slot, c in x.items()} if k else {}
+            else:
+                estado[d] = ('cmp', op, x, y)
+        else:
+            return None
+        pc += 1
+
+    _, op, x, y = condicion
+    comparacion, signo = _CANONICA[op]
+    diferencia = _sumar_formas(x, y, -1) if signo > 0 else _sumar_formas(y, x, -1)
+
+    llevadas = leidas & set(estado)
+    invariantes = leidas - llevadas
+    pasos, acumulados = {}, {}
+    for slot in llevadas:
+        forma = estado[slot]
+        if type(forma) is not dict or forma.get(slot) != 1:
+            return None
+        resto = {s: c for s, c in forma.items() if s != slot}
+        if all(s is None or s in invariantes for s in resto):
+            pasos[slot] = resto
+        else:
+            acumulados[slot] = resto
+    for suma in acumulados.values():
+        if not all(s is None or s in invariantes or s in pasos for s in suma):
+            return None
+    if not all(s is None or s in invariantes or s in pasos for s in diferencia):
+        return None
+
+    bucle = BucleAfin()
+    bucle.cabecera = cabecera
+    bucle.largo = pc - cabecera + 1
+    bucle.pasos = pasos
+    bucle.acumulados = acumulados
+    bucle.comparacion = comparacion
+    bucle.diferencia = diferencia
+    bucle.simbolos = tuple(sorted(leidas))
+    bucle.respaldo = code[cabecera]
+    return bucle
+
+
+def cerrar_bucles(programa, code):
+    """
+    Copia de `code` con la cabecera de cada bucle contado afín cambiada
+    por OP_BUCLE, que resuelve de golpe todas las vueltas menos la última
+    y sigue por la instrucción original de la cabecera; la última vuelta
+    y la salida se ejecutan normalmente, así que los temporales y la
+    condición quedan igual que sin el atajo.
+    """
+    simple = programa.instrucciones
+    saltos = {d for op, d, a, b in simple if op == OP_IF_EQ or op == OP_GOTO}
+    cerrado = list(code)
+    for cabecera in sorted(saltos):
+        if cabecera >= len(simple):
+            continue
+        bucle = _bucle_afin(programa, simple, cabecera, saltos)
+        if bucle is not None:
+            bucle.respaldo = code[cabecera]
+            cerrado[cabecera] = (OP_BUCLE, bucle, None, None)
+    return cerrado
+
+
+class CodigoVM:
+    """
+    Lo que la VM ejecuta de un programa: el ProgramaTAC, su flujo sin
+    fusionar y el flujo con superinstrucciones y bucles cerrados. No se
+    modifica al ejecutar, así que varias ejecuciones (también en hilos
+    distintos) pueden compartirlo.
+    """
+    __slots__ = ('programa', 'simple', 'code')
+
+    def __init__(self, programa, code):
+        self.programa = programa
+        self.simple = programa.instrucciones
+        self.code = code
+
+
+def preparar_programa(programa, superinstrucciones=True, bucles_cerrados=True):
+    """Prepara un ProgramaTAC ya decodificado (p. ej. de la caché) para TACInterpreter.ejecutar."""
+    code = fusionar(programa) if superinstrucciones else programa.instrucciones
+    if bucles_cerrados:
+        code = cerrar_bucles(programa, code)
+    return CodigoVM(programa, code)
+
+
+def preparar(tac_code, tipos=None, superinstrucciones=True, bucles_cerrados=True):
+    """Decodifica y prepara un TAC para TACInterpreter.ejecutar."""
+    return preparar_programa(decodificar(tac_code, tipos), superinstrucciones, bucles_cerrados)
+
+
+# ---------------------------------------------------------
+# Presupuestos de ejecución
+# ---------------------------------------------------------
+DEFAULT_MAX_INSTRUCTIONS = 10_000_000
+DEFAULT_CHECK_INTERVAL = 10_000
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, recurso, mensaje):
+        super().__init__(mensaje)
+        self.recurso = recurso
+
+
+class ResourceGovernor:
+    """
+    Presupuestos de instrucciones, tiempo de reloj (s) y memoria aproximada
+    (bytes) para una ejecución. None desactiva un presupuesto. La VM ejecuta
+    tramos de hasta `quota()` instrucciones y solo entonces llama a
+    `charge()`, así que el bucle principal no paga la comprobación por paso.
+    """
+
+    def __init__(self, max_instructions=DEFAULT_MAX_INSTRUCTIONS, max_seconds=None,
+                 max_memory=None, check_interval=DEFAULT_CHECK_INTERVAL):
+        self.max_instructions = max_instructions or None
+        self.max_seconds = max_seconds or None
+        self.max_memory = max_memory or None
+        self.check_interval = max(1, check_interval)
+        self.start()
+
+    def start(self):
+        self.instructions = 0
+        self.seconds = 0.0
+        self.memory = 0
+        self._inicio = time.perf_counter()
+        self._bytes_salida = 0
+        self._lineas_medidas = 0
+
+    def quota(self):
+        """Instrucciones que se pueden ejecutar antes de la siguiente comprobación."""
+        if self.max_instructions is None:
+            return self.check_interval
+        restantes = self.max_instructions - self.instructions
+        if restantes <= 0:
+            self._excedido("instrucciones")
+        return min(self.check_interval, restantes)
+
+    def restantes(self):
+        """Instrucciones que quedan del presupuesto, o None si no hay límite."""
+        if self.max_instructions is None:
+            return None
+        return self.max_instructions - self.instructions
+
+    def _medir_memoria(self, marco, salida):
+        for linea in salida[self._lineas_medidas:]:
+            self._bytes_salida += sys.getsizeof(linea)
+        self._lineas_medidas = len(salida)
+        return (sys.getsizeof(marco) + sum(map(sys.getsizeof, marco))
+                + sys.getsizeof(salida) + self._bytes_salida)
+
+    def charge(self, ejecutadas, marco, salida):
+        """Suma instrucciones ejecutadas y comprueba tiempo y memoria."""
+        self.instructions += ejecutadas
+        self.seconds = time.perf_counter() - self._inicio
+        if self.max_seconds is not None and self.seconds > self.max_seconds:
+            self._excedido("tiempo")
+        if self.max_memory is not None:
+            self.memory = self._medir_memoria(marco, salida)
+            if self.memory > self.max_memory:
+                self._excedido("memoria")
+
+    def finish(self, marco, salida):
+        self.seconds = time.perf_counter() - self._inicio
+        self.memory = self._medir_memoria(marco, salida)
+
+    def usage(self):
+        return {"instructions": self.instructions, "seconds": self.seconds, "memory": self.memory}
+
+    def _excedido(self, recurso):
+        if recurso == "instrucciones":
+            detalle = f"{self.instructions} instrucciones ejecutadas (límite {self.max_instructions})"
+            mensaje = f"Error: Bucle infinito detectado: {detalle}"
+        elif recurso == "tiempo":
+            detalle = f"{self.seconds:.2f} s de {self.max_seconds} s, {self.instructions} instrucciones"
+            mensaje = f"Error: Límite de tiempo excedido: {detalle}"
+        else:
+            detalle = f"~{self.memory} bytes de {self.max_memory}, {self.instructions} instrucciones"
+            mensaje = f"Error: Límite de memoria excedido: {detalle}"
+        raise BudgetExceeded(recurso, mensaje)
+
+
+class TACInterpreter:
+    # Qué recibe execute(): la lista de TAC ("tac") o el AST ("ast")
+    entrada = "tac"
+
+    def __init__(self, tipos=None, max_instructions=DEFAULT_MAX_INSTRUCTIONS, max_seconds=None,
+                 max_memory=None, check_interval=DEFAULT_CHECK_INTERVAL, superinstrucciones=True,
+                 bucles_cerrados=True):
         self.output = []
         self.labels = {}
         self.had_errors = False
-    
+        self.governor = ResourceGovernor(max_instructions, max_seconds, max_memory, check_interval)
+        self.tipos = tipos
+        self.programa = None
+        self.marco = []
+        self.superinstrucciones = superinstrucciones
+        self._fusiones = [0]
+        self.fusionadas = 0         # superinstrucciones ejecutadas en la última ejecución
+        self.bucles_cerrados = bucles_cerrados
+        self._cerradas = [0]
+        self._margen = [None]
+        self.cerradas = 0           # instrucciones resueltas en forma cerrada
+
+    @property
+    def memory(self):
+        # Acceso por nombre solo para depuración; la VM trabaja con slots
+        if self.programa is None:
+            return {}
+        return self.programa.variables(self.marco)
+
+    def volcar_memoria(self):
+        """Líneas 'nombre = valor (tipo)' del último marco ejecutado."""
+        if self.programa is None:
+            return []
+        lineas = []
+        for nombre, valor in self.memory.items():
+            tipo = self.programa.tipos_slots[self.programa.slots[nombre]]
+            lineas.append(f"{nombre} = {valor!r}" + (f" ({tipo})" if tipo else ""))
+        return lineas
+
+    def _reiniciar(self, programa):
+        """Estado nuevo para una ejecución: salida, errores, etiquetas y marco."""
+        self.output = []
+        self.had_errors = False
+        self.programa = programa
+        self.labels = dict(programa.etiquetas) if programa is not None else {}
+        self.marco = programa.nuevo_marco() if programa is not None else []
+
+    def _tabla_despacho(self, entradas=None, convertir=None):
+        # Un manejador por opcode; cada uno devuelve el siguiente pc
+        m = self.marco
+        out = self.output.append
+
+        if entradas is None:
+            def nop(d, a, b, pc):
+                return pc + 1
+        else:
+            # `input x` toma el siguiente valor; agotadas, vuelve a ser nop
+            siguiente = iter(entradas).__next__
+            tipos = self.programa.tipos_slots
+
+            def nop(d, a, b, pc):
+                if d is not None:
+                    try:
+                        valor = siguiente()
+                    except StopIteration:
+                        return pc + 1
+                    m[d] = valor if convertir is None else convertir(valor, tipos[d])
+                return pc + 1
+
+        def print_const(d, a, b, pc):
+            out(d)
+            return pc + 1
+
+        def print_var(d, a, b, pc):
+            out(str(m[d]))
+            return pc + 1
+
+        def if_eq(d, a, b, pc):
+            return d if m[a] == b else pc + 1
+
+        def goto(d, a, b, pc):
+            return d
+
+        def copy(d, a, b, pc):
+            m[d] = m[a]
+            return pc + 1
+
+        def lt(d, a, b, pc):
+            m[d] = 1 if m[a] < m[b] else 0
+            return pc + 1
+
+        def gt(d, a, b, pc):
+            m[d] = 1 if m[a] > m[b] else 0
+            return pc + 1
+
+        def le(d, a, b, pc):
+            m[d] = 1 if m[a] <= m[b] else 0
+            return pc + 1
+
+        def ge(d, a, b, pc):
+            m[d] = 1 if m[a] >= m[b] else 0
+            return pc + 1
+
+        def eq(d, a, b, pc):
+            m[d] = 1 if m[a] == m[b] else 0
+            return pc + 1
+
+        def ne(d, a, b, pc):
+            m[d] = 1 if m[a] != m[b] else 0
+            return pc + 1
+
+        def add(d, a, b, pc):
+            m[d] = _suma(m[a], m[b])
+            return pc + 1
+
+        def add_num(d, a, b, pc):
+            m[d] = m[a] + m[b]
+            return pc + 1
+
+        def sub(d, a, b, pc):
+            m[d] = m[a] - m[b]
+            return pc + 1
+
+        def mul(d, a, b, pc):
+            m[d] = m[a] * m[b]
+            return pc + 1
+
+        def div(d, a, b, pc):
+            vb = m[b]
+            m[d] = m[a] / vb if vb != 0 else 0
+            return pc + 1
+
+        # Superinstrucciones: cada una cubre dos instrucciones TAC y lo
+        # anota en `fusiones` para el presupuesto
+        fusiones = self._fusiones
+
+        def ifnot_lt(d, a, b, pc):
+            fusiones[0] += 1
+            return pc + 2 if m[a] < m[b] else d
+
+        def ifnot_gt(d, a, b, pc):
+            fusiones[0] += 1
+            return pc + 2 if m[a] > m[b] else d
+
+        def ifnot_le(d, a, b, pc):
+            fusiones[0] += 1
+            return pc + 2 if m[a] <= m[b] else d
+
+        def ifnot_ge(d, a, b, pc):
+            fusiones[0] += 1
+            return pc + 2 if m[a] >= m[b] else d
+
+        def ifnot_eq(d, a, b, pc):
+            fusiones[0] += 1
+            return pc + 2 if m[a] == m[b] else d
+
+        def ifnot_ne(d, a, b, pc):
+            fusiones[0] += 1
+            return pc + 2 if m[a] != m[b] else d
+
+        def add_var(d, a, b, pc):
+            fusiones[0] += 1
+            m[d] = _suma(m[a], m[b])
+            return pc + 2
+
+        def add_num_var(d, a, b, pc):
+            fusiones[0] += 1
+            m[d] = m[a] + m[b]
+            return pc + 2
+
+        def sub_var(d, a, b, pc):
+            fusiones[0] += 1
+            m[d] = m[a] - m[b]
+            return pc + 2
+
+        def mul_var(d, a, b, pc):
+            fusiones[0] += 1
+            m[d] = m[a] * m[b]
+            return pc + 2
+
+        def div_var(d, a, b, pc):
+            fusiones[0] += 1
+            vb = m[b]
+            m[d] = m[a] / vb if vb != 0 else 0
+            return pc + 2
+
+        genericos = (nop, print_const, print_var, if_eq, goto, copy,
+                     lt, gt, le, ge, eq, ne, add, sub, mul, div)
+        tipados = tuple(add_num if op in (OP_IADD, OP_FADD) else genericos[GENERICO[op]]
+                        for op in sorted(GENERICO))
+        cerradas, margen = self._cerradas, self._margen
+
+        def bucle(d, a, b, pc):
+            # Todas las vueltas menos la última de golpe, si caben enteras
+            # en lo que queda del presupuesto; luego la cabecera original
+            vueltas = d.vueltas(m)
+            if vueltas is not None and vueltas >= VUELTAS_MINIMAS:
+                costo = (vueltas - 1) * d.largo
+                if margen[0] is None or costo <= margen[0]:
+                    d.avanzar(m, vueltas - 1)
+                    cerradas[0] += costo
+                    if margen[0] is not None:
+                        margen[0] -= costo
+            op, d, a, b = d.respaldo
+            return tabla[op](d, a, b, pc)
+
+        fusionadas = (ifnot_lt, ifnot_gt, ifnot_le, ifnot_ge, ifnot_eq, ifnot_ne,
+                      add_var, add_num_var, sub_var, mul_var, div_var)
+        tabla = genericos + tipados + fusionadas + (bucle,)
+        return tabla
+
     def execute(self, tac_code):
+        """Ejecuta una lista de líneas TAC o un ProgramaTAC ya decodificado."""
         if not tac_code:
             return ["Error: No hay código para ejecutar"]
-            
-        lines = [line.strip() for line in tac_code if line.strip()]
-        
-        # Encontrar etiquetas
-        for i, line in enumerate(lines):
-            if line.endswith(':'):
-                label_name = line[:-1]
-                self.labels[label_name] = i
-        
-        # Ejecutar
+        if not isinstance(tac_code, ProgramaTAC):
+            tac_code = decodificar(tac_code, self.tipos)
+        return self.ejecutar(preparar_programa(tac_code, self.superinstrucciones,
+                                               self.bucles_cerrados))
+
+    def ejecutar(self, codigo, entradas=None, convertir=None):
+        """
+        Ejecuta un CodigoVM de `preparar` con estado nuevo (salida, marco,
+        presupuestos), así que la misma instancia se puede reutilizar.
+        `entradas` son los valores que van tomando los `input x`;
+        `convertir(valor, tipo)`, si se da, los adapta al tipo semántico de
+        la variable que los recibe.
+        """
+        self._reiniciar(codigo.programa)
+        simple, code = codigo.simple, codigo.code
+        n = len(code)
+        handlers = self._tabla_despacho(entradas, convertir)
+        fusiones, cerradas, margen = self._fusiones, self._cerradas, self._margen
+        self.fusionadas = self.cerradas = 0
+        governor = self.governor
+        governor.start()
         pc = 0
-        max_iterations = 1000
-        iteration_count = 0
-        
-        while pc < len(lines) and iteration_count < max_iterations:
-            iteration_count += 1
-            line = lines[pc]
-            
-            if not line or line.endswith(':'):
-                pc += 1
-                continue
-
-            if line.startswith("print"):
-                value = line[5:].strip()
-                if (value.startswith('"') and value.endswith('"')) or (value.startswith("'") and value.endswith("'")):
-                    self.output.append(value[1:-1])
-                else:
-                    self.output.append(str(self.memory.get(value, 0)))
-                pc += 1
-            
-            elif line.startswith("if"):
-                parts = line.split()
-                if len(parts) >= 5 and parts[2] == "==":  # Formato: if t0 == 0 goto L1
-                    var_name = parts[1]
-                    compare_value = int(parts[3])
-                    label = parts[5]
-                    
-                    var_value = self.memory.get(var_name, 0)
-                    
-                    if var_value == compare_value:
-                        if label in self.labels:
-                            pc = self.labels[label]
-                        else:
-                            pc += 1
-                    else:
-                        pc += 1
-                else:
-                    pc += 1
-            
-            elif line.startswith("goto"):
-                parts = line.split()
-                if len(parts) >= 2:
-                    label = parts[1]
-                    if label in self.labels:
-                        pc = self.labels[label]
-                    else:
-                        pc += 1
-                else:
-                    pc += 1
-            
-            elif ":=" in line:
-                left, right = line.split(":=")
-                left = left.strip()
-                right = right.strip()
-                
-                if " < " in right:
-                    a, b = right.split(" < ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    self.memory[left] = 1 if val_a < val_b else 0
-                
-                elif " > " in right:
-                    a, b = right.split(" > ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    self.memory[left] = 1 if val_a > val_b else 0
-                
-                elif " <= " in right:
-                    a, b = right.split(" <= ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    self.memory[left] = 1 if val_a <= val_b else 0
-                
-                elif " >= " in right:
-                    a, b = right.split(" >= ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    self.memory[left] = 1 if val_a >= val_b else 0
-                
-                elif " == " in right:
-                    a, b = right.split(" == ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    self.memory[left] = 1 if val_a == val_b else 0
-                
-                elif " != " in right:
-                    a, b = right.split(" != ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    self.memory[left] = 1 if val_a != val_b else 0
-                
-                elif " + " in right:
-                    a, b = right.split(" + ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    if isinstance(val_a, (int, float)) and isinstance(val_b, (int, float)):
-                        self.memory[left] = val_a + val_b
-                    else:
-                        self.memory[left] = str(val_a) + str(val_b)
-                
-                elif " - " in right:
-                    a, b = right.split(" - ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    self.memory[left] = val_a - val_b
-                
-                elif " * " in right:
-                    a, b = right.split(" * ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    self.memory[left] = val_a * val_b
-                
-                elif " / " in right:
-                    a, b = right.split(" / ")
-                    val_a = self.get_value(a)
-                    val_b = self.get_value(b)
-                    if val_b != 0:
-                        self.memory[left] = val_a / val_b
-                    else:
-                        self.memory[left] = 0
-                
-                else:
-                    self.memory[left] = self.get_value(right)
-                
-                pc += 1
-            
-            else:
-                pc += 1
-        
-        if iteration_count >= max_iterations:
-            self.output.append("Error: Bucle infinito detectado")
+
+        try:
+            while pc < n:
+                # Tramo de hasta `cupo` despachos sin comprobar presupuestos.
+                # Una superinstrucción cuenta por dos, así que cerca del límite
+                # de instrucciones se sigue con el código sin fusionar, que
+                # tiene los mismos pc, para parar en la instrucción exacta.
+                # Un bucle cerrado solo gasta lo que sobra tras el tramo
+                cupo = governor.quota()
+                limite = governor.restantes()
+                tramo = code if limite is None or limite >= 2 * cupo else simple
+                margen[0] = None if limite is None else limite - 2 * cupo
+                fusiones[0] = cerradas[0] = 0
+                ejecutadas = cupo
+                for i in range(cupo):
+                    if pc >= n:
+                        ejecutadas = i
+                        break
+                    op, d, a, b = tramo[pc]
+                    pc = handlers[op](d, a, b, pc)
+                self.fusionadas += fusiones[0]
+                self.cerradas += cerradas[0]
+                governor.charge(ejecutadas + fusiones[0] + cerradas[0], self.marco, self.output)
+        except BudgetExceeded as e:
+            self.output.append(str(e))
             self.had_errors = True
-        
+        governor.finish(self.marco, self.output)
+
         return self.output
-    
+
     def get_value(self, operand):
-        if not operand:
-            return 0
-        
-        if (operand.startswith('"') and operand.endswith('"')) or (operand.startswith("'") and operand.endswith("'")):
-            return operand[1:-1]
-        
-        try:
-            if '.' in operand:
-                return float(operand)
-            else:
-                return int(operand)
-        except:
-            pass
-        
-        if operand in self.memory:
-            return self.memory[operand]
-        
-        return 0
-    
+        valor = valor_literal(operand)
+        if valor is not None:
+            return valor
+        return self.memory.get(operand, 0)
+
     def had_execution_errors(self):
         return self.had_errors